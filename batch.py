@@ -0,0 +1,165 @@
+import numpy as np
+
+from engine import (CARD_BID, CARD_POINTS, CARD_RANK, CARD_RANK_INDEX, CARD_SUIT, CARDS_PER_PLAYER,
+                    DECK_SIZE, NO_SUIT, NUM_DISCARDS, NUM_PLAYERS, NUM_TRICKS, TRICK_STRENGTH)
+from scoring import score_rounds
+
+# Array forms of the engine's per-card tables, indexed by card id.
+SUIT = np.array(CARD_SUIT, dtype=np.int8)
+POINTS = np.array(CARD_POINTS, dtype=np.int16)
+BID = np.array(CARD_BID, dtype=np.int16)
+RANK_INDEX = np.array(CARD_RANK_INDEX, dtype=np.int8)
+SUIT_MEMBERS = np.array([[CARD_SUIT[c] == s for c in range(DECK_SIZE)] for s in range(NO_SUIT + 1)])
+IS_NINE = np.array([rank == "Nine" for rank in CARD_RANK])
+STRENGTH = np.array(TRICK_STRENGTH, dtype=np.int8)  # [lead_suit, trump_suit, card]
+
+
+class BatchState:
+    """Trick-phase view of N tables, handed to play policies.
+
+    held is a (N, 3, 37) bool array of the cards still in each hand, trick is
+    the (N, k) array of card ids already played to the current trick, and
+    seat is the (N,) seat to play at every table.
+    """
+    def __init__(self, held, trump_suit, bids):
+        self.held = held
+        self.trump_suit = trump_suit
+        self.bids = bids
+        self.points_won = np.zeros(bids.shape, dtype=np.int16)
+        self.tricks_won = np.zeros(bids.shape, dtype=np.int8)
+        self.leader = np.zeros(len(held), dtype=np.int8)
+        self.seat = self.leader
+        self.lead_suit = np.full(len(held), NO_SUIT, dtype=np.int8)
+        self.trick = np.empty((len(held), 0), dtype=np.int8)
+        self.trick_number = 1
+
+
+def random_keys(rng, mask):
+    """Uniform random keys where mask is set and -1 elsewhere, for argmax-based choice."""
+    return np.where(mask, rng.random(mask.shape, dtype=np.float32), np.float32(-1.0))
+
+
+def random_play(state, legal, rng):
+    """Play policy: a uniformly random legal card at every table."""
+    counts = legal.cumsum(axis=1, dtype=np.int8)
+    picks = (rng.random(len(legal)) * counts[:, -1]).astype(np.int8)
+    return (counts > picks[:, None]).argmax(axis=1)
+
+
+def highest_play(state, legal, rng):
+    """Play policy: the legal card with the highest rank, trumps first."""
+    trumps = SUIT_MEMBERS[state.trump_suit] & (state.trump_suit[:, None] != NO_SUIT)
+    strength = np.where(trumps, 20, 0) + RANK_INDEX + rng.random(legal.shape) * 0.5
+    return np.where(legal, strength, -100).argmax(axis=1)
+
+
+def random_discard(hand, trump_suit, rng):
+    """Discard policy: 3 uniformly random cards from every (N, 37) hand."""
+    return np.argsort(-random_keys(rng, hand), axis=1)[:, :NUM_DISCARDS]
+
+
+def deal_batch(n, rng):
+    """Return an (N, 37) array of shuffled decks, one argsort of random keys per row."""
+    return np.argsort(rng.random((n, DECK_SIZE), dtype=np.float32), axis=1).astype(np.int8)
+
+
+def hands_from_deals(deals):
+    """Return the (N, 3, 37) held-card array and the (N,) trump cards for dealt decks."""
+    n = len(deals)
+    dealt = NUM_PLAYERS * CARDS_PER_PLAYER
+    held = np.zeros((n, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+    rows = np.arange(n)[:, None]
+    for seat in range(NUM_PLAYERS):
+        held[rows, seat, deals[:, seat:dealt:NUM_PLAYERS]] = True
+    return held, deals[:, dealt]
+
+
+def trump_suits(trump_cards):
+    """Trump suit per table, NO_SUIT when a Nine or the Joker is revealed."""
+    return np.where(IS_NINE[trump_cards], NO_SUIT, SUIT[trump_cards]).astype(np.int8)
+
+
+def discard_batch(held, trump_suit, discard_policy, rng):
+    """Let every seat discard 3 cards; return the (N, 3, 3) discards and (N, 3) bids."""
+    rows = np.arange(len(held))[:, None]
+    discards = np.empty((len(held), NUM_PLAYERS, NUM_DISCARDS), dtype=np.int8)
+    for seat in range(NUM_PLAYERS):
+        chosen = discard_policy(held[:, seat], trump_suit, rng)
+        held[rows, seat, chosen] = False
+        discards[:, seat] = chosen
+    return discards, BID[discards].sum(axis=2)
+
+
+def resolve_tricks(cards, trump_suit):
+    """Return the winning position (0-2 in play order) of every row of an (N, 3) trick array."""
+    strengths = STRENGTH[SUIT[cards[:, :1]], trump_suit[:, None], cards]
+    return strengths.argmax(axis=1)  # argmax keeps the first of ties, like max()
+
+
+def play_tricks(state, play_policy, rng):
+    """Play all 9 tricks at every table in lockstep; return the (N, 27) cards in play order."""
+    n = len(state.held)
+    rows = np.arange(n)
+    plays = np.empty((n, NUM_TRICKS, NUM_PLAYERS), dtype=np.int8)
+    for trick_number in range(NUM_TRICKS):
+        trick = plays[:, trick_number]
+        state.trick_number = trick_number + 1
+        state.lead_suit = np.full(n, NO_SUIT, dtype=np.int8)
+        for position in range(NUM_PLAYERS):
+            state.trick = trick[:, :position]
+            seat = (state.leader + position) % NUM_PLAYERS
+            state.seat = seat
+            hand = state.held[rows, seat]
+            legal = hand & SUIT_MEMBERS[state.lead_suit]
+            legal = np.where(legal.any(axis=1)[:, None] & (state.lead_suit != NO_SUIT)[:, None], legal, hand)
+            cards = play_policy(state, legal, rng).astype(np.int8)
+            state.held[rows, seat, cards] = False
+            if position == 0:
+                state.lead_suit = SUIT[cards]
+            trick[:, position] = cards
+        winner = (state.leader + resolve_tricks(trick, state.trump_suit)) % NUM_PLAYERS
+        state.points_won[rows, winner] += POINTS[trick].sum(axis=1, dtype=np.int16)
+        state.tricks_won[rows, winner] += 1
+        state.leader = winner.astype(np.int8)
+    return plays.reshape(n, NUM_TRICKS * NUM_PLAYERS)
+
+
+class BatchResult:
+    """Outcome arrays for N simulated rounds."""
+    def __init__(self, deals, trump_suit, discards, bids, plays, state):
+        self.deals = deals
+        self.trump_suit = trump_suit
+        self.discards = discards
+        self.bids = bids
+        self.plays = plays
+        self.points_won = state.points_won
+        self.tricks_won = state.tricks_won
+        self.base, self.bonus, self.round_scores = score_rounds(bids, state.points_won)
+
+    def __len__(self):
+        return len(self.deals)
+
+
+def simulate(n, play_policy=random_play, discard_policy=random_discard, seed=None):
+    """Deal, bid, play and score N independent rounds at once."""
+    rng = np.random.default_rng(seed)
+    deals = deal_batch(n, rng)
+    held, trump_cards = hands_from_deals(deals)
+    trump_suit = trump_suits(trump_cards)
+    discards, bids = discard_batch(held, trump_suit, discard_policy, rng)
+    state = BatchState(held, trump_suit, bids)
+    plays = play_tricks(state, play_policy, rng)
+    return BatchResult(deals, trump_suit, discards, bids, plays, state)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    start = time.perf_counter()
+    result = simulate(n)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {n} rounds in {elapsed:.2f}s ({n / elapsed:,.0f} rounds/s)")
+    print(f"Mean points won per seat: {result.points_won.mean(axis=0).round(2)}")
+    print(f"Mean round score per seat: {result.round_scores.mean(axis=0).round(2)}")
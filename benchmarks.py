@@ -0,0 +1,277 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+BASELINE = "bench_baseline.json"
+THRESHOLD = 0.15  # A metric regresses when it gets this much slower than the baseline
+BENCHMARKS = {}  # name -> (kind, setup); setup() returns (callable, operations per call)
+
+
+class Skip(Exception):
+    """Raised by a benchmark setup that cannot run on this machine."""
+
+
+def benchmark(name, kind="micro"):
+    """Register a benchmark setup function under name."""
+    def register(setup):
+        BENCHMARKS[name] = (kind, setup)
+        return setup
+    return register
+
+
+@benchmark("deck.new")
+def _deck_new():
+    from cards import Deck
+    return Deck, 1
+
+
+@benchmark("deck.shuffle")
+def _deck_shuffle():
+    from cards import Deck
+    return Deck().shuffle, 1
+
+
+@benchmark("deck.deal")
+def _deck_deal():
+    from cards import Deck
+    deck = Deck()
+    deck.shuffle()
+
+    def deal():
+        deck.position = 0
+        deck.deal(num_players=3, cards_per_player=12)
+    return deal, 1
+
+
+@benchmark("trick.winner")
+def _trick_winner():
+    from engine import DECK_SIZE, NO_SUIT, trick_winner
+    rng = random.Random(0)
+    tricks = [(rng.sample(range(DECK_SIZE), 3), rng.choice(range(NO_SUIT + 1))) for _ in range(1000)]
+
+    def resolve():
+        for cards, trump_suit in tricks:
+            trick_winner(cards, trump_suit)
+    return resolve, len(tricks)
+
+
+@benchmark("trick.resolve_batch")
+def _trick_resolve_batch():
+    import numpy as np
+    from batch import resolve_tricks
+    from engine import DECK_SIZE, NO_SUIT
+    rng = np.random.default_rng(0)
+    cards = np.argsort(rng.random((100000, DECK_SIZE)), axis=1)[:, :3].astype(np.int8)
+    trump_suit = rng.integers(0, NO_SUIT + 1, len(cards)).astype(np.int8)
+    return lambda: resolve_tricks(cards, trump_suit), len(cards)
+
+
+@benchmark("score.round")
+def _score_round():
+    from scoring import score_round
+    rng = random.Random(0)
+    rounds = [([rng.randrange(0, 100, 10) for _ in range(3)], [rng.randrange(121) for _ in range(3)])
+              for _ in range(1000)]
+
+    def score():
+        for bids, points_won in rounds:
+            score_round(bids, points_won)
+    return score, len(rounds)
+
+
+@benchmark("score.rounds_batch")
+def _score_rounds_batch():
+    import numpy as np
+    from scoring import score_rounds
+    rng = np.random.default_rng(0)
+    bids = rng.integers(0, 10, (1000000, 3)).astype(np.int16) * 10
+    points_won = rng.integers(0, 121, bids.shape).astype(np.int16)
+    return lambda: score_rounds(bids, points_won), len(bids)
+
+
+@benchmark("image.load_60x90")
+def _image_small():
+    return _image_loader((60, 90))
+
+
+@benchmark("image.load_100x150")
+def _image_large():
+    return _image_loader((100, 150))
+
+
+def _image_loader(size):
+    from cards import CARDS
+    game = _headless_game()
+    cards = [(card.rank, card.suit if card.suit != "Joker" else None) for card in CARDS]
+
+    def load():
+        for rank, suit in cards:
+            game.load_card_image(rank, suit, size=size)
+    return load, len(cards)
+
+
+@benchmark("round.simulated", kind="macro")
+def _simulated_round():
+    from engine import play_random_round
+    rng = random.Random(0)
+    return lambda: play_random_round(rng), 1
+
+
+@benchmark("game.target_500", kind="macro")
+def _game_to_target():
+    from bots import RandomBot
+    from engine import play_game
+    rng = random.Random(0)
+    bots = [RandomBot() for _ in range(3)]
+    return lambda: play_game(bots, target_score=500, rng=rng), 1
+
+
+@benchmark("gui.setup_game_ui", kind="macro")
+def _setup_game_ui():
+    game = _headless_game()
+    game.player_names = ["Player 1", "Player 2", "Player 3"]
+    game.win_condition = 2
+    game.max_rounds = 3
+    game.initialize_game()
+    game.setup_bidding_phase()
+
+    def redraw():
+        game.setup_game_ui()
+        game.root.update_idletasks()
+        game.card_images.clear()  # Drop the redraw's images so repeats do not pile them up
+    return redraw, 1
+
+
+_games = []
+
+
+def _headless_game():
+    # One hidden CounterPointGame window shared by every Tk benchmark
+    if not _games:
+        import tkinter
+        try:
+            import gui
+            game = gui.CounterPointGame()
+        except tkinter.TclError as error:
+            raise Skip(f"Tk cannot open a window ({error})") from None
+        game.root.withdraw()
+        _games.append(game)
+    return _games[0]
+
+
+def measure(operation, operations, repeat=5):
+    """Return (best, median) seconds per operation and the loops per run, over repeat runs of at least 0.2 s."""
+    timer = timeit.Timer(operation)
+    loops, _ = timer.autorange()
+    times = sorted(elapsed / (loops * operations) for elapsed in timer.repeat(repeat, loops))
+    return times[0], times[len(times) // 2], loops
+
+
+def run(names=None, repeat=5, progress=sys.stderr):
+    """Run benchmarks (all by default) and return the JSON-ready report."""
+    results = {}
+    skipped = {}
+    for name in names or BENCHMARKS:
+        kind, setup = BENCHMARKS[name]
+        try:
+            operation, operations = setup()
+        except Skip as reason:
+            skipped[name] = str(reason)
+            if progress:
+                print(f"{name:<22} skipped: {reason}", file=progress)
+            continue
+        best, median, loops = measure(operation, operations, repeat)
+        results[name] = {"kind": kind, "seconds": best, "median_seconds": median, "operations": operations,
+                         "loops": loops}
+        if progress:
+            print(f"{name:<22} {_format(best):>10} per op  (median {_format(median)})", file=progress)
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": repeat, "benchmarks": results,
+            "skipped": skipped}
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """Return (lines, regressed names) comparing a report's best times with a baseline report's."""
+    lines = [f"{'benchmark':<22} {'baseline':>10} {'current':>10} {'change':>8}"]
+    regressed = []
+    for name, result in report["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            lines.append(f"{name:<22} {'-':>10} {_format(result['seconds']):>10} {'new':>8}")
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            regressed.append(name)
+            flag = f"  REGRESSED (over +{threshold:.0%})"
+        lines.append(f"{name:<22} {_format(before['seconds']):>10} {_format(result['seconds']):>10} "
+                     f"{change:>+8.1%}{flag}")
+    for name in baseline["benchmarks"]:
+        if name not in report["benchmarks"]:
+            reason = report["skipped"].get(name, "not run")
+            lines.append(f"{name:<22} {_format(baseline['benchmarks'][name]['seconds']):>10} {'-':>10} "
+                         f"{'':>8}  ({reason})")
+    return lines, regressed
+
+
+def _format(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time CounterPoint's engine, scoring, images and UI.")
+    parser.add_argument("names", nargs="*", metavar="name", help="benchmarks to run (default: all); "
+                        "a name ending in '.' runs a whole group, such as 'deck.'")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--output", help="write the JSON report to this file ('-' for stdout)")
+    parser.add_argument("--baseline", default=BASELINE, help=f"baseline report to compare with (default: {BASELINE})")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline instead")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed slowdown before a metric fails (default: {THRESHOLD})")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (kind, _) in BENCHMARKS.items():
+            print(f"{name:<22} {kind}")
+        return 0
+    names = [name for name in BENCHMARKS
+             if not args.names or any(name == wanted or wanted.endswith(".") and name.startswith(wanted)
+                                      for wanted in args.names)]
+    if not names:
+        parser.error("no benchmark matches " + ", ".join(args.names))
+    report = run(names, args.repeat)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.", file=sys.stderr)
+        return 0
+    lines, regressed = compare(report, baseline, args.threshold)
+    print("\n".join(lines), file=sys.stderr)
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) regressed: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
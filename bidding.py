@@ -0,0 +1,183 @@
+from itertools import combinations
+
+import numpy as np
+
+from batch import BID, BatchState, play_tricks, random_discard, random_play
+from cache import hand_key
+from engine import (ALL_CARDS, CARD_BID, CARD_POINTS, CARD_RANK_INDEX, CARD_SUIT, DECK_SIZE, JOKER, NUM_DISCARDS,
+                    NUM_PLAYERS, cards_in, mask_of, trump_suit_of)
+from scoring import score_rounds
+
+
+class DiscardOption:
+    """Simulated outcome of discarding one set of 3 cards.
+
+    points_won and round_scores hold the seat's result in every simulated
+    round. Options whose remaining hands play identically share the arrays.
+    """
+    def __init__(self, discard, bid, points_won, round_scores):
+        self.discard = discard
+        self.bid = bid
+        self.points_won = points_won
+        self.round_scores = round_scores
+
+    @property
+    def expected_score(self):
+        return float(self.round_scores.mean())
+
+    @property
+    def expected_points(self):
+        return float(self.points_won.mean())
+
+    def __repr__(self):
+        return (f"DiscardOption({self.discard}, bid={self.bid}, expected_points={self.expected_points:.1f}, "
+                f"expected_score={self.expected_score:.1f})")
+
+
+def play_groups(hand, trump_card):
+    """Map each card in a hand bitboard to the first card of its group of interchangeable cards.
+
+    Cards are interchangeable when they share a suit and point value and no
+    card another seat could hold ranks between them: keeping either one
+    wins and loses exactly the same tricks. While the Joker is in play a
+    Joker lead makes non-trump cards of every suit compete on rank alone,
+    so outside cards of the other plain suits count too, ties included.
+    """
+    outside = ALL_CARDS & ~hand & ~(1 << trump_card)
+    trump_suit = trump_suit_of(trump_card)
+    groups = {}
+    previous = -1
+    for card in cards_in(hand):
+        suit = CARD_SUIT[card]
+        if (previous >= 0 and suit == CARD_SUIT[previous] and CARD_POINTS[card] == CARD_POINTS[previous]
+                and not outside & ((1 << card) - (1 << previous))
+                and (trump_card == JOKER or suit == trump_suit
+                     or not outside & _plain_rank_band(CARD_RANK_INDEX[card], CARD_RANK_INDEX[previous], trump_suit))):
+            groups[card] = groups[previous]
+        else:
+            groups[card] = card
+        previous = card
+    return groups
+
+
+def _plain_rank_band(low, high, trump_suit):
+    # Non-trump suit cards ranked from low to high, inclusive
+    return sum(1 << c for c in range(JOKER) if CARD_SUIT[c] != trump_suit and low <= CARD_RANK_INDEX[c] <= high)
+
+
+def canonical_kept(hand, discard, groups):
+    """Return the bitboard of the remaining hand with every group's kept cards moved to its strongest members."""
+    kept = hand
+    for card in discard:
+        kept &= ~(1 << card)
+    canonical = 0
+    members = {}
+    for card in cards_in(hand):
+        members.setdefault(groups[card], []).append(card)
+    for cards in members.values():
+        for card in cards[:sum(kept >> c & 1 for c in cards)]:
+            canonical |= 1 << card
+    return canonical
+
+
+def simulate_kept_hands(kept_hands, hand, trump_card, seat=0, samples=128, play_policy=random_play,
+                        discard_policy=random_discard, rng=None):
+    """Play every remaining hand against the same sampled opponent deals.
+
+    The cards outside hand (apart from the trump card) are split between
+    the two opponents, who then discard with discard_policy; all kept hands
+    are played against those same tables. Returns the (K, samples, 3)
+    points won and the (samples, 3) opponent bids, with zeros in seat's column.
+    """
+    rng = np.random.default_rng(rng)
+    opponents = [other for other in range(NUM_PLAYERS) if other != seat]
+    others = np.array(cards_in(ALL_CARDS & ~hand & ~(1 << trump_card)), dtype=np.int8)
+    dealt = others[np.argsort(rng.random((samples, len(others)), dtype=np.float32), axis=1)]
+    held = np.zeros((samples, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+    rows = np.arange(samples)[:, None]
+    for position, other in enumerate(opponents):
+        held[rows, other, dealt[:, position::len(opponents)]] = True
+    trump_suit = np.full(samples, trump_suit_of(trump_card), dtype=np.int8)
+    bids = np.zeros((samples, NUM_PLAYERS), dtype=np.int16)
+    for other in opponents:
+        chosen = discard_policy(held[:, other], trump_suit, rng)
+        held[rows, other, chosen] = False
+        bids[:, other] = BID[chosen].sum(axis=1)
+
+    count = len(kept_hands)
+    kept = np.zeros((count, DECK_SIZE), dtype=bool)
+    for i, mask in enumerate(kept_hands):
+        kept[i, cards_in(mask)] = True
+    tables = np.tile(held, (count, 1, 1))
+    tables[:, seat] = np.repeat(kept, samples, axis=0)
+    own_bids = [sum(CARD_BID[c] for c in cards_in(hand & ~mask)) for mask in kept_hands]
+    table_bids = np.tile(bids, (count, 1))
+    table_bids[:, seat] = np.repeat(own_bids, samples)
+    state = BatchState(tables, np.tile(trump_suit, count), table_bids)
+    play_tricks(state, play_policy, rng)
+    return state.points_won.reshape(count, samples, NUM_PLAYERS), bids
+
+
+def evaluate_discards(hand, trump_card, seat=0, samples=128, play_policy=random_play, discard_policy=random_discard,
+                      seed=None):
+    """Estimate the round score of all 220 discards from a 12-card hand.
+
+    hand is a bitboard or a list of card ids, and seat 0 leads the first
+    trick. Every discard is scored against the same simulated opponent deals.
+    Discards whose remaining hands play identically (see play_groups) are
+    simulated once. Returns DiscardOptions, best expected score first.
+    """
+    hand = hand if isinstance(hand, int) else mask_of(hand)
+    groups = play_groups(hand, trump_card)
+    discards = list(combinations(cards_in(hand), NUM_DISCARDS))
+    keys = [canonical_kept(hand, discard, groups) for discard in discards]
+    kept_hands = list(dict.fromkeys(keys))
+    points_won, bids = simulate_kept_hands(kept_hands, hand, trump_card, seat, samples, play_policy,
+                                           discard_policy, seed)
+
+    # Interchangeable cards share a suit, so every discard of a group bids the same
+    table_bids = np.repeat(bids[None], len(kept_hands), axis=0)
+    table_bids[:, :, seat] = [[sum(CARD_BID[c] for c in cards_in(hand & ~kept))] for kept in kept_hands]
+    _, _, round_scores = score_rounds(table_bids.reshape(-1, NUM_PLAYERS), points_won.reshape(-1, NUM_PLAYERS))
+    round_scores = round_scores.reshape(len(kept_hands), -1, NUM_PLAYERS)
+
+    outcomes = {kept: (int(table_bids[i, 0, seat]), points_won[i, :, seat], round_scores[i, :, seat])
+                for i, kept in enumerate(kept_hands)}
+    options = [DiscardOption(discard, *outcomes[kept]) for discard, kept in zip(discards, keys)]
+    options.sort(key=lambda option: -option.expected_score)
+    return options
+
+
+def best_discard(hand, trump_card, seat=0, samples=128, seed=None, cache=None):
+    """Return the discard with the highest expected round score.
+
+    With a cache.HandCache and a seed, a hand already evaluated under the
+    same trump card, seat, samples and seed is answered from the cache.
+    Unseeded calls draw fresh deals every time and are never cached.
+    """
+    hand = hand if isinstance(hand, int) else mask_of(hand)
+    if cache is None or seed is None:
+        return evaluate_discards(hand, trump_card, seat, samples, seed=seed)[0].discard
+    return cache.get_or_compute((hand_key(hand, trump_card, seat), samples, seed),
+                                lambda: evaluate_discards(hand, trump_card, seat, samples, seed=seed)[0].discard)
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    from engine import card_name
+
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    deal = list(range(DECK_SIZE))
+    random.Random(seed).shuffle(deal)
+    hand = deal[:12]
+    start = time.perf_counter()
+    options = evaluate_discards(hand, deal[-1], seed=seed)
+    elapsed = time.perf_counter() - start
+    simulated = len({id(option.points_won) for option in options})
+    print(f"Hand: {', '.join(card_name(c) for c in sorted(hand))}; trump card {card_name(deal[-1])}")
+    print(f"Evaluated {len(options)} discards ({simulated} distinct hands) in {elapsed * 1000:.0f} ms")
+    for option in options[:5]:
+        print(f"  {', '.join(card_name(c) for c in option.discard)}: bid {option.bid}, "
+              f"points {option.expected_points:.1f}, score {option.expected_score:.1f}")
@@ -0,0 +1,191 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from multiprocessing import Pool
+
+from bidding import evaluate_discards
+from engine import (CARD_BID, CARD_SUIT, CARDS_PER_PLAYER, DECK_SIZE, JOKER, NO_SUIT, NUM_DISCARDS, RANKS,
+                    SUIT_MASKS, SUITS, cards_in, mask_of, trump_suit_of)
+
+# Bid table file layout, all integers little-endian:
+#
+#   header   HEADER: magic b"CPBT", format version, hands simulated per
+#            shape, simulated rounds per hand
+#   values   uint16[SHAPES][BID_CLASSES]: expected points won, in tenths
+#            of a point, by the best 9-card hand left after a discard that
+#            bids 10 * class; MISSING where no hand of the shape can make
+#            that bid
+#
+# A hand's shape is its number of cards in each suit, whether it holds the
+# Joker and the trump suit (NO_SUIT for no trump). Bids differ by suit, so
+# suits are not interchangeable and the shape keeps them in order. The
+# table is dense, so a shape's row is found without a search:
+#   row = (((trump * 2 + joker) * 10 + hearts) * 10 + diamonds) * 100 + clubs * 10 + spades
+#
+# A row averages the header's number of hands dealt at random with that shape, each scored
+# with bidding.evaluate_discards from seat 0. Per hand, the best discard of
+# each class is picked on one half of the simulated rounds and its points
+# are measured on the other half, so noise does not inflate the maximum.
+
+MAGIC = b"CPBT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH")
+MISSING = 0xFFFF
+SUIT_SIZE = len(RANKS)
+SUIT_LENGTHS = SUIT_SIZE + 1  # A hand holds 0 to 9 cards of a suit
+BID_CLASSES = NUM_DISCARDS * max(CARD_BID) // 10 + 1
+SHAPES = (NO_SUIT + 1) * 2 * SUIT_LENGTHS ** len(SUITS)
+ROW = struct.Struct(f"<{BID_CLASSES}H")
+
+
+def shape_of(hand, trump_card):
+    """Return the row index of a 12-card hand bitboard and the revealed trump card."""
+    row = trump_suit_of(trump_card) * 2 + (hand >> JOKER & 1)
+    for suit in range(len(SUITS)):
+        row = row * SUIT_LENGTHS + (hand & SUIT_MASKS[suit]).bit_count()
+    return row
+
+
+def shape_from_row(row):
+    """Return the (suit lengths, joker, trump suit) a row index was made from."""
+    lengths = []
+    for _ in SUITS:
+        row, length = divmod(row, SUIT_LENGTHS)
+        lengths.append(length)
+    trump_suit, joker = divmod(row, 2)
+    return lengths[::-1], joker, trump_suit
+
+
+def deal_shape(lengths, joker, trump_suit, rng):
+    """Deal a random hand bitboard and trump card of a shape, or None if the shape cannot be dealt."""
+    # A trump card of a suit leaves only SUIT_SIZE - 1 of that suit to hold
+    trump_cards = [card for card in range(DECK_SIZE) if trump_suit_of(card) == trump_suit
+                   and card != (JOKER if joker else -1)
+                   and (card == JOKER or lengths[CARD_SUIT[card]] < SUIT_SIZE)]
+    if not trump_cards or sum(lengths) + joker != CARDS_PER_PLAYER:
+        return None
+    trump_card = rng.choice(trump_cards)
+    hand = joker << JOKER
+    for suit, length in enumerate(lengths):
+        for card in rng.sample(cards_in(SUIT_MASKS[suit] & ~(1 << trump_card)), length):
+            hand |= 1 << card
+    return hand, trump_card
+
+
+def _hand_size(row):
+    lengths, joker, _ = shape_from_row(row)
+    return sum(lengths) + joker
+
+
+def solve_row(job):
+    """Worker entry point: the packed values of one row, or None if the shape cannot be dealt."""
+    row, hands, samples, seed = job
+    rng = random.Random(seed)
+    lengths, joker, trump_suit = shape_from_row(row)
+    totals = [0.0] * BID_CLASSES
+    counts = [0] * BID_CLASSES
+    for _ in range(hands):
+        dealt = deal_shape(lengths, joker, trump_suit, rng)
+        if dealt is None:
+            return None
+        best = {}
+        for option in evaluate_discards(*dealt, samples=samples, seed=rng.getrandbits(32)):
+            chosen = option.points_won[:samples // 2].mean()
+            if option.bid not in best or chosen > best[option.bid][0]:
+                best[option.bid] = (chosen, option.points_won[samples // 2:].mean())
+        for bid, (_, measured) in best.items():
+            totals[bid // 10] += measured
+            counts[bid // 10] += 1
+    # A bid class holds either every sampled hand of the shape or none of them
+    return ROW.pack(*(round(10 * total / count) if count else MISSING for total, count in zip(totals, counts)))
+
+
+def build(path, hands=8, samples=32, workers=None, seed=0, progress=sys.stderr):
+    """Simulate every hand shape and write a bid table file."""
+    start_time = time.perf_counter()
+    rows = [row for row in range(SHAPES) if _hand_size(row) == CARDS_PER_PLAYER]
+    values = bytearray(ROW.pack(*[MISSING] * BID_CLASSES)) * SHAPES
+    jobs = [(row, hands, samples, seed * SHAPES + row) for row in rows]
+    done = 0
+    with Pool(workers or os.cpu_count() or 1) as pool:
+        for row, packed in zip(rows, pool.imap(solve_row, jobs, chunksize=4)):
+            if packed is not None:
+                values[row * ROW.size:(row + 1) * ROW.size] = packed
+            done += 1
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{done:,}/{len(rows):,} shapes  {elapsed:.0f}s", end="", file=progress, flush=True)
+    if progress:
+        print(file=progress)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, hands, samples))
+        f.write(values)
+    os.replace(temporary, path)
+
+
+class BidTable:
+    """A memory-mapped bid table file, giving expected points per bid with one read."""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.hands, self.samples = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} CounterPoint bid table.")
+
+    def expected_points(self, hand, trump_card):
+        """Return {bid: expected points won} for the bids a 12-card hand can make."""
+        hand = hand if isinstance(hand, int) else mask_of(hand)
+        values = self.row(shape_of(hand, trump_card))
+        return {10 * i: value / 10 for i, value in enumerate(values) if value != MISSING}
+
+    def row(self, row):
+        """Return the raw values of one row (see the layout notes above)."""
+        return ROW.unpack_from(self._map, HEADER.size + ROW.size * row)
+
+    def advise(self, hand, trump_card):
+        """Return the bid whose expected points come closest to it, or None for an unbuilt shape."""
+        expected = self.expected_points(hand, trump_card)
+        return min(expected, key=lambda bid: abs(bid - expected[bid]), default=None)
+
+    def close(self):
+        self._map.close()
+
+
+_open_tables = {}
+
+
+def open_bid_table(path):
+    """Return a shared BidTable for a path, mapping the file on first use in this process."""
+    if path not in _open_tables:
+        _open_tables[path] = BidTable(path)
+    return _open_tables[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect CounterPoint bid tables.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="simulate every hand shape on every core")
+    build_parser.add_argument("--hands", type=int, default=8, help="hands dealt per shape")
+    build_parser.add_argument("--samples", type=int, default=32, help="simulated rounds per hand")
+    build_parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.add_argument("--output", default="bids.cpbt", help="file to write")
+    info_parser = commands.add_parser("info", help="describe a bid table file")
+    info_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.output, args.hands, args.samples, workers=args.workers, seed=args.seed)
+    else:
+        table = BidTable(args.path)
+        built = sum(any(value != MISSING for value in table.row(row)) for row in range(SHAPES))
+        print(f"{args.path}: {built:,} hand shapes, {table.hands} hands of {table.samples} rounds each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from engine import (CARD_POINTS, CARD_RANK_INDEX, CARD_SUIT, NUM_DISCARDS, TRICK, cards_in,
+                    trick_winner)
+
+
+class RandomBot:
+    """Plays uniformly random legal actions."""
+    def act(self, state, rng):
+        if state.phase == TRICK:
+            return rng.choice(state.legal_actions())
+        return tuple(rng.sample(cards_in(state.hands[state.current_player]), NUM_DISCARDS))
+
+
+class GreedyBot:
+    """Discards its weakest cards, then wins tricks as cheaply as it can."""
+    def act(self, state, rng):
+        if state.phase == TRICK:
+            return self.choose_play(state)
+        hand = cards_in(state.hands[state.current_player])
+        hand.sort(key=lambda c: (c == state.trump_card or CARD_SUIT[c] == state.trump_suit,
+                                 CARD_RANK_INDEX[c], CARD_POINTS[c]))
+        return tuple(hand[:NUM_DISCARDS])
+
+    def choose_play(self, state):
+        legal = state.legal_actions()
+        trick = state.current_trick
+        if not trick:
+            return max(legal, key=lambda c: (CARD_RANK_INDEX[c], -CARD_POINTS[c]))
+        winning = [c for c in legal if trick_winner(trick + [c], state.trump_suit) == len(trick)]
+        if winning:
+            return min(winning, key=lambda c: (CARD_SUIT[c] == state.trump_suit, CARD_RANK_INDEX[c]))
+        return min(legal, key=lambda c: (CARD_POINTS[c], CARD_RANK_INDEX[c]))
+
+
+def _pimc_bot():
+    from pimc import PIMCBot  # pimc builds on GreedyBot, so import it on demand
+    return PIMCBot(samples=10, time_budget=0.25)
+
+
+def _ismcts_bot():
+    from ismcts import ISMCTSBot  # ismcts pulls in numpy through bidding
+    return ISMCTSBot(time_budget=0.1)
+
+
+BOTS = {
+    "random": RandomBot,
+    "greedy": GreedyBot,
+    "pimc": _pimc_bot,
+    "ismcts": _ismcts_bot,
+}
+
+
+def make_bot(name):
+    """Create a bot from its registered name."""
+    try:
+        return BOTS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown bot '{name}'. Choose from: {', '.join(sorted(BOTS))}") from None
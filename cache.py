@@ -0,0 +1,113 @@
+import os
+import pickle
+from collections import OrderedDict
+
+from engine import DECK_SIZE
+
+MAGIC = "counterpoint-hand-cache"
+VERSION = 1
+ENTRY_OVERHEAD = 160  # Rough bytes of the dict slot, key and tuple of an entry, beyond its pickled value
+_MISSING = object()
+
+
+def hand_key(hand, trump_card, seat=0):
+    """Return the cache key of a hand bitboard under a revealed trump card.
+
+    seat counts the seats from the one to lead to the hand's (0 when the
+    hand leads). The trump card fixes the trump suit and, for 12-card
+    hands, the one card no seat can hold, so it is kept whole. Suits are
+    not relabeled either: each bids a different value, so a hand with two
+    suits swapped bids, and often discards, differently.
+    """
+    trump = DECK_SIZE if trump_card is None else trump_card
+    return (hand << 6 | trump) << 2 | seat
+
+
+class HandCache:
+    """Bounded LRU cache of hand evaluations, optionally kept on disk between runs.
+
+    max_bytes caps the approximate memory of the entries (each value's
+    pickled size plus ENTRY_OVERHEAD), evicting the least recently used
+    first. With a path, saved entries are loaded on creation and save()
+    writes the cache back.
+    """
+    def __init__(self, max_bytes=64 << 20, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the value cached under key, counting a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value):
+        """Cache value under key, evicting old entries to stay within max_bytes."""
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) + ENTRY_OVERHEAD
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Return the counters and size of the cache."""
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def save(self, path=None):
+        """Write every entry to path (default: the cache's own path), least recently used first."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("HandCache.save needs a path.")
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump((MAGIC, VERSION, [(key, value) for key, (value, _) in self._entries.items()]), f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def load(self, path):
+        """Add the entries saved in a file, keeping their recency order."""
+        with open(path, "rb") as f:
+            magic, version, entries = pickle.load(f)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} CounterPoint hand cache.")
+        for key, value in entries:
+            self.put(key, value)
@@ -0,0 +1,103 @@
+import random
+
+from engine import (CARD_POINTS, CARD_RANK, CARD_RANK_INDEX, CARD_SUIT, DECK_SIZE, JOKER, POINT_VALUES, RANK_ORDER,
+                    RANKS, SUITS)
+
+
+class Card:
+    """Represents a single card in the deck.
+
+    Cards are interned: Card(suit, rank) always returns the one shared,
+    immutable instance, so cards compare by identity and hash by their
+    small integer id (the engine's card id).
+    """
+    __slots__ = ("suit", "rank", "point_value", "id", "rank_strength")
+    _interned = {}
+
+    def __new__(cls, suit: str, rank: str, point_value: int = None):
+        try:
+            card = cls._interned[(suit, rank)]
+        except KeyError:
+            raise ValueError(f"There is no {rank} of {suit} in a CounterPoint deck.") from None
+        if point_value is not None and point_value != card.point_value:
+            raise ValueError(f"The {card} is worth {card.point_value} points, not {point_value}.")
+        return card
+
+    @classmethod
+    def _create(cls, card_id):
+        card = object.__new__(cls)
+        suit = "Joker" if card_id == JOKER else SUITS[CARD_SUIT[card_id]]
+        for name, value in (("suit", suit), ("rank", CARD_RANK[card_id]), ("point_value", CARD_POINTS[card_id]),
+                            ("id", card_id), ("rank_strength", CARD_RANK_INDEX[card_id])):
+            object.__setattr__(card, name, value)
+        cls._interned[(suit, card.rank)] = card
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
+
+    def __hash__(self):
+        return self.id
+
+    def __reduce__(self):
+        return card_from_id, (self.id,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"Card({self.suit!r}, {self.rank!r})"
+
+    def __str__(self):
+        return f"{self.rank} of {self.suit}"
+
+
+CARDS = tuple(Card._create(card_id) for card_id in range(DECK_SIZE))  # Indexed by card id
+
+
+def card_from_id(card_id):
+    """Return the interned Card for an engine card id."""
+    return CARDS[card_id]
+
+
+class Deck:
+    """Represents a deck of cards, handles shuffling and dealing."""
+    SUITS = SUITS
+    RANKS = RANKS
+    POINT_VALUES = POINT_VALUES
+    RANK_ORDER = RANK_ORDER
+
+    CARD_TABLE = CARDS
+
+    def __init__(self):
+        self.order = list(range(len(self.CARD_TABLE)))  # Permutation of CARD_TABLE indices (card ids)
+        self.position = 0  # Index in order of the next card to deal
+
+    @property
+    def cards(self):
+        """Cards not yet dealt, in dealing order."""
+        return [self.CARD_TABLE[i] for i in self.order[self.position:]]
+
+    def shuffle(self):
+        """Gather all cards and shuffle the deck in place."""
+        self.order.sort()
+        self.position = 0
+        random.shuffle(self.order)
+
+    def deal(self, num_players=3, cards_per_player=12):
+        """Deal cards to players."""
+        end = min(self.position + num_players * cards_per_player, len(self.order))
+        hands = {player: [self.CARD_TABLE[i] for i in self.order[self.position + player:end:num_players]]
+                 for player in range(num_players)}
+        self.position = end
+        return hands
+
+    def reveal_trump(self):
+        """Reveal the last card as the trump suit."""
+        if self.position < len(self.order):
+            self.position += 1
+            return self.CARD_TABLE[self.order[self.position - 1]]
+        return None
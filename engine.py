@@ -0,0 +1,381 @@
+import random
+from itertools import combinations
+
+from scoring import score_round
+
+# Card ids follow the order Deck builds its cards in: suit-major over SUITS,
+# RANKS within each suit, and the Joker last (id 36).
+SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
+RANKS = ["Ace", "Ten", "King", "Queen", "Jack", "Nine", "Eight", "Seven", "Six"]
+POINT_VALUES = {"Ace": 11, "Ten": 10, "King": 4, "Queen": 3, "Jack": 2,
+                "Nine": 0, "Eight": 0, "Seven": 0, "Six": 0}
+RANK_ORDER = ["Six", "Seven", "Eight", "Nine", "Jack", "Queen", "King", "Ten", "Ace"]
+BID_VALUES = {"Spades": 10, "Hearts": 20, "Clubs": 30}  # Diamonds and Joker bid 0
+
+NUM_PLAYERS = 3
+CARDS_PER_PLAYER = 12
+NUM_DISCARDS = 3
+NUM_TRICKS = CARDS_PER_PLAYER - NUM_DISCARDS
+JOKER = len(SUITS) * len(RANKS)
+DECK_SIZE = JOKER + 1
+NO_SUIT = len(SUITS)  # Suit index of the Joker, and "no trump" / "no lead suit"
+
+BIDDING = "bidding"
+TRICK = "trick"
+SCORED = "scoring"
+
+CARD_SUIT = [s for s in range(len(SUITS)) for _ in RANKS] + [NO_SUIT]
+CARD_RANK = [rank for _ in SUITS for rank in RANKS] + ["Joker"]
+CARD_POINTS = [POINT_VALUES[rank] for rank in CARD_RANK[:JOKER]] + [0]
+CARD_BID = [BID_VALUES.get(SUITS[s], 0) for s in CARD_SUIT[:JOKER]] + [0]
+CARD_RANK_INDEX = [RANK_ORDER.index(rank) for rank in CARD_RANK[:JOKER]] + [-1]  # Joker is lowest
+
+# Bitboards: a set of cards is an int with bit `card id` set for each member.
+ALL_CARDS = (1 << DECK_SIZE) - 1
+SUIT_MASKS = [sum(1 << c for c in range(DECK_SIZE) if CARD_SUIT[c] == s) for s in range(NO_SUIT + 1)]
+POINT_MASKS = [(value, sum(1 << c for c in range(DECK_SIZE) if CARD_POINTS[c] == value))
+               for value in sorted(set(POINT_VALUES.values()), reverse=True) if value]
+BID_MASKS = [(value, sum(1 << c for c in range(DECK_SIZE) if CARD_BID[c] == value))
+             for value in sorted(set(BID_VALUES.values()), reverse=True)]
+
+
+
+def _card_strength(card, lead_suit, trump_suit):
+    suit = CARD_SUIT[card]
+    if suit == trump_suit and suit != NO_SUIT:
+        priority = 2  # Trump cards have highest priority
+    elif suit == lead_suit and suit != NO_SUIT:
+        priority = 1  # Lead suit cards have next priority
+    else:
+        priority = 0
+    return priority * len(RANK_ORDER) + CARD_RANK_INDEX[card] + 1
+
+
+# TRICK_STRENGTH[lead_suit][trump_suit][card] ranks a card within a trick; the
+# highest value wins and ties go to the earlier card. NO_SUIT indexes "Joker
+# led" and "no trump" respectively.
+TRICK_STRENGTH = [[[_card_strength(card, lead, trump) for card in range(DECK_SIZE)]
+                   for trump in range(NO_SUIT + 1)]
+                  for lead in range(NO_SUIT + 1)]
+
+_CARD_IDS = {(SUITS[CARD_SUIT[c]] if c != JOKER else "Joker", CARD_RANK[c]): c for c in range(DECK_SIZE)}
+
+
+def card_id(suit, rank):
+    """Return the id of the card with the given suit and rank names."""
+    return _CARD_IDS[(suit, rank)]
+
+
+def card_name(card):
+    """Return the same text as str() of the matching Card object."""
+    if card == JOKER:
+        return "Joker of Joker"
+    return f"{CARD_RANK[card]} of {SUITS[CARD_SUIT[card]]}"
+
+
+def trump_suit_of(trump_card):
+    """Return the trump suit index for a revealed card (NO_SUIT for a Nine or the Joker)."""
+    if trump_card is None or trump_card == JOKER or CARD_RANK[trump_card] == "Nine":
+        return NO_SUIT
+    return CARD_SUIT[trump_card]
+
+
+def mask_of(cards):
+    """Return the bitboard holding the given card ids."""
+    mask = 0
+    for c in cards:
+        mask |= 1 << c
+    return mask
+
+
+def cards_in(mask):
+    """Return the card ids held in a bitboard, lowest id first."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def suit_counts(mask):
+    """Return the number of cards held in each suit (the Joker counts as suit NO_SUIT)."""
+    return [(mask & SUIT_MASKS[s]).bit_count() for s in range(NO_SUIT + 1)]
+
+
+def points_in(mask):
+    """Return the card points held in a bitboard."""
+    return sum(value * (mask & cards).bit_count() for value, cards in POINT_MASKS)
+
+
+def bid_value(cards):
+    """Return the bid set by discarding the given cards."""
+    return sum(CARD_BID[c] for c in cards)
+
+
+def bid_value_of_mask(mask):
+    """Return the bid set by discarding the cards of a bitboard."""
+    return sum(value * (mask & cards).bit_count() for value, cards in BID_MASKS)
+
+
+def legal_mask(hand, lead_suit):
+    """Return the bitboard of cards in hand that may follow lead_suit."""
+    following = hand & SUIT_MASKS[lead_suit]
+    return following if following and lead_suit != NO_SUIT else hand
+
+
+def legal_plays(hand, lead_suit):
+    """Return the card ids of a hand bitboard that may be played to a trick led in lead_suit."""
+    return cards_in(legal_mask(hand, lead_suit))
+
+
+class CardSet(int):
+    """A bitboard of cards (bit n = card id n) that also reads as a set of card ids.
+
+    It is an int, so bitboard code uses it directly and its operators give
+    plain bitboards; the methods below return CardSets.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, cards):
+        """Build a set from card ids."""
+        return cls(mask_of(cards))
+
+    @classmethod
+    def from_cards(cls, cards):
+        """Build a set from objects with suit and rank names, such as Card."""
+        return cls(mask_of(card_id(card.suit, card.rank) for card in cards))
+
+    def __contains__(self, card):
+        return bool(self >> card & 1)
+
+    def __iter__(self):
+        return iter(cards_in(self))
+
+    def __len__(self):
+        return self.bit_count()
+
+    def __repr__(self):
+        return f"CardSet([{', '.join(card_name(c) for c in self)}])"
+
+    def add(self, card):
+        """Return a new set that also holds card."""
+        return CardSet(int(self) | 1 << card)
+
+    def remove(self, card):
+        """Return a new set without card."""
+        return CardSet(int(self) & ~(1 << card))
+
+    def suit(self, suit):
+        """Return the cards of one suit index (NO_SUIT selects the Joker)."""
+        return CardSet(int(self) & SUIT_MASKS[suit])
+
+    def suit_count(self, suit):
+        return (int(self) & SUIT_MASKS[suit]).bit_count()
+
+    def suit_counts(self):
+        return suit_counts(self)
+
+    def points(self):
+        """Total card points held."""
+        return points_in(self)
+
+    def legal_plays(self, lead_suit=NO_SUIT):
+        """Return the cards that may be played to a trick led in lead_suit."""
+        return CardSet(legal_mask(int(self), lead_suit))
+
+
+def trick_winner(cards, trump_suit):
+    """Return the position within cards (in play order) of the card that wins the trick."""
+    row = TRICK_STRENGTH[CARD_SUIT[cards[0]]][trump_suit]
+    if len(cards) == 3:
+        s0, s1, s2 = row[cards[0]], row[cards[1]], row[cards[2]]
+        if s1 > s0:
+            return 2 if s2 > s1 else 1
+        return 2 if s2 > s0 else 0
+    best = 0
+    for i in range(1, len(cards)):
+        if row[cards[i]] > row[cards[best]]:  # Ties keep the earlier card, like max()
+            best = i
+    return best
+
+
+class RoundState:
+    """State of one CounterPoint round, from the deal through scoring.
+
+    Seat 0 bids first and leads the first trick, matching players[0] in the
+    front-ends. Actions are a tuple of 3 card ids while bidding and a single
+    card id during the trick phase. Hands, discards and won piles are CardSets.
+    """
+    def __init__(self, deal=None, rng=None):
+        if deal is None:
+            deal = list(range(DECK_SIZE))
+            (rng or random).shuffle(deal)
+        self.deal = deal
+        dealt = NUM_PLAYERS * CARDS_PER_PLAYER
+        self.hands = [CardSet.of(deal[seat:dealt:NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+        self.trump_card = deal[dealt]
+        self.trump_suit = trump_suit_of(self.trump_card)
+        self.phase = BIDDING
+        self.current_player = 0
+        self.bids = [None] * NUM_PLAYERS
+        self.discards = [CardSet()] * NUM_PLAYERS
+        self.leader = 0
+        self.current_trick = []
+        self.trick_number = 1
+        self.tricks_won = [0] * NUM_PLAYERS
+        self.points_won = [0] * NUM_PLAYERS
+        self.cards_won = [CardSet()] * NUM_PLAYERS
+        self.plays = []
+        self.results = None
+
+    def copy(self):
+        """Return an independent copy of this state."""
+        other = RoundState.__new__(RoundState)
+        other.__dict__.update(self.__dict__)
+        other.hands = list(self.hands)
+        other.bids = list(self.bids)
+        other.discards = list(self.discards)
+        other.current_trick = list(self.current_trick)
+        other.tricks_won = list(self.tricks_won)
+        other.points_won = list(self.points_won)
+        other.cards_won = list(self.cards_won)
+        other.plays = list(self.plays)
+        return other
+
+    @property
+    def lead_suit(self):
+        """Suit index that must be followed, or NO_SUIT (no card led yet, or the Joker led)."""
+        if not self.current_trick:
+            return NO_SUIT
+        return CARD_SUIT[self.current_trick[0]]
+
+    def is_over(self):
+        return self.phase == SCORED
+
+    def legal_mask(self):
+        """Return the CardSet of cards the current player may play."""
+        return CardSet(legal_mask(self.hands[self.current_player], self.lead_suit))
+
+    def legal_actions(self):
+        """Return every action the current player may take."""
+        hand = self.hands[self.current_player]
+        if self.phase == BIDDING:
+            return list(combinations(cards_in(hand), NUM_DISCARDS))
+        if self.phase == TRICK:
+            return cards_in(legal_mask(hand, self.lead_suit))
+        return []
+
+    def apply(self, action):
+        """Apply an action for the current player and advance the round."""
+        if self.phase == BIDDING:
+            self._apply_bid(action)
+        elif self.phase == TRICK:
+            self._apply_play(action)
+        else:
+            raise ValueError("The round is already scored.")
+
+    def _apply_bid(self, discards):
+        seat = self.current_player
+        hand = self.hands[seat]
+        discarded = CardSet.of(discards)
+        if len(discarded) != NUM_DISCARDS or discarded & ~hand:
+            raise ValueError(f"Seat {seat} cannot discard {discards}.")
+        self.hands[seat] = CardSet(hand & ~discarded)
+        self.discards[seat] = discarded
+        self.bids[seat] = bid_value_of_mask(discarded)
+        self.current_player += 1
+        if self.current_player == NUM_PLAYERS:
+            self.phase = TRICK
+            self.current_player = self.leader
+
+    def _apply_play(self, card):
+        seat = self.current_player
+        bit = 1 << card
+        if not bit & legal_mask(self.hands[seat], self.lead_suit):
+            raise ValueError(f"Seat {seat} cannot play {card_name(card)}.")
+        self.hands[seat] = CardSet(self.hands[seat] ^ bit)
+        trick = self.current_trick
+        trick.append(card)
+        self.plays.append(card)
+        if len(trick) < NUM_PLAYERS:
+            self.current_player = (seat + 1) % NUM_PLAYERS
+            return
+        winner = (self.leader + trick_winner(trick, self.trump_suit)) % NUM_PLAYERS
+        self.tricks_won[winner] += 1
+        self.points_won[winner] += CARD_POINTS[trick[0]] + CARD_POINTS[trick[1]] + CARD_POINTS[trick[2]]
+        self.cards_won[winner] = CardSet(self.cards_won[winner] | mask_of(trick))
+        self.current_trick = []
+        self.leader = self.current_player = winner
+        self.trick_number += 1
+        if self.trick_number > NUM_TRICKS:
+            self.results = score_round(self.bids, self.points_won)
+            self.phase = SCORED
+
+    def round_scores(self):
+        """Return each seat's round score (base + bonus) once the round is scored."""
+        return [base + bonus for base, bonus, _ in self.results]
+
+
+def play_random_round(rng=random):
+    """Play one round with uniformly random legal actions and return the final state."""
+    state = RoundState(rng=rng)
+    choice = rng.choice
+    while state.phase == BIDDING:
+        state.apply(tuple(rng.sample(cards_in(state.hands[state.current_player]), NUM_DISCARDS)))
+    while state.phase == TRICK:
+        state.apply(choice(state.legal_actions()))
+    return state
+
+
+TARGET_SCORE = 1  # win_condition values used by both front-ends
+SET_ROUNDS = 2
+
+
+def is_game_over(scores, rounds_played, win_condition, target_score=None, max_rounds=None):
+    """Apply CounterPointGame.check_game_over's end-of-game test."""
+    if win_condition == TARGET_SCORE:
+        return max(scores) >= target_score
+    return rounds_played >= max_rounds
+
+
+def game_winners(scores):
+    """Return the indices of every player on the top score (more than one is a draw)."""
+    top = max(scores)
+    return [i for i, score in enumerate(scores) if score == top]
+
+
+class GameResult:
+    """Final scores of one game, indexed like the players passed to play_game."""
+    def __init__(self, scores, rounds):
+        self.scores = scores
+        self.rounds = rounds
+        self.winners = game_winners(scores)
+
+    @property
+    def is_draw(self):
+        return len(self.winners) > 1
+
+
+def play_game(bots, win_condition=TARGET_SCORE, target_score=500, max_rounds=None, rng=random):
+    """Play a full game between three bots, rotating the dealer after every round.
+
+    Each bot is asked for actions through bot.act(state, rng) while it holds
+    the current seat of a RoundState.
+    """
+    if win_condition == SET_ROUNDS and not (max_rounds == 1 or (max_rounds and max_rounds % NUM_PLAYERS == 0)):
+        raise ValueError("Number of rounds must be 1 or a positive number divisible by 3.")
+    order = list(range(NUM_PLAYERS))  # order[seat] is the player sitting in that seat
+    scores = [0] * NUM_PLAYERS
+    rounds = 0
+    while True:
+        state = RoundState(rng=rng)
+        while state.phase != SCORED:
+            state.apply(bots[order[state.current_player]].act(state, rng))
+        for seat, round_score in enumerate(state.round_scores()):
+            scores[order[seat]] += round_score
+        rounds += 1
+        if is_game_over(scores, rounds, win_condition, target_score, max_rounds):
+            return GameResult(scores, rounds)
+        order.append(order.pop(0))
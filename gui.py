@@ -1,53 +1,32 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from PIL import Image, ImageTk
 import os
+import queue
 import random
+import struct
+import sys
+import threading
 
-class Card:
-    """Represents a single card in the deck."""
-    def __init__(self, suit: str, rank: str, point_value: int):
-        self.suit = suit
-        self.rank = rank
-        self.point_value = point_value
-
-    def __str__(self):
-        return f"{self.rank} of {self.suit}"
-
-
-class Deck:
-    """Represents a deck of cards, handles shuffling and dealing."""
-    SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
-    RANKS = ["Ace", "Ten", "King", "Queen", "Jack", "Nine", "Eight", "Seven", "Six"]
-    POINT_VALUES = {"Ace": 11, "Ten": 10, "King": 4, "Queen": 3, "Jack": 2,
-                    "Nine": 0, "Eight": 0, "Seven": 0, "Six": 0}
-    RANK_ORDER = ["Six", "Seven", "Eight", "Nine", "Jack", "Queen", "King", "Ten", "Ace"]
-    
-    def __init__(self):
-        self.cards = [Card(suit, rank, self.POINT_VALUES[rank]) for suit in self.SUITS for rank in self.RANKS]
-        self.cards.append(Card("Joker", "Joker", 0))
-
-    def shuffle(self):
-        """Shuffle the deck."""
-        random.shuffle(self.cards)
-
-    def deal(self, num_players=3, cards_per_player=12):
-        """Deal cards to players."""
-        hands = {i: [] for i in range(num_players)}
-        for i in range(cards_per_player):
-            for player in range(num_players):
-                if self.cards:
-                    hands[player].append(self.cards.pop(0))
-        return hands
-
-    def reveal_trump(self):
-        """Reveal the last card as the trump suit."""
-        if self.cards:
-            trump_card = self.cards.pop(0)
-            return trump_card
-        return None
+from bots import GreedyBot
+from cards import CARDS
+from engine import CARDS_PER_PLAYER, NUM_PLAYERS, SCORED, TRICK, RoundState, cards_in, trick_winner
+from instrumentation import enable_from_environment, instruments
+from playerstats import PlayerStats
+from netclient import OnlineTable
+from records import RecordWriter, RoundRecord
+from scoring import BONUS_TIERS
+from protocol import PORT
+from snapshot import MAX_LIMIT, PHASES, RESUME_PATH, GameSnapshot, read_snapshot, remove_snapshot, write_snapshot
+
+BOT_POLL_MS = 50  # How often the Tk loop checks whether a computer player has chosen its move
 
 
+def computer_bot():
+    """Create the search bot that plays a computer seat."""
+    from ismcts import ISMCTSBot  # ismcts pulls in numpy through bidding, so only games with computers load it
+    return ISMCTSBot(time_budget=1.0)
+
 class Player:
     """Represents a player in the game."""
     def __init__(self, name: str):
@@ -57,16 +36,8 @@ class Player:
         self.score = 0
         self.round_score = 0
         self.scoring_details = {}
-        self.cumulative_stats = {
-            'total_tricks_won': 0,
-            'total_points_won': 0,
-            'total_cards_won': 0,
-            'total_bonus': 0,
-            'bids': [],  # List of (bid, points_won) tuples per round
-            'round_scores': [],  # List of round scores
-            'differences': [],  # List of differences per round
-            'bonuses': []  # List of bonuses per round
-        }
+        self.bot = None  # Computer players choose their own bids and cards
+        self.stats = PlayerStats()  # Session totals and aggregates, plus the last few rounds in detail
 
     def receive_cards(self, cards):
         """Assign dealt cards to the player."""
@@ -82,24 +53,24 @@ class CounterPointGame:
         self.root.configure(bg="#194c22")  # Set main background color
         self.card_images = []
         self.player_names = ["Player 1", "Player 2", "Player 3"]
+        self.computer_players = [False, False, False]
+        self.rng = random.Random()
         self.players = []
         self.trump_card = None
-        self.deck = None
+        self.state = None  # engine.RoundState of the round in play; bids, tricks and scores are applied to it
         self.current_round = 1
         self.game_over = False
         self.current_player_index = 0
-        self.tricks_won = {}
-        self.bids = {}
-        self.bid_cards = {}  # Store bid cards for each player
-        self.current_trick = []
         self.current_phase = "welcome"
         self.target_score = None
         self.max_rounds = None
         self.win_condition = None
         self.discarded_cards = []
         self.discard_count = 0
-        self.current_trick_number = 1
-        self.cards_won = {}  # Initialize here to ensure it's available
+        self.recorder = None  # records.RecordWriter that every finished round is appended to
+        self.record_game = None  # Game number of this game in the record file
+        self.snapshot_path = RESUME_PATH  # The game in progress is saved here after every turn
+        self.computer_move = None  # (player, phase, answer queue) while a computer player is thinking
         self.show_welcome_screen()
 
     def show_welcome_screen(self):
@@ -140,6 +111,8 @@ class CounterPointGame:
         # Configure buttons with custom color
         button_style = {"font": ("Arial", 14), "bg": "#f5e1bf", "width": 15, "height": 2}
 
+        if os.path.exists(self.snapshot_path):
+            tk.Button(main_frame, text="Resume Game", command=self.resume_game, **button_style).place(relx=0.5, rely=0.3, anchor="center")
         tk.Button(main_frame, text="Start Game", command=self.get_game_settings, **button_style).place(relx=0.5, rely=0.4, anchor="center")
         tk.Button(main_frame, text="Game Rules", command=self.show_help, **button_style).place(relx=0.5, rely=0.5, anchor="center")
         tk.Button(main_frame, text="Exit", command=self.root.destroy, **button_style).place(relx=0.5, rely=0.6, anchor="center")
@@ -162,22 +135,32 @@ class CounterPointGame:
         player1_entry = tk.Entry(names_frame, font=("Arial", 14), width=20)
         player1_entry.pack(pady=5)
         player1_entry.focus_set()
+        player1_computer = tk.BooleanVar(value=self.computer_players[0])
+        tk.Checkbutton(names_frame, text="Computer player", variable=player1_computer, font=("Arial", 12),
+                       bg="#194c22", fg="white", selectcolor="#194c22").pack()
         
         # Player 2
         tk.Label(names_frame, text="Choose a name for Player 2:", font=("Arial", 14), bg="#194c22", fg="white").pack(pady=5)
         player2_entry = tk.Entry(names_frame, font=("Arial", 14), width=20)
         player2_entry.pack(pady=5)
+        player2_computer = tk.BooleanVar(value=self.computer_players[1])
+        tk.Checkbutton(names_frame, text="Computer player", variable=player2_computer, font=("Arial", 12),
+                       bg="#194c22", fg="white", selectcolor="#194c22").pack()
         
         # Player 3
         tk.Label(names_frame, text="Choose a name for Player 3:", font=("Arial", 14), bg="#194c22", fg="white").pack(pady=5)
         player3_entry = tk.Entry(names_frame, font=("Arial", 14), width=20)
         player3_entry.pack(pady=5)
+        player3_computer = tk.BooleanVar(value=self.computer_players[2])
+        tk.Checkbutton(names_frame, text="Computer player", variable=player3_computer, font=("Arial", 12),
+                       bg="#194c22", fg="white", selectcolor="#194c22").pack()
         
         def submit_names():
             # Get names from entries, default to "Player X" if empty
             self.player_names[0] = player1_entry.get().strip() or "Player 1"
             self.player_names[1] = player2_entry.get().strip() or "Player 2"
             self.player_names[2] = player3_entry.get().strip() or "Player 3"
+            self.computer_players = [player1_computer.get(), player2_computer.get(), player3_computer.get()]
             self.show_win_condition_screen()
         
         tk.Button(names_frame, text="Continue", font=("Arial", 14),
@@ -219,11 +202,11 @@ class CounterPointGame:
             def submit_score():
                 try:
                     score = int(score_entry.get())
-                    if score > 0:
+                    if 0 < score <= MAX_LIMIT:
                         self.target_score = score
                         self.initialize_game()
                     else:
-                        messagebox.showerror("Error", "Target score must be a positive number.")
+                        messagebox.showerror("Error", f"Target score must be a positive number up to {MAX_LIMIT}.")
                 except ValueError:
                     messagebox.showerror("Error", "Please enter a valid number.")
             
@@ -244,11 +227,12 @@ class CounterPointGame:
             def submit_rounds():
                 try:
                     rounds = int(rounds_entry.get())
-                    if rounds == 1 or (rounds > 0 and rounds % 3 == 0):
+                    if rounds == 1 or (0 < rounds <= MAX_LIMIT and rounds % 3 == 0):
                         self.max_rounds = rounds
                         self.initialize_game()
                     else:
-                        messagebox.showerror("Error", "Number of deals must be 1 or a positive number divisible by 3.")
+                        messagebox.showerror("Error", f"Number of deals must be 1 or a positive number divisible by 3, "
+                                                      f"up to {MAX_LIMIT}.")
                 except ValueError:
                     messagebox.showerror("Error", "Please enter a valid number.")
             
@@ -260,31 +244,34 @@ class CounterPointGame:
 
     def initialize_game(self):
         self.players = [Player(name) for name in self.player_names]
+        for player, is_computer in zip(self.players, self.computer_players):
+            if is_computer:
+                player.bot = computer_bot()
         self.current_round = 1  # Reset round count
+        self.record_game = None
         self.start_round()
 
     def start_round(self):
         self.current_phase = "setup"
         for player in self.players:
             player.round_score = 0
-            player.hand = []
             player.bid = None
-        self.deck = Deck()
-        self.deck.shuffle()
-        hands = self.deck.deal(num_players=3, cards_per_player=12)
-        for i, player in enumerate(self.players):
-            player.receive_cards(hands[i])
-        self.trump_card = self.deck.reveal_trump()
-        self.tricks_won = {player.name: 0 for player in self.players}
-        self.cards_won = {player.name: [] for player in self.players}  # Reset cards won per round
-        self.bids = {}
-        self.current_trick = []
-        self.current_trick_number = 1
+        self.state = RoundState()
+        self.deal_hands()
         self.current_player_index = 0
         self.select_trump_card()
 
+    def deal_hands(self):
+        """Give each player the cards their seat still holds in the round, in dealing order."""
+        dealt = self.state.deal[:NUM_PLAYERS * CARDS_PER_PLAYER]
+        for seat, player in enumerate(self.players):
+            player.receive_cards([CARDS[card_id] for card_id in dealt[seat::NUM_PLAYERS]
+                                  if card_id in self.state.hands[seat]])
+        self.trump_card = CARDS[self.state.trump_card]
+
     def select_trump_card(self):
         self.current_phase = "trump"
+        self.save_snapshot()
         for widget in self.root.winfo_children():
             widget.destroy()
             
@@ -320,6 +307,7 @@ class CounterPointGame:
         self.setup_game_ui()
 
     def setup_game_ui(self):
+        self.save_snapshot()
         for widget in self.root.winfo_children():
             widget.destroy()
 
@@ -331,11 +319,14 @@ class CounterPointGame:
         menu_bar = tk.Menu(self.root)
         game_menu = tk.Menu(menu_bar, tearoff=0)
         game_menu.add_command(label="New Game", command=self.get_game_settings)
+        game_menu.add_command(label="Record Games...", command=self.choose_record_file)
+        game_menu.add_command(label="Join Online Table...", command=self.join_online_table)
         game_menu.add_separator()
         game_menu.add_command(label="Exit", command=self.root.destroy)
         menu_bar.add_cascade(label="Game", menu=game_menu)
         help_menu = tk.Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="Rules", command=self.show_help)
+        help_menu.add_command(label="Performance Stats", command=self.show_performance_stats)
         menu_bar.add_cascade(label="Help", menu=help_menu)
         self.root.config(menu=menu_bar)
 
@@ -402,7 +393,7 @@ class CounterPointGame:
             self.played_cards_frame.configure(bg="#194c22")
 
         # Place the trick label directly on the wood texture
-        trick_label_text = "Selected Cards" if self.current_phase == "bidding" else f"Trick {self.current_trick_number}"
+        trick_label_text = "Selected Cards" if self.current_phase == "bidding" else f"Trick {self.state.trick_number}"
         self.trick_label = tk.Label(self.played_cards_frame, text=trick_label_text, font=("Arial", 12), bg="#57311a", fg="white")
         self.trick_label.place(relx=0.5, rely=0, anchor="n", y=5)
 
@@ -441,25 +432,25 @@ class CounterPointGame:
 
         if self.current_phase == "bidding":
             for i in range(self.current_player_index):
-                player_name = self.player_names[i]
-                if player_name in self.bid_cards:
-                    target_frame = self.left_frame if i == 0 else self.right_frame
-                    frame = tk.Frame(target_frame, bg="#57311a")
-                    frame.pack(pady=5)
-                    tk.Label(frame, text=f"{player_name}'s Bid", font=("Arial", 10), bg="#57311a", fg="white").pack()
-                    cards_frame = tk.Frame(frame, bg="#57311a")
-                    cards_frame.pack()
-                    for card in self.bid_cards[player_name]:
-                        rank = card.rank
-                        suit = card.suit if card.suit != "Joker" else None
-                        img = self.load_card_image(rank, suit, size=(60, 90))
-                        if img:
-                            self.card_images.append(img)
-                            tk.Label(cards_frame, image=img, bg="#57311a").pack(side=tk.LEFT, padx=2)
-                        else:
-                            tk.Label(cards_frame, text=str(card), bg="#57311a", fg="white").pack(side=tk.LEFT, padx=2)
+                player_name = self.players[i].name
+                target_frame = self.left_frame if i == 0 else self.right_frame
+                frame = tk.Frame(target_frame, bg="#57311a")
+                frame.pack(pady=5)
+                tk.Label(frame, text=f"{player_name}'s Bid", font=("Arial", 10), bg="#57311a", fg="white").pack()
+                cards_frame = tk.Frame(frame, bg="#57311a")
+                cards_frame.pack()
+                for card_id in self.state.discards[i]:
+                    card = CARDS[card_id]
+                    rank = card.rank
+                    suit = card.suit if card.suit != "Joker" else None
+                    img = self.load_card_image(rank, suit, size=(60, 90))
+                    if img:
+                        self.card_images.append(img)
+                        tk.Label(cards_frame, image=img, bg="#57311a").pack(side=tk.LEFT, padx=2)
+                    else:
+                        tk.Label(cards_frame, text=str(card), bg="#57311a", fg="white").pack(side=tk.LEFT, padx=2)
         elif self.current_phase == "trick":
-            for i, (player, card) in enumerate(self.current_trick):
+            for i, (player, card) in enumerate(self.trick_on_table()):
                 player_name = player.name
                 target_frame = self.left_frame if i == 0 else self.right_frame
                 frame = tk.Frame(target_frame, bg="#57311a")
@@ -479,6 +470,74 @@ class CounterPointGame:
             self.handle_bidding()
         elif self.current_phase == "trick":
             self.handle_trick()
+        if self.players[self.current_player_index].bot:
+            self.root.after(300, self.play_computer_turn)
+
+    def engine_state(self):
+        """Return a copy of the round so far, for computer players to search."""
+        return self.state.copy()
+
+    def trick_on_table(self):
+        """Return (player, card) for every card played to the unfinished trick, in play order."""
+        state = self.state
+        return [(self.players[(state.leader + i) % NUM_PLAYERS], CARDS[card_id])
+                for i, card_id in enumerate(state.current_trick)]
+
+    def last_trick_result(self):
+        """Describe who won the last finished trick, and with which card."""
+        state = self.state
+        finished = len(state.plays) // NUM_PLAYERS
+        trick = state.plays[(finished - 1) * NUM_PLAYERS:finished * NUM_PLAYERS]
+        winning_card = CARDS[trick[trick_winner(trick, state.trump_suit)]]
+        # The winner of a trick leads the next one
+        return f"{self.players[state.leader].name} wins Trick {finished} with {winning_card}!"
+
+    def enable_legal_cards(self):
+        """Enable the buttons of the cards the engine lets the current player play."""
+        legal = self.state.legal_mask()
+        for btn in self.card_buttons:
+            btn.config(state="normal" if btn._card_obj.id in legal else "disabled")
+
+    def play_computer_turn(self):
+        player = self.players[self.current_player_index]
+        if not player.bot or self.current_phase not in ("bidding", "trick"):
+            return
+        # The search runs in a worker thread so the window stays responsive; the Tk loop polls for its answer
+        state = self.engine_state()
+        move = self.computer_move = (player, self.current_phase, queue.Queue(), state)
+
+        def think():
+            try:
+                move[2].put((player.bot.act(state, self.rng), None))
+            except Exception as error:
+                move[2].put((None, error))
+
+        threading.Thread(target=think, daemon=True).start()
+        self.root.after(BOT_POLL_MS, self.finish_computer_turn, move)
+
+    def finish_computer_turn(self, move):
+        player, phase, answer, state = move
+        try:
+            action, error = answer.get_nowait()
+        except queue.Empty:
+            self.root.after(BOT_POLL_MS, self.finish_computer_turn, move)
+            return
+        if move is not self.computer_move or player is not self.players[self.current_player_index] \
+                or phase != self.current_phase:
+            return  # The game moved on (new, resumed or quit) while the computer was thinking
+        self.computer_move = None
+        if error:
+            # Keep the game going with a simple legal move, as PIMCBot does when its search fails
+            messagebox.showerror("Computer Player", f"{player.name} could not decide and plays a simple move "
+                                                    f"instead.\n\n{type(error).__name__}: {error}")
+            action = GreedyBot().act(state, self.rng)
+        if phase == "bidding":
+            self.discarded_cards = [CARDS[card_id] for card_id in action]
+            self.discard_count = len(self.discarded_cards)
+            self.submit_bid()
+        else:
+            self.selected_trick_card = CARDS[action]
+            self.submit_trick_card()
 
     def update_scores(self):
         scores_text = f"Scores — {self.player_names[0]}: {self.players[0].score} | " \
@@ -495,6 +554,12 @@ class CounterPointGame:
         
         # Update the label to show the current player's hand
         player = self.players[self.current_player_index]
+        self.card_buttons = []
+        if player.bot:
+            # Keep the computer's cards hidden while it decides
+            tk.Label(self.bottom_frame, text=f"{player.name} (computer) is thinking...",
+                     font=("Arial", 12, "bold"), bg="#ab3a11", fg="white").pack(pady=5)
+            return
         tk.Label(self.bottom_frame, text=f"{player.name}'s Hand",
                  font=("Arial", 12, "bold"), bg="#ab3a11", fg="white").pack(pady=5)
         
@@ -671,13 +736,11 @@ class CounterPointGame:
         if self.discard_count != 3:
             return
         
-        player = self.players[self.current_player_index]
-        bid_value = sum(10 if card.suit == "Spades" else 20 if card.suit == "Hearts"
-                        else 30 if card.suit == "Clubs" else 0 for card in self.discarded_cards)
-        player.hand = [card for card in player.hand if card not in self.discarded_cards]
-        self.bids[player.name] = bid_value
-        player.bid = bid_value
-        self.bid_cards[player.name] = self.discarded_cards[:]  # Store bid cards
+        seat = self.current_player_index
+        player = self.players[seat]
+        self.state.apply(tuple(card.id for card in self.discarded_cards))
+        player.hand = [card for card in player.hand if card.id in self.state.hands[seat]]
+        player.bid = self.state.bids[seat]
         
         # Clear the current player's selection area
         for widget in self.played_cards_frame.winfo_children():
@@ -685,18 +748,23 @@ class CounterPointGame:
                 widget.destroy()
         
         self.current_player_index += 1
+        self.show_bid_result(player)
+
+    def show_bid_result(self, player):
+        """Show the bid a player just made and who bids next, or that the trick phase starts."""
+        message = f"{player.name} bid {player.bid} points."
         if self.current_player_index < 3:
             next_player = self.players[self.current_player_index]
-            message = f"{player.name} bid {bid_value} points."
-            pass_message = f"Please pass to {next_player.name} to bid."
+            pass_message = f"Please pass to {next_player.name} to bid." if not next_player.bot \
+                else f"{next_player.name} (computer) bids next."
             self.show_bid_result_prompt(message, pass_message, self.prompt_next_player)
         else:
-            message = f"{player.name} bid {bid_value} points."
             pass_message = "Bidding complete. Starting trick phase."
             self.show_bid_result_prompt(message, pass_message, self.start_trick_phase)
 
     def show_bid_result_prompt(self, bid_message, pass_message, on_continue):
         self.current_phase = "bid_result_prompt"
+        self.save_snapshot()
         for widget in self.root.winfo_children():
             widget.destroy()
             
@@ -716,58 +784,25 @@ class CounterPointGame:
 
     def start_trick_phase(self):
         self.current_phase = "trick"
-        self.current_trick_number = 1
-        self.current_player_index = 0
-        self.current_trick = []
+        self.current_player_index = self.state.current_player
         self.setup_game_ui()
 
     def handle_trick(self):
         player = self.players[self.current_player_index]
-        self.turn_label.config(text=f"Turn: {player.name} - Select a card for Trick {self.current_trick_number}")
+        self.turn_label.config(text=f"Turn: {player.name} - Select a card for Trick {self.state.trick_number}")
         self.selected_trick_card = None
         # Clear only the current player's selection area
         for widget in self.current_cards_frame.winfo_children():
             widget.destroy()
         self.update_player_hand()
-        
-        # Enforce follow suit rule
-        lead_suit = None
-        if self.current_trick:  # If not the first player in the trick
-            lead_suit = self.current_trick[0][1].suit if self.current_trick[0][1].suit != "Joker" else None
-        
-        if lead_suit:
-            # Check if player has cards of the lead suit
-            has_lead_suit = any(card.suit == lead_suit for card in player.hand)
-            if has_lead_suit:
-                # Disable cards that don't match the lead suit
-                for btn in self.card_buttons:
-                    card_obj = btn._card_obj
-                    if card_obj.suit != lead_suit:
-                        btn.config(state="disabled")
-                    else:
-                        btn.config(state="normal")
-            else:
-                # Enable all cards if player has no lead suit
-                for btn in self.card_buttons:
-                    btn.config(state="normal")
-        else:
-            # First player can play any card
-            for btn in self.card_buttons:
-                btn.config(state="normal")
+        self.enable_legal_cards()  # Only cards that follow suit, when the player can
 
     def handle_trick_card(self, card_btn, card_obj):
         if self.current_phase != "trick" or card_obj not in self.players[self.current_player_index].hand:
             return
         
-        # Check if the card follows suit
-        lead_suit = None
-        if self.current_trick:  # If not the first player in the trick
-            lead_suit = self.current_trick[0][1].suit if self.current_trick[0][1].suit != "Joker" else None
-        
-        if lead_suit:
-            has_lead_suit = any(card.suit == lead_suit for card in self.players[self.current_player_index].hand)
-            if has_lead_suit and card_obj.suit != lead_suit:
-                return  # Prevent selecting a card that doesn't follow suit
+        if card_obj.id not in self.state.legal_mask():
+            return  # Prevent selecting a card that doesn't follow suit
         
         if card_obj == self.selected_trick_card:
             # Deselect the card
@@ -778,20 +813,7 @@ class CounterPointGame:
                 if hasattr(widget, "_card_obj") and widget._card_obj == card_obj:
                     widget.destroy()
             # Re-enable valid cards based on lead suit
-            if lead_suit:
-                has_lead_suit = any(card.suit == lead_suit for card in self.players[self.current_player_index].hand)
-                if has_lead_suit:
-                    for btn in self.card_buttons:
-                        if btn._card_obj.suit == lead_suit:
-                            btn.config(state="normal")
-                        else:
-                            btn.config(state="disabled")
-                else:
-                    for btn in self.card_buttons:
-                        btn.config(state="normal")
-            else:
-                for btn in self.card_buttons:
-                    btn.config(state="normal")
+            self.enable_legal_cards()
         else:
             # Select the card, deselecting any previously selected card
             if self.selected_trick_card:
@@ -835,34 +857,43 @@ class CounterPointGame:
         
         player = self.players[self.current_player_index]
         if self.selected_trick_card in player.hand:
+            self.state.apply(self.selected_trick_card.id)
             player.hand.remove(self.selected_trick_card)
-            self.current_trick.append((player, self.selected_trick_card))
             self.selected_trick_card = None
-            self.current_player_index = (self.current_player_index + 1) % 3
-            if len(self.current_trick) < 3:
+            self.current_player_index = self.state.current_player
+            if self.state.current_trick:
                 self.show_next_player_prompt()
             else:
                 self.resolve_trick()
 
     def show_next_player_prompt(self, trick_result=None):
+        next_player = self.players[self.current_player_index]
+        if next_player.bot and not trick_result:
+            # Nothing to hand over to a computer player
+            self.current_phase = "trick"
+            self.setup_game_ui()
+            return
+
         self.current_phase = "next_player_prompt"
+        self.save_snapshot()
         for widget in self.root.winfo_children():
             widget.destroy()
             
         prompt_frame = tk.Frame(self.root, bg="#194c22")
         prompt_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
         
-        next_player = self.players[self.current_player_index]
-        
         # Display the trick result if provided
         if trick_result:
             tk.Label(prompt_frame, text="Trick Result", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
             tk.Label(prompt_frame, text=trick_result, font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=10)
         
         # Display the pass to next player instruction
-        tk.Label(prompt_frame, text=f"Pass to {next_player.name}", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
-        tk.Label(prompt_frame, text="Please pass the device to the next player to play their card.",
-                 font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=10)
+        if next_player.bot:
+            tk.Label(prompt_frame, text=f"{next_player.name} (computer) plays next", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
+        else:
+            tk.Label(prompt_frame, text=f"Pass to {next_player.name}", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
+            tk.Label(prompt_frame, text="Please pass the device to the next player to play their card.",
+                     font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=10)
         
         def on_continue():
             self.current_phase = "trick"  # Ensure the phase is set to trick for the next player
@@ -881,45 +912,14 @@ class CounterPointGame:
         else:
             tk.Label(self.played_cards_frame, text=str(card), bg="#194c22", fg="white").pack(side=tk.LEFT, padx=5)
 
-    def card_strength(self, card, lead_suit, trump_suit):
-        """Returns a tuple (priority, rank_index) to determine card strength."""
-        priority = 0
-        rank_index = Deck.RANK_ORDER.index(card.rank) if card.rank in Deck.RANK_ORDER else -1  # Joker has lowest rank
-
-        if trump_suit and card.suit == trump_suit:
-            priority = 2  # Trump cards have highest priority
-        elif card.suit == lead_suit:
-            priority = 1  # Lead suit cards have next priority
-
-        return (priority, rank_index)
-
     def resolve_trick(self):
-        lead_suit = self.current_trick[0][1].suit if self.current_trick[0][1].suit != "Joker" else None
-        trump_suit = self.trump_card.suit if self.trump_card and self.trump_card.rank not in ["Nine", "Joker"] else None
-
-        # Evaluate each card's strength
-        strengths = [(player, card, self.card_strength(card, lead_suit, trump_suit)) for player, card in self.current_trick]
-        # Find the highest strength card
-        winner_entry = max(strengths, key=lambda x: x[2])  # Compare by strength tuple (priority, rank_index)
-        winner, winning_card = winner_entry[0], winner_entry[1]
-
-        # Update tricks won and cards won
-        self.tricks_won[winner.name] += 1
-        # Collect all cards in the trick for the winner
-        for _, card in self.current_trick:
-            self.cards_won[winner.name].append(card)
-
-        # Prepare the trick result message
-        trick_result = f"{winner.name} wins Trick {self.current_trick_number} with {winning_card}!"
-
-        self.current_trick_number += 1
-        self.current_trick = []
-        self.current_player_index = self.players.index(winner)  # Start next trick with winner
+        # The engine has already given the trick to its winner, who leads the next one
+        trick_result = self.last_trick_result()
         
         for widget in self.played_cards_frame.winfo_children():
             widget.destroy()
         
-        if self.current_trick_number <= 9:
+        if self.state.phase == TRICK:
             for widget in self.trick_frame.winfo_children():
                 widget.destroy()
             self.played_cards_frame = tk.Frame(self.trick_frame, bg="#194c22")
@@ -945,7 +945,7 @@ class CounterPointGame:
                 self.played_cards_frame.configure(bg="#194c22")
 
             # Place the trick label directly on the wood texture
-            tk.Label(self.played_cards_frame, text=f"Trick {self.current_trick_number}", font=("Arial", 12), bg="#57311a", fg="white").place(relx=0.5, rely=0, anchor="n", y=5)
+            tk.Label(self.played_cards_frame, text=f"Trick {self.state.trick_number}", font=("Arial", 12), bg="#57311a", fg="white").place(relx=0.5, rely=0, anchor="n", y=5)
 
             # Rebind resize handler
             def resize_trick_texture(event):
@@ -983,62 +983,28 @@ class CounterPointGame:
             # Show the combined prompt with the trick result
             self.show_next_player_prompt(trick_result=trick_result)
         else:
-            # For the last trick, show the result before proceeding to scoring
-            for widget in self.root.winfo_children():
-                widget.destroy()
-                
-            prompt_frame = tk.Frame(self.root, bg="#194c22")
-            prompt_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
-            
-            tk.Label(prompt_frame, text="Trick Result", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
-            tk.Label(prompt_frame, text=trick_result, font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=10)
-            tk.Label(prompt_frame, text="This was the last trick. Proceeding to scoring...",
-                     font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=20)
-            
-            tk.Button(prompt_frame, text="Continue", font=("Arial", 14),
-                      command=self._score_round_without_ui_update, bg="#f5e1bf", width=15, height=2).pack(pady=30)
+            self.show_last_trick_result(trick_result)
+
+    def show_last_trick_result(self, trick_result):
+        """Show the last trick's result before proceeding to scoring."""
+        self.save_snapshot()
+        for widget in self.root.winfo_children():
+            widget.destroy()
+
+        prompt_frame = tk.Frame(self.root, bg="#194c22")
+        prompt_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        
+        tk.Label(prompt_frame, text="Trick Result", font=("Arial", 24, "bold"), bg="#194c22", fg="white").pack(pady=20)
+        tk.Label(prompt_frame, text=trick_result, font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=10)
+        tk.Label(prompt_frame, text="This was the last trick. Proceeding to scoring...",
+                 font=("Arial", 16), bg="#194c22", fg="white", wraplength=400).pack(pady=20)
+        
+        tk.Button(prompt_frame, text="Continue", font=("Arial", 14),
+                  command=self._score_round_without_ui_update, bg="#f5e1bf", width=15, height=2).pack(pady=30)
 
     def _score_round_without_ui_update(self):
         """Helper method to score the round without updating the UI, since the UI is cleared."""
-        self.current_phase = "scoring"
-        self.differences = {}  # Store differences for score breakdown
-        for player in self.players:
-            # Calculate points from cards won
-            points_won = sum(card.point_value for card in self.cards_won[player.name])
-            bid = player.bid
-            self.differences[player.name] = abs(bid - points_won)
-        
-        for player in self.players:
-            opponent_diffs = [self.differences[opponent.name] for opponent in self.players if opponent != player]
-            base_score = sum(opponent_diffs)
-            bonus = 0
-            player_points_won = sum(card.point_value for card in self.cards_won[player.name])
-            difference = self.differences[player.name]
-            if difference == 0:
-                bonus = 30
-            elif difference <= 2:
-                bonus = 20
-            elif difference <= 5:
-                bonus = 10
-            player.round_score = base_score + bonus
-            player.score += player.round_score
-            # Store scoring details for the current round
-            player.scoring_details = {
-                'base_score': base_score,
-                'bonus': bonus,
-                'points_won': player_points_won,
-                'difference': difference,
-                'num_cards_won': len(self.cards_won[player.name])
-            }
-            # Update cumulative stats
-            player.cumulative_stats['total_tricks_won'] += self.tricks_won[player.name]
-            player.cumulative_stats['total_points_won'] += player_points_won
-            player.cumulative_stats['total_cards_won'] += len(self.cards_won[player.name])
-            player.cumulative_stats['total_bonus'] += bonus
-            player.cumulative_stats['bids'].append((player.bid, player_points_won))  # Use player.bid directly
-            player.cumulative_stats['round_scores'].append(player.round_score)
-            player.cumulative_stats['differences'].append(difference)
-            player.cumulative_stats['bonuses'].append(bonus)
+        self.apply_round_scores()
         
         # Only show the "Round Result" message if the game will continue (i.e., not the last round)
         if not (self.win_condition == 2 and self.current_round >= self.max_rounds):
@@ -1049,26 +1015,23 @@ class CounterPointGame:
         self.check_game_over()
 
     def score_round(self):
+        self.apply_round_scores()
+        self.update_scores()
+        
+        round_winner = max(self.players, key=lambda p: p.round_score)
+        messagebox.showinfo("Round Result", f"Round {self.current_round} Complete!\n"
+                            f"Round Winner: {round_winner.name} with {round_winner.round_score} points")
+        
+        self.check_game_over()
+
+    def apply_round_scores(self):
+        """Score the finished round and record every player's results and stats."""
         self.current_phase = "scoring"
+        state = self.state
         self.differences = {}  # Store differences for score breakdown
-        for player in self.players:
-            # Calculate points from cards won
-            points_won = sum(card.point_value for card in self.cards_won[player.name])
-            bid = player.bid
-            self.differences[player.name] = abs(bid - points_won)
-        
-        for player in self.players:
-            opponent_diffs = [self.differences[opponent.name] for opponent in self.players if opponent != player]
-            base_score = sum(opponent_diffs)
-            bonus = 0
-            player_points_won = sum(card.point_value for card in self.cards_won[player.name])
-            difference = self.differences[player.name]
-            if difference == 0:
-                bonus = 30
-            elif difference <= 2:
-                bonus = 20
-            elif difference <= 5:
-                bonus = 10
+        for seat, (player, (base_score, bonus, difference)) in enumerate(zip(self.players, state.results)):
+            player_points_won = state.points_won[seat]
+            self.differences[player.name] = difference
             player.round_score = base_score + bonus
             player.score += player.round_score
             # Store scoring details for the current round
@@ -1077,25 +1040,122 @@ class CounterPointGame:
                 'bonus': bonus,
                 'points_won': player_points_won,
                 'difference': difference,
-                'num_cards_won': len(self.cards_won[player.name])
+                'num_cards_won': len(state.cards_won[seat])
             }
-            # Update cumulative stats
-            player.cumulative_stats['total_tricks_won'] += self.tricks_won[player.name]
-            player.cumulative_stats['total_points_won'] += player_points_won
-            player.cumulative_stats['total_cards_won'] += len(self.cards_won[player.name])
-            player.cumulative_stats['total_bonus'] += bonus
-            player.cumulative_stats['bids'].append((player.bid, player_points_won))  # Use player.bid directly
-            player.cumulative_stats['round_scores'].append(player.round_score)
-            player.cumulative_stats['differences'].append(difference)
-            player.cumulative_stats['bonuses'].append(bonus)
-        
-        self.update_scores()
-        
-        round_winner = max(self.players, key=lambda p: p.round_score)
-        messagebox.showinfo("Round Result", f"Round {self.current_round} Complete!\n"
-                            f"Round Winner: {round_winner.name} with {round_winner.round_score} points")
-        
-        self.check_game_over()
+            # Update session stats in constant time
+            player.stats.add_round(self.current_round, player.bid, player_points_won, difference, bonus,
+                                   player.round_score, state.tricks_won[seat], len(state.cards_won[seat]))
+        if self.recorder:
+            self.record_round()
+
+    def start_recording(self, path):
+        """Append every round finished from now on to a game-record file."""
+        if self.recorder:
+            self.recorder.close()
+        self.recorder = RecordWriter(path)
+        self.record_game = None
+
+    def join_online_table(self):
+        """Play one seat at a server.py table in a window of its own."""
+        address = simpledialog.askstring("Join Online Table", "Server (host:port):", initialvalue=f"127.0.0.1:{PORT}",
+                                         parent=self.root)
+        if not address:
+            return
+        name = simpledialog.askstring("Join Online Table", "Your name:", initialvalue=self.player_names[0],
+                                      parent=self.root)
+        if not name:
+            return
+        host, _, port = address.rpartition(":")
+        try:
+            port = int(port)
+        except ValueError:
+            messagebox.showerror("Join Online Table", f"{address} does not end in a port number.")
+            return
+        # Connecting happens in the table's socket thread, which reports a failure in its window
+        OnlineTable(self.root, host or "127.0.0.1", port, name, self.load_card_image)
+
+    def choose_record_file(self):
+        path = filedialog.asksaveasfilename(title="Record games to", defaultextension=".cpgr",
+                                            filetypes=[("CounterPoint game records", "*.cpgr")])
+        if path:
+            self.start_recording(path)
+
+    def record_round(self):
+        if self.record_game is None:
+            self.record_game = self.recorder.new_game()
+        self.recorder.write(RoundRecord.from_state(self.state, self.record_game, self.current_round))
+        self.recorder.flush()  # Human games are slow enough to write every round as it ends
+
+    def save_snapshot(self):
+        """Save the game in progress, so that Resume Game can rebuild it if the program dies."""
+        if self.current_phase not in PHASES or not self.players:
+            return
+        # players rotates one place each round, so player p of the game sits at index (p - round + 1) % 3
+        by_player = [self.players[(player - self.current_round + 1) % 3] for player in range(3)]
+        discards = [tuple(cards_in(mask)) for mask, bid in zip(self.state.discards, self.state.bids) if bid is not None]
+        snapshot = GameSnapshot(self.current_phase, self.win_condition, self.target_score, self.max_rounds,
+                                self.current_round, self.player_names, self.computer_players,
+                                [player.score for player in by_player], self.state.deal, discards, self.state.plays,
+                                [player.stats for player in by_player])
+        try:
+            write_snapshot(self.snapshot_path, snapshot)
+        except (OSError, struct.error) as e:
+            print(f"Error saving game snapshot: {e}")
+
+    def resume_game(self):
+        try:
+            snapshot = read_snapshot(self.snapshot_path)
+            self.restore_snapshot(snapshot)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Resume Game", f"The saved game could not be resumed.\n\n{error}")
+            self.show_welcome_screen()
+
+    def restore_snapshot(self, snapshot):
+        """Rebuild the players, the round so far and the screen a GameSnapshot was saved at."""
+        state = snapshot.round_state()  # Checks every saved action before the current game is replaced
+        self.player_names = list(snapshot.names)
+        self.computer_players = list(snapshot.computers)
+        self.win_condition = snapshot.win_condition
+        self.target_score = snapshot.target_score
+        self.max_rounds = snapshot.max_rounds
+        self.current_round = snapshot.round
+        self.game_over = False
+        self.record_game = None
+        self.players = []
+        for seat in range(3):
+            index = snapshot.seat_player(seat)
+            player = Player(self.player_names[index])
+            player.score = snapshot.scores[index]
+            if snapshot.stats:
+                player.stats = snapshot.stats[index]
+            if self.computer_players[index]:
+                player.bot = computer_bot()
+            self.players.append(player)
+
+        self.state = state
+        self.deal_hands()
+        for player, bid in zip(self.players, state.bids):
+            player.bid = bid
+        trick_result = self.last_trick_result() if state.plays and not state.current_trick else None
+        if snapshot.phase in ("bidding", "bid_result_prompt"):
+            self.current_player_index = len(snapshot.discards)
+        else:
+            self.current_player_index = state.current_player
+        self.discarded_cards = []
+        self.discard_count = 0
+        self.selected_trick_card = None
+
+        self.current_phase = snapshot.phase
+        if snapshot.phase == "trump":
+            self.select_trump_card()
+        elif snapshot.phase == "bid_result_prompt":
+            self.show_bid_result(self.players[len(snapshot.discards) - 1])
+        elif snapshot.phase == "next_player_prompt":
+            self.show_next_player_prompt(trick_result)
+        elif state.phase == SCORED:
+            self.show_last_trick_result(trick_result)
+        else:
+            self.setup_game_ui()
 
     def check_game_over(self):
         # Always sort players by score to determine winners
@@ -1122,6 +1182,7 @@ class CounterPointGame:
 
     def show_game_over_screen(self):
         self.current_phase = "game_over"
+        remove_snapshot(self.snapshot_path)  # Nothing left to resume
         for widget in self.root.winfo_children():
             widget.destroy()
             
@@ -1182,7 +1243,7 @@ class CounterPointGame:
         
         # Create a Treeview to display the score breakdown
         columns = ("Metric", self.players[0].name, self.players[1].name, self.players[2].name)
-        tree = ttk.Treeview(breakdown_frame, columns=columns, show="headings", height=10)
+        tree = ttk.Treeview(breakdown_frame, columns=columns, show="headings", height=13)
         
         # Set column headings
         tree.heading("Metric", text="Metric")
@@ -1196,49 +1257,32 @@ class CounterPointGame:
         total_scores = [str(player.score) for player in self.players]
         tree.insert("", "end", values=("Total Score", total_scores[0], total_scores[1], total_scores[2]))
         
-        # Bidding Results (Bid vs Points Won per round)
-        bidding_results = []
-        for player in self.players:
-            bids_summary = "; ".join(f"R{idx+1}: Bid {bid}, Won {won}" for idx, (bid, won) in enumerate(player.cumulative_stats['bids']))
-            bidding_results.append(bids_summary if bids_summary else "None")
-        tree.insert("", "end", values=("Bidding Results", bidding_results[0], bidding_results[1], bidding_results[2]))
-        
-        # Differences per round
-        differences = []
-        for player in self.players:
-            diff_summary = "; ".join(f"R{idx+1}: {diff}" for idx, diff in enumerate(player.cumulative_stats['differences']))
-            differences.append(diff_summary if diff_summary else "None")
-        tree.insert("", "end", values=("Differences", differences[0], differences[1], differences[2]))
-        
-        # Bonuses per round
-        bonuses = []
-        for player in self.players:
-            bonus_summary = "; ".join(f"R{idx+1}: {bonus}" for idx, bonus in enumerate(player.cumulative_stats['bonuses']))
-            bonuses.append(bonus_summary if bonus_summary else "None")
-        tree.insert("", "end", values=("Bonuses", bonuses[0], bonuses[1], bonuses[2]))
-        
-        # Round Scores
-        round_scores = []
-        for player in self.players:
-            scores_summary = "; ".join(f"R{idx+1}: {score}" for idx, score in enumerate(player.cumulative_stats['round_scores']))
-            round_scores.append(scores_summary if scores_summary else "None")
-        tree.insert("", "end", values=("Round Scores", round_scores[0], round_scores[1], round_scores[2]))
-        
-        # Total Tricks Won
-        tricks_won = [str(player.cumulative_stats['total_tricks_won']) for player in self.players]
-        tree.insert("", "end", values=("Total Tricks Won", tricks_won[0], tricks_won[1], tricks_won[2]))
-        
-        # Total Points from Cards
-        points_won = [str(player.cumulative_stats['total_points_won']) for player in self.players]
-        tree.insert("", "end", values=("Total Points from Cards", points_won[0], points_won[1], points_won[2]))
-        
-        # Total Cards Won
-        cards_won = [str(player.cumulative_stats['total_cards_won']) for player in self.players]
-        tree.insert("", "end", values=("Total Cards Won", cards_won[0], cards_won[1], cards_won[2]))
-        
-        # Total Bonus Points
-        total_bonus = [str(player.cumulative_stats['total_bonus']) for player in self.players]
-        tree.insert("", "end", values=("Total Bonus Points", total_bonus[0], total_bonus[1], total_bonus[2]))
+        # Per-round results, for the rounds each player's stats keep in detail
+        summaries = [
+            ("Bidding Results", lambda detail: f"Bid {detail.bid}, Won {detail.points_won}"),
+            ("Differences", lambda detail: detail.difference),
+            ("Bonuses", lambda detail: detail.bonus),
+            ("Round Scores", lambda detail: detail.round_score),
+        ]
+        for metric, describe in summaries:
+            tree.insert("", "end", values=(metric, *(player.stats.recent_summary(describe) for player in self.players)))
+
+        # Session aggregates
+        tiers = "/".join(str(bonus) for _, bonus in BONUS_TIERS) + "/none"
+        metrics = [
+            ("Bid Error (mean ± sd)", lambda stats: f"{stats.error_mean:.1f} ± {stats.error_std:.1f}"),
+            (f"Bonus Tiers ({tiers})", lambda stats: "/".join(map(str, stats.bonus_tiers))),
+            ("Best / Worst Round", lambda stats: f"R{stats.best_round.round}: {stats.best_round.round_score} / "
+                                                 f"R{stats.worst_round.round}: {stats.worst_round.round_score}"
+                                                 if stats.rounds else "None"),
+            ("Longest Bonus Streak", lambda stats: stats.longest_bonus_streak),
+            ("Total Tricks Won", lambda stats: stats.total_tricks_won),
+            ("Total Points from Cards", lambda stats: stats.total_points_won),
+            ("Total Cards Won", lambda stats: stats.total_cards_won),
+            ("Total Bonus Points", lambda stats: stats.total_bonus),
+        ]
+        for metric, value in metrics:
+            tree.insert("", "end", values=(metric, *(str(value(player.stats)) for player in self.players)))
         
         # Add a vertical scrollbar
         scrollbar = ttk.Scrollbar(breakdown_frame, orient=tk.VERTICAL, command=tree.yview)
@@ -1271,9 +1315,57 @@ class CounterPointGame:
                             "   - Set Deals: Player with the highest score after set deals wins.\n"
                             "8. After each round, the dealer rotates to the player on the left.")
 
+    def show_performance_stats(self):
+        """Show the recorded timers and counters, or start recording them."""
+        if not instruments.enabled:
+            if messagebox.askyesno("Performance Stats", "Performance recording is off.\n\n"
+                                   "Start recording phase times, image loads and widget counts now?"):
+                instruments.enable()
+            return
+        report = instruments.format_report()
+        print(report)
+        window = tk.Toplevel(self.root)
+        window.title("Performance Stats")
+        text = tk.Text(window, font=("Courier", 10), width=80, height=30)
+        text.insert(tk.END, report)
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True)
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+
+        def save_json():
+            path = filedialog.asksaveasfilename(parent=window, defaultextension=".json",
+                                                filetypes=[("JSON", "*.json")])
+            if path:
+                instruments.dump(path)
+
+        def reset():
+            instruments.reset()
+            window.destroy()
+
+        def stop():
+            instruments.disable()
+            window.destroy()
+        tk.Button(buttons, text="Save JSON...", command=save_json).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Reset", command=reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Stop recording", command=stop).pack(side=tk.LEFT, padx=5)
+
     def run(self):
         self.root.mainloop()
 
+# Recorded only while instrumentation is on (COUNTERPOINT_PROFILE, or Help > Performance Stats)
+instruments.watch_phase(CounterPointGame)
+instruments.time_calls(CounterPointGame, ["setup_game_ui", "update_player_hand", "update_scores",
+                                          "create_scrollable_cards", "load_card_image", "resolve_trick",
+                                          "score_round", "play_computer_turn", "finish_computer_turn",
+                                          "show_score_breakdown", "save_snapshot"], "game.")
+instruments.time_calls(Image, ["open"], "pil.")
+instruments.time_calls(Image.Image, ["resize"], "pil.")
+instruments.watch_widgets(tk.BaseWidget)
+
 if __name__ == "__main__":
+    enable_from_environment()
     game = CounterPointGame()
+    if len(sys.argv) > 1:
+        game.start_recording(sys.argv[1])  # "python gui.py games.cpgr" records every round played
     game.run()
\ No newline at end of file
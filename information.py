@@ -0,0 +1,176 @@
+from functools import lru_cache
+from itertools import accumulate, product
+from math import comb, prod
+
+from engine import (ALL_CARDS, BID_MASKS, CARD_SUIT, NO_SUIT, NUM_DISCARDS, NUM_PLAYERS, SUIT_MASKS, CardSet,
+                    bid_value, cards_in, mask_of, trick_winner)
+
+# Bitboards of the cards worth each bid value, the zero-value cards included
+BID_GROUPS = [(value, cards) for value, cards in BID_MASKS] + [(0, ALL_CARDS & ~sum(cards for _, cards in BID_MASKS))]
+
+
+@lru_cache(maxsize=None)
+def discard_splits(count, bid):
+    """Return the ways count discarded cards can split across BID_GROUPS and be worth bid."""
+    return [split for split in product(range(count + 1), repeat=len(BID_GROUPS))
+            if sum(split) == count and sum(n * value for n, (value, _) in zip(split, BID_GROUPS)) == bid]
+
+
+@lru_cache(maxsize=4096)
+def split_weights(count, bid, sizes):
+    """Return discard_splits(count, bid) and their cumulative weights when BID_GROUPS have sizes cards left.
+
+    A split's weight is the number of discards it covers, so drawing a split
+    by weight and then its cards uniformly draws every discard equally often.
+    """
+    splits = discard_splits(count, bid)
+    return splits, list(accumulate(prod(comb(size, n) for n, size in zip(split, sizes)) for split in splits))
+
+
+class InformationSet:
+    """What one seat can see of a RoundState, and deals consistent with it.
+
+    Visible: the seat's own hand and discards, the trump card, every card
+    played so far, the discards of seats that bid earlier (shown in the
+    bidding panel), and the suits a player has shown void in by not
+    following the lead. Bids are public, so hidden discards are only dealt
+    as cards worth the bid their seat announced.
+    """
+    def __init__(self, state, seat, show_earlier_bids=True):
+        self.seat = seat
+        self.hand = CardSet(state.hands[seat])
+        self.hand_sizes = [hand.bit_count() for hand in state.hands]
+        self.known_discards = [0] * NUM_PLAYERS
+        for other in range(NUM_PLAYERS):
+            if other == seat or (show_earlier_bids and other < seat and state.discards[other]):
+                self.known_discards[other] = state.discards[other]
+        voids = [0] * NUM_PLAYERS
+        played = 0
+        plays = state.plays
+        leader = 0
+        for start in range(0, len(plays), NUM_PLAYERS):
+            trick = plays[start:start + NUM_PLAYERS]
+            lead_suit = CARD_SUIT[trick[0]]
+            for position, card in enumerate(trick):
+                player = (leader + position) % NUM_PLAYERS
+                if lead_suit != NO_SUIT and CARD_SUIT[card] != lead_suit:
+                    voids[player] |= SUIT_MASKS[lead_suit]
+                played |= 1 << card
+            if len(trick) == NUM_PLAYERS:
+                leader = leader_after(trick, leader, state.trump_suit)
+        self.voids = [CardSet(void) for void in voids]  # Cards of the suits each seat cannot hold
+        self.played = CardSet(played)
+        self.trump_card = state.trump_card
+        self.unseen = CardSet(ALL_CARDS & ~(self.hand | played | 1 << state.trump_card | sum(self.known_discards)))
+        # Cards still hidden in discards: 3 per seat whose discards are unknown
+        self.hidden_discards = [0 if self.known_discards[other] or not state.discards[other] else NUM_DISCARDS
+                                for other in range(NUM_PLAYERS)]
+        self.bids = list(state.bids)
+        # Unseen cards no other hand can hold because of its voids must be in a hidden discard
+        forced = self.unseen
+        for other in range(NUM_PLAYERS):
+            if other != seat and self.hand_sizes[other]:
+                forced &= self.voids[other]
+        self.forced = CardSet(forced)
+        self._groups = None  # Unseen cards outside forced per BID_GROUPS entry, listed on the first draw
+
+    def sample(self, rng, attempts=100):
+        """Return hand bitboards for all seats, dealing the unseen cards at random around the voids."""
+        return self.sample_deal(rng, attempts)[0]
+
+    def sample_deal(self, rng, attempts=100):
+        """Return (hands, discards) bitboards for all seats, hidden discards included."""
+        others = [other for other in range(NUM_PLAYERS) if other != self.seat]
+        if not any(self.voids[other] & self.unseen for other in others):
+            # Nothing constrains where a card goes: deal the shuffled cards in order.
+            # Sorting on random keys is about twice as fast as rng.shuffle here.
+            discards, unseen = self._hidden_discards(rng)
+            cards = cards_in(unseen)
+            random = rng.random
+            cards.sort(key=lambda _: random())
+            hands = [0] * NUM_PLAYERS
+            hands[self.seat] = self.hand
+            start = 0
+            for other in others:
+                hands[other] = mask_of(cards[start:start + self.hand_sizes[other]])
+                start += self.hand_sizes[other]
+            return hands, discards
+        first, second = others
+        first_void, second_void = int(self.voids[first]), int(self.voids[second])
+        random = rng.random
+        for _ in range(attempts):
+            discards, unseen = self._hidden_discards(rng)
+            cards = cards_in(unseen)
+            # Cards a seat is void in first, so they still have somewhere to go; the rest in random order
+            either = first_void | second_void
+            cards.sort(key=lambda c: random() - (either >> c & 1))
+            first_room, second_room = self.hand_sizes[first], self.hand_sizes[second]
+            first_hand = second_hand = 0
+            for card in cards:
+                if first_void >> card & 1:
+                    if second_void >> card & 1 or not second_room:
+                        break
+                    to_first = False
+                elif second_void >> card & 1:
+                    if not first_room:
+                        break
+                    to_first = True
+                else:
+                    to_first = random() * (first_room + second_room) < first_room
+                if to_first:
+                    first_hand |= 1 << card
+                    first_room -= 1
+                else:
+                    second_hand |= 1 << card
+                    second_room -= 1
+            else:
+                hands = [0] * NUM_PLAYERS
+                hands[self.seat] = self.hand
+                hands[first] = first_hand
+                hands[second] = second_hand
+                return hands, discards
+        raise RuntimeError("Could not sample a deal consistent with the visible cards.")
+
+    def _hidden_discards(self, rng, attempts=100):
+        """Draw each hidden discard from the unseen cards worth its seat's bid; return (discards, unseen)."""
+        seats = [other for other in range(NUM_PLAYERS) if self.hidden_discards[other]]
+        if self._groups is None:
+            self._groups = [cards_in(self.unseen & ~self.forced & cards) for _, cards in BID_GROUPS]
+        random = rng.random
+        for _ in range(attempts):
+            # Cards no hand can hold go to a hidden discard first, the rest is drawn around them
+            placed = {other: [] for other in seats}
+            for card in cards_in(self.forced):
+                room = [other for other in seats if len(placed[other]) < NUM_DISCARDS]
+                if not room:
+                    break
+                placed[rng.choice(room)].append(card)
+            else:
+                discards = list(self.known_discards)
+                unseen = self.unseen & ~self.forced
+                groups = self._groups
+                for other in seats:
+                    forced = placed[other]
+                    splits, weights = split_weights(NUM_DISCARDS - len(forced), self.bids[other] - bid_value(forced),
+                                                    tuple(len(group) for group in groups))
+                    if not weights or not weights[-1]:
+                        break  # An earlier seat's discard took cards this one needs: draw again
+                    split = rng.choices(splits, cum_weights=weights)[0]
+                    discarded = mask_of(forced)
+                    for n, group in zip(split, groups):
+                        while n:  # n distinct cards of the group; forced cards are never in one
+                            card = group[int(random() * len(group))]
+                            if not discarded >> card & 1:
+                                discarded |= 1 << card
+                                n -= 1
+                    discards[other] = discarded
+                    unseen &= ~discarded
+                    groups = [[card for card in group if not discarded >> card & 1] if n else group
+                              for n, group in zip(split, groups)]
+                else:
+                    return discards, unseen
+        raise RuntimeError("Could not sample discards worth the announced bids.")
+
+def leader_after(trick, leader, trump_suit):
+    """Seat that leads next after a completed trick."""
+    return (leader + trick_winner(trick, trump_suit)) % NUM_PLAYERS
@@ -0,0 +1,191 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+# Instruments records named counters and timers for the Tk front-end. Nothing
+# is wrapped while it is disabled: the functions, methods and attributes
+# registered with it are replaced by recording versions only on enable(),
+# and the originals are put back on disable(), so a disabled game runs the
+# exact code it would without this module.
+#
+# Setting COUNTERPOINT_PROFILE records from start-up and dumps the report
+# when the program exits: to stderr for "1", or as JSON to any other value,
+# taken as a file path.
+ENV_VAR = "COUNTERPOINT_PROFILE"
+_MISSING = object()  # Marks a replaced attribute owner did not define itself
+
+
+class Instruments:
+    """Named counters and timers, recorded only while enabled."""
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.timers = {}  # name -> [calls, total seconds, longest call in seconds]
+        self._timed = []  # (owner, attribute, timer name) to wrap on enable
+        self._phases = []  # (owner, attribute, prefix) whose assignments count as phase transitions
+        self._widget_classes = []  # tkinter base widget classes to count creations and destructions of
+        self._restore = []  # (owner, attribute, original or _MISSING) to put back on disable
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds):
+        """Add one call of the given duration to a timer."""
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+    def time_calls(self, owner, attributes, prefix=""):
+        """Register methods or module functions of owner to be timed as prefix + attribute while enabled."""
+        for attribute in attributes:
+            self._timed.append((owner, attribute, prefix + attribute))
+            if self.enabled:
+                self._wrap(owner, attribute, prefix + attribute)
+
+    def watch_phase(self, owner, attribute="current_phase", prefix="phase."):
+        """Register an attribute of owner's instances whose values are phases.
+
+        While enabled, each change of value counts prefix + "enter." + value
+        and adds the time spent in the old value to the timer prefix + old value.
+        """
+        self._phases.append((owner, attribute, prefix))
+        if self.enabled:
+            self._install_phase(owner, attribute, prefix)
+
+    def watch_widgets(self, widget_class):
+        """Register a tkinter base widget class to count widget creations and destructions by class name."""
+        self._widget_classes.append(widget_class)
+        if self.enabled:
+            self._install_widgets(widget_class)
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for entry in self._timed:
+            self._wrap(*entry)
+        for entry in self._phases:
+            self._install_phase(*entry)
+        for widget_class in self._widget_classes:
+            self._install_widgets(widget_class)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attribute, original in reversed(self._restore):
+            if original is _MISSING:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+        self._restore.clear()
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+
+    def _replace(self, owner, attribute, replacement):
+        # Only attributes owner defines itself are restored; inherited ones are deleted again
+        self._restore.append((owner, attribute, vars(owner).get(attribute, _MISSING) if isinstance(owner, type)
+                              else getattr(owner, attribute, _MISSING)))
+        setattr(owner, attribute, replacement)
+
+    def _wrap(self, owner, attribute, name):
+        function = getattr(owner, attribute)
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+        self._replace(owner, attribute, timed)
+
+    def _install_phase(self, owner, attribute, prefix):
+        instruments = self
+        entered_key = f"_{attribute}_entered"
+
+        def get_phase(obj):
+            return vars(obj).get(attribute)
+
+        def set_phase(obj, value):
+            state = vars(obj)
+            previous = state.get(attribute)
+            state[attribute] = value
+            if value == previous:
+                return
+            now = time.perf_counter()
+            if previous is not None and entered_key in state:
+                instruments.record(prefix + str(previous), now - state[entered_key])
+            state[entered_key] = now
+            instruments.count(f"{prefix}enter.{value}")
+        self._replace(owner, attribute, property(get_phase, set_phase))
+
+    def _install_widgets(self, widget_class):
+        count = self.count
+        create = widget_class.__init__
+        destroy = widget_class.destroy
+
+        @functools.wraps(create)
+        def counted_init(widget, *args, **kwargs):
+            count(f"widgets.created.{type(widget).__name__}")
+            create(widget, *args, **kwargs)
+
+        @functools.wraps(destroy)
+        def counted_destroy(widget):
+            count(f"widgets.destroyed.{type(widget).__name__}")
+            destroy(widget)
+        self._replace(widget_class, "__init__", counted_init)
+        self._replace(widget_class, "destroy", counted_destroy)
+
+    def report(self):
+        """Return the counters and timers as a JSON-ready dict, times in milliseconds."""
+        timers = {name: {"calls": calls, "total_ms": total * 1000, "mean_ms": total * 1000 / calls,
+                         "max_ms": longest * 1000}
+                  for name, (calls, total, longest) in sorted(self.timers.items())}
+        return {"enabled": self.enabled, "counters": dict(sorted(self.counters.items())), "timers": timers}
+
+    def format_report(self):
+        """Return the report as aligned text, slowest timers first."""
+        lines = [f"{'timer':<40} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, (calls, total, longest) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40} {calls:>7} {total * 1000:>10.1f} {total * 1000 / calls:>9.2f} "
+                         f"{longest * 1000:>9.2f}")
+        lines.append("")
+        lines.append(f"{'counter':<40} {'count':>7}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<40} {value:>7}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """Write the report as JSON to path, or as text to stderr without one."""
+        if path is None:
+            print(self.format_report(), file=sys.stderr)
+            return
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(temporary, path)
+
+
+instruments = Instruments()
+
+
+def enable_from_environment():
+    """Enable recording if COUNTERPOINT_PROFILE is set, dumping the report at exit."""
+    setting = os.environ.get(ENV_VAR)
+    if not setting or instruments.enabled:
+        return
+    instruments.enable()
+    atexit.register(instruments.dump, None if setting == "1" else setting)
@@ -0,0 +1,204 @@
+import math
+import time
+from itertools import combinations
+
+from bidding import canonical_kept, play_groups
+from engine import (BIDDING, CARD_POINTS, CARD_SUIT, NO_SUIT, NUM_DISCARDS, NUM_PLAYERS, SUIT_MASKS,
+                    TRICK, TRICK_STRENGTH, bid_value_of_mask, cards_in, legal_mask, mask_of, trick_winner)
+from information import InformationSet
+from scoring import score_round
+
+EXPLORATION = 0.7
+SCORE_SCALE = 100.0  # Rewards are round-score margins divided by this
+
+
+class Node:
+    """Statistics for one move, shared by every determinization that reaches it."""
+    __slots__ = ("move", "player", "children", "tried", "visits", "available", "reward")
+
+    def __init__(self, move=None, player=None):
+        self.move = move
+        self.player = player
+        self.children = {}
+        self.tried = 0  # Bitboard of card moves that already have a child
+        self.visits = 0
+        self.available = 0
+        self.reward = 0.0
+
+
+def _random_card(mask, random):
+    """Return a uniformly random card id from a non-empty bitboard."""
+    for _ in range(int(random() * mask.bit_count())):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+def _rewards(bids, points_won):
+    scores = [base + bonus for base, bonus, _ in score_round(bids, points_won)]
+    total = sum(scores)
+    # Margin over the average opponent: a round only helps if it gains on the others
+    return [(score - (total - score) / (NUM_PLAYERS - 1)) / SCORE_SCALE for score in scores]
+
+
+def _playout(hands, leader, trick, points, trump_suit, random, suit=CARD_SUIT, suit_masks=SUIT_MASKS,
+             card_points=CARD_POINTS, strength=TRICK_STRENGTH):
+    """Finish a round with uniformly random legal plays, adding each trick's points to points."""
+    hands = list(hands)
+    while True:
+        if not trick:
+            if not hands[leader]:
+                return
+            moves = hands[leader]
+        else:
+            moves = hands[(leader + len(trick)) % NUM_PLAYERS]
+        if trick and suit[trick[0]] != NO_SUIT and moves & suit_masks[suit[trick[0]]]:
+            moves &= suit_masks[suit[trick[0]]]
+        for _ in range(int(random() * moves.bit_count())):  # _random_card, inlined
+            moves &= moves - 1
+        card = (moves & -moves).bit_length() - 1
+        hands[(leader + len(trick)) % NUM_PLAYERS] ^= 1 << card
+        trick.append(card)
+        if len(trick) == NUM_PLAYERS:
+            row = strength[suit[trick[0]]][trump_suit]
+            s0, s1, s2 = row[trick[0]], row[trick[1]], row[trick[2]]
+            if s1 > s0:
+                position = 2 if s2 > s1 else 1
+            else:
+                position = 2 if s2 > s0 else 0
+            leader = (leader + position) % NUM_PLAYERS
+            points[leader] += card_points[trick[0]] + card_points[trick[1]] + card_points[trick[2]]
+            trick = []
+
+
+class ISMCTSBot:
+    """Single-observer information-set MCTS player for the discard and the trick phase.
+
+    Each iteration deals the cards the seat cannot see at random (respecting
+    known voids and the discards shown in the bidding panel), then walks one
+    tree of the seat's information sets. Statistics are shared across
+    determinizations, with availability-counted UCB so moves are only
+    compared with the deals in which they were legal. Discards made by
+    later bidders are hidden, so they are drawn at random as part of the
+    deal rather than searched. Playouts are uniformly random.
+
+    The search is anytime: act() returns the most visited move when
+    time_budget seconds have passed, or after iterations if that is set.
+    """
+    def __init__(self, time_budget=0.1, iterations=None, exploration=EXPLORATION):
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.last_iterations = 0
+
+    def act(self, state, rng):
+        if state.phase == TRICK:
+            legal = state.legal_actions()
+            if len(legal) == 1:
+                return legal[0]
+        root = self.search(state, rng)
+        return max(root.children.values(), key=lambda child: child.visits).move
+
+    def search(self, state, rng, time_budget=None, iterations=None):
+        """Run iterations from state until the budget runs out; return the root Node."""
+        time_budget = self.time_budget if time_budget is None else time_budget
+        iterations = self.iterations if iterations is None else iterations
+        seat = state.current_player
+        info = InformationSet(state, seat)
+        root = Node(player=seat)
+        if state.phase == BIDDING:
+            hand = state.hands[seat]
+            groups = play_groups(hand, state.trump_card)
+            moves = {}
+            for discard in combinations(cards_in(hand), NUM_DISCARDS):
+                moves.setdefault(canonical_kept(hand, discard, groups), discard)
+            root.children = {discard: Node(discard, seat) for discard in moves.values()}
+            self._discards = list(root.children.values())
+            self._means = [0.0] * len(self._discards)
+            self._spreads = [0.0] * len(self._discards)
+            self._discard_masks = [mask_of(child.move) for child in self._discards]
+            self._discard_bids = [bid_value_of_mask(mask) for mask in self._discard_masks]
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        count = 0
+        while iterations is None or count < iterations:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            self._iterate(root, state, info, seat, rng)
+            count += 1
+        self.last_iterations = count
+        return root
+
+    def _iterate(self, root, state, info, seat, rng):
+        random = rng.random
+        hands, _ = info.sample_deal(rng)
+        bids = list(state.bids)  # Announced bids are public; only later bidders' are sampled below
+        path = []
+        node = root
+        if state.phase == BIDDING:
+            chosen = self._select_discard(root)
+            node = self._discards[chosen]
+            path.append(node)
+            hands[seat] &= ~self._discard_masks[chosen]
+            bids[seat] = self._discard_bids[chosen]
+            for other in range(seat + 1, NUM_PLAYERS):
+                hand = hands[other]
+                discarded = 0
+                for _ in range(NUM_DISCARDS):
+                    discarded |= 1 << _random_card(hand & ~discarded, random)
+                hands[other] = hand & ~discarded
+                bids[other] = bid_value_of_mask(discarded)
+        leader = state.leader
+        trick = list(state.current_trick)
+        points = list(state.points_won)
+        trump_suit = state.trump_suit
+        exploration = self.exploration
+        # Walk the tree until a move is expanded, then play the round out at random
+        while hands[0] | hands[1] | hands[2]:
+            player = (leader + len(trick)) % NUM_PLAYERS
+            moves = legal_mask(hands[player], CARD_SUIT[trick[0]] if trick else NO_SUIT)
+            untried = moves & ~node.tried
+            if untried:
+                card = _random_card(untried, random)
+                child = Node(card, player)
+                node.children[card] = child
+                node.tried |= 1 << card
+            else:
+                children = node.children
+                best = -math.inf
+                for card in cards_in(moves):
+                    candidate = children[card]
+                    candidate.available += 1
+                    value = (candidate.reward / candidate.visits
+                             + exploration * math.sqrt(math.log(candidate.available) / candidate.visits))
+                    if value > best:
+                        best, child = value, candidate
+                card = child.move
+            path.append(child)
+            node = child
+            hands[player] ^= 1 << card
+            trick.append(card)
+            if len(trick) == NUM_PLAYERS:
+                leader = (leader + trick_winner(trick, trump_suit)) % NUM_PLAYERS
+                points[leader] += CARD_POINTS[trick[0]] + CARD_POINTS[trick[1]] + CARD_POINTS[trick[2]]
+                trick = []
+            if untried:
+                _playout(hands, leader, trick, points, trump_suit, random)
+                break
+        rewards = _rewards(bids, points)
+        for node in path:
+            node.visits += 1
+            node.reward += rewards[node.player]
+        if state.phase == BIDDING:
+            discard = path[0]
+            self._means[chosen] = discard.reward / discard.visits
+            self._spreads[chosen] = discard.visits ** -0.5
+
+    def _select_discard(self, root):
+        # Every discard is available in every deal, so this is plain UCB1. The
+        # per-discard means and 1/sqrt(visits) are kept in flat lists because
+        # the root can have 200+ children.
+        root.visits += 1
+        if root.visits <= len(self._discards):
+            return root.visits - 1
+        scale = self.exploration * math.sqrt(math.log(root.visits))
+        values = [mean + scale * spread for mean, spread in zip(self._means, self._spreads)]
+        return values.index(max(values))
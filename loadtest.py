@@ -0,0 +1,323 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+
+from bots import make_bot
+from engine import BIDDING, mask_of, trump_suit_of
+from protocol import encode
+from scoring import score_round
+from server import DEFAULT_TARGET, TURN_TIMEOUT, TableServer
+
+# A load test runs the table server in a child process and plays full games
+# against it with asyncio bot clients in this one. A move's latency is the
+# time from a client sending its bid or play to the server's broadcast of it
+# reaching that client, so it covers both directions and the server's queue.
+# The child measures its own CPU time and peak resident memory, and samples
+# how many tables it holds, so per-table costs leave out the clients' share
+# of a shared machine.
+LOAD_BOTS = ("random", "greedy")  # Bots that need only what a seat is told
+SAMPLE_SECONDS = 0.05  # How often the server process samples its table count
+
+
+class SeatView:
+    """The parts of a RoundState a bot reads, rebuilt from one seat's messages."""
+    __slots__ = ("phase", "hands", "current_player", "trump_card", "trump_suit", "current_trick", "legal")
+
+    def __init__(self):
+        self.phase = BIDDING
+        self.hands = [0]
+        self.current_player = 0
+        self.trump_card = None
+        self.trump_suit = None
+        self.current_trick = []
+        self.legal = []
+
+    def legal_actions(self):
+        return self.legal
+
+
+class LoadStats:
+    """Counts and move latencies gathered by every client of a load test."""
+    def __init__(self):
+        self.latencies = []  # Seconds per move
+        self.moves = 0
+        self.rounds = 0
+        self.tables = set()  # Ids of tables played to the end
+        self.server_errors = 0  # Error messages the server sent
+        self.timeouts = 0  # Moves the server played for a client that took too long
+        self.disconnects = 0  # Connections lost before the game ended
+        self.connect_failures = 0
+        self.unfinished = 0  # Clients still playing at the deadline
+        self.bad_scores = 0  # Scores messages whose round scores do not follow from their bids and points won
+
+    def errors(self):
+        return {"server_errors": self.server_errors, "timeouts": self.timeouts, "disconnects": self.disconnects,
+                "connect_failures": self.connect_failures, "unfinished": self.unfinished,
+                "bad_scores": self.bad_scores}
+
+
+async def play_client(host, port, bot, join, games, think, stats, rng):
+    """Connect one bot client and play games full games, one after the other."""
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+    except OSError:
+        stats.connect_failures += 1
+        return
+    try:
+        for _ in range(games):
+            writer.write(encode(join))
+            if not await _play_game(reader, writer, bot, think, stats, rng):
+                stats.disconnects += 1
+                return
+    finally:
+        writer.close()
+
+
+async def _play_game(reader, writer, bot, think, stats, rng):
+    view = SeatView()
+    seat = None
+    sent = None  # When this seat's last move was sent, until the server confirms it
+    while True:
+        try:
+            line = await reader.readline()
+        except ConnectionError:
+            return False
+        if not line:
+            return False
+        message = json.loads(line)
+        kind = message["type"]
+        if kind in ("bid", "play") and message["seat"] == seat:
+            if message["auto"]:
+                stats.timeouts += 1
+            elif sent is not None:
+                stats.latencies.append(time.perf_counter() - sent)
+            sent = None
+            stats.moves += 1
+        if kind == "play":
+            view.current_trick.append(message["card"])
+        elif kind == "turn" and "legal" in message:
+            view.phase = message["phase"]
+            view.legal = message["legal"]
+            view.hands[0] = mask_of(view.legal)
+            action = bot.act(view, rng)
+            if think:
+                await asyncio.sleep(rng.uniform(0, think))
+            if view.phase == BIDDING:
+                writer.write(encode({"type": "bid", "cards": list(action)}))
+            else:
+                writer.write(encode({"type": "play", "card": action}))
+            sent = time.perf_counter()
+        elif kind == "trick":
+            view.current_trick = []
+        elif kind == "round":
+            view.trump_card = message["trump"]
+            view.trump_suit = trump_suit_of(view.trump_card)
+            view.current_trick = []
+        elif kind == "joined":
+            seat = message["seat"]
+            table = message["table"]
+        elif kind == "scores":
+            if seat == 0:  # Every seat gets the same message; count and check it once per table
+                stats.rounds += 1
+                expected = [base + bonus for base, bonus, _ in score_round(message["bids"], message["points_won"])]
+                if expected != message["round_scores"]:
+                    stats.bad_scores += 1
+        elif kind == "game_over":
+            stats.tables.add(table)
+            return True
+        elif kind == "error":
+            stats.server_errors += 1
+
+
+def _peak_rss():
+    """Return this process's peak resident memory in bytes, or None where it cannot be read."""
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _serve(pipe, turn_timeout, snapshot_dir):
+    """Server process entry point: report the port, serve until told to stop, then report usage."""
+    asyncio.run(_serve_until_stopped(pipe, turn_timeout, snapshot_dir))
+
+
+async def _serve_until_stopped(pipe, turn_timeout, snapshot_dir):
+    server = TableServer(turn_timeout, snapshot_dir)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=1 << 16)
+    peak = {"tables": 0, "connections": 0}
+
+    async def sample():
+        while True:
+            peak["tables"] = max(peak["tables"], len(server.tables))
+            peak["connections"] = max(peak["connections"], server.connections)
+            await asyncio.sleep(SAMPLE_SECONDS)
+    sampler = asyncio.create_task(sample())
+    rss_baseline = _peak_rss()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    pipe.send(listener.sockets[0].getsockname()[1])
+    await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    sampler.cancel()
+    listener.close()
+    rss_peak = _peak_rss()
+    per_table = None
+    if rss_baseline is not None and peak["tables"]:
+        per_table = (rss_peak - rss_baseline) / peak["tables"]
+    pipe.send({"cpu_seconds": cpu, "cpu_utilization": cpu / wall if wall else 0.0,
+               "cpu_ms_per_table": 1000 * cpu / server.finished if server.finished else None,
+               "finished": server.finished, "errors": server.errors, "peak_tables": peak["tables"],
+               "peak_connections": peak["connections"], "rss_baseline_bytes": rss_baseline,
+               "rss_peak_bytes": rss_peak, "memory_per_table_bytes": per_table})
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def _run_clients(host, port, clients, bots, join, games, think, deadline, seed, stats, progress):
+    rng = random.Random(seed)
+    tasks = [asyncio.create_task(play_client(host, port, make_bot(bots[i % len(bots)]), join, games, think, stats,
+                                             random.Random(rng.getrandbits(64))))
+             for i in range(clients)]
+    start = time.perf_counter()
+    pending = set(tasks)
+    while pending:
+        _, pending = await asyncio.wait(pending, timeout=0.5)
+        elapsed = time.perf_counter() - start
+        if progress:
+            print(f"\r{len(stats.tables)} tables  {stats.moves} moves  {elapsed:.0f}s", end="", file=progress,
+                  flush=True)
+        if deadline and elapsed > deadline:
+            stats.unfinished += len(pending)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+    if progress:
+        print(file=progress)
+
+
+def run(clients=300, bots=("random",), target=DEFAULT_TARGET, rounds=None, games=1, think=0.0,
+        turn_timeout=TURN_TIMEOUT, deadline=None, address=None, seed=None, snapshot_dir=None, progress=sys.stderr):
+    """Play full games with bot clients against a server and return the JSON-ready report.
+
+    address is (host, port) of a running server to test; by default a
+    TableServer is started in a child process, which also reports its CPU
+    time and memory, and saves its tables to snapshot_dir if one is given.
+    """
+    join = {"type": "join", "name": "load", "rounds": rounds} if rounds else {"type": "join", "name": "load",
+                                                                             "target": target}
+    stats = LoadStats()
+    server = process = None
+    if address is None:
+        pipe, child_pipe = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve, args=(child_pipe, turn_timeout, snapshot_dir),
+                                          daemon=True)
+        process.start()
+        address = ("127.0.0.1", pipe.recv())
+    start = time.perf_counter()
+    try:
+        asyncio.run(_run_clients(*address, clients, bots, join, games, think, deadline, seed, stats, progress))
+    finally:
+        elapsed = time.perf_counter() - start
+        if process:
+            pipe.send("stop")
+            server = pipe.recv()
+            process.join()
+    ordered = sorted(stats.latencies)
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {"clients": clients, "bots": list(bots), "target": None if rounds else target, "rounds": rounds,
+                       "games_per_client": games, "think_seconds": think, "turn_timeout": turn_timeout,
+                       "snapshots": snapshot_dir is not None,
+                       "server": None if process else f"{address[0]}:{address[1]}"},
+            "elapsed_seconds": elapsed, "tables_completed": len(stats.tables),
+            "tables_per_second": len(stats.tables) / elapsed if elapsed else 0.0, "rounds": stats.rounds,
+            "moves": stats.moves, "moves_per_second": stats.moves / elapsed if elapsed else 0.0,
+            "latency_ms": {"samples": len(ordered), "p50": _ms(_percentile(ordered, 50)),
+                           "p95": _ms(_percentile(ordered, 95)), "p99": _ms(_percentile(ordered, 99)),
+                           "max": _ms(ordered[-1] if ordered else None)},
+            "errors": stats.errors(), "server": server}
+
+
+def _ms(seconds):
+    return None if seconds is None else 1000 * seconds
+
+
+def format_report(report):
+    latency = report["latency_ms"]
+    lines = [f"{report['tables_completed']} tables ({report['rounds']} rounds, {report['moves']} moves) "
+             f"in {report['elapsed_seconds']:.2f}s: {report['tables_per_second']:.1f} tables/s, "
+             f"{report['moves_per_second']:.0f} moves/s"]
+    if latency["samples"]:
+        lines.append(f"    move latency    p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  "
+                     f"p99 {latency['p99']:.2f} ms  max {latency['max']:.2f} ms")
+    server = report["server"]
+    if server:
+        lines.append(f"    server CPU      {server['cpu_seconds']:.2f}s ({server['cpu_utilization']:.0%} of a core)"
+                     + (f", {server['cpu_ms_per_table']:.1f} ms per table" if server["cpu_ms_per_table"] else ""))
+        if server["memory_per_table_bytes"] is not None:
+            lines.append(f"    server memory   peak {server['rss_peak_bytes'] / 2 ** 20:.1f} MB, "
+                         f"{server['memory_per_table_bytes'] / 1024:.1f} KB per table "
+                         f"at {server['peak_tables']} tables")
+    lines.append("    errors          " + ", ".join(f"{name.replace('_', ' ')} {count}"
+                                                    for name, count in report["errors"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the CounterPoint table server with bot clients.")
+    parser.add_argument("--clients", type=int, default=300, help="bot clients to connect at once (a multiple of 3)")
+    parser.add_argument("--bots", default="random", help=f"comma-separated bots the clients cycle through "
+                        f"({', '.join(LOAD_BOTS)})")
+    win = parser.add_mutually_exclusive_group()
+    win.add_argument("--target", type=int, default=DEFAULT_TARGET, help="target score of each game")
+    win.add_argument("--rounds", type=int, default=None, help="play this many rounds per game instead")
+    parser.add_argument("--games", type=int, default=1, help="games each client plays, one after the other")
+    parser.add_argument("--think", type=float, default=0.0, help="longest random pause before each move, in seconds")
+    parser.add_argument("--turn-timeout", type=float, default=TURN_TIMEOUT, help="turn timeout of the started server")
+    parser.add_argument("--deadline", type=float, default=None, help="stop clients still playing after this many seconds")
+    parser.add_argument("--server", default=None, metavar="HOST:PORT",
+                        help="test a running server instead of starting one (no server CPU or memory figures)")
+    parser.add_argument("--snapshots", default=None, metavar="DIR",
+                        help="have the started server snapshot its tables to DIR after every move")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    bots = args.bots.split(",")
+    for bot in bots:
+        if bot not in LOAD_BOTS:
+            parser.error(f"bot {bot!r} cannot play from a seat's messages; choose from {', '.join(LOAD_BOTS)}")
+    if args.clients <= 0 or args.clients % 3:
+        parser.error("--clients must be a positive multiple of 3, so that every table fills")
+    address = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        address = (host or "127.0.0.1", int(port))
+    report = run(args.clients, bots, args.target, args.rounds, args.games, args.think, args.turn_timeout,
+                 args.deadline, address, args.seed, args.snapshots)
+    print(format_report(report), file=sys.stderr)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(report["errors"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
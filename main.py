@@ -1,46 +1,8 @@
-import random
-
-class Card:
-    """Represents a single card in the deck."""
-    def __init__(self, suit: str, rank: str, point_value: int):
-        self.suit = suit
-        self.rank = rank
-        self.point_value = point_value
-
-    def __str__(self):
-        return f"{self.rank} of {self.suit}"
-
-
-class Deck:
-    """Represents a deck of cards, handles shuffling and dealing."""
-    SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
-    RANKS = ["Ace", "Ten", "King", "Queen", "Jack", "Nine", "Eight", "Seven", "Six"]
-    POINT_VALUES = {"Ace": 11, "Ten": 10, "King": 4, "Queen": 3, "Jack": 2,
-                    "Nine": 0, "Eight": 0, "Seven": 0, "Six": 0}
-    
-    def __init__(self):
-        self.cards = [Card(suit, rank, self.POINT_VALUES[rank]) for suit in self.SUITS for rank in self.RANKS]
-        self.cards.append(Card("Joker", "Joker", 0))  # Add the Joker card
-
-    def shuffle(self):
-        """Shuffle the deck."""
-        random.shuffle(self.cards)
-
-    def deal(self, num_players=3, cards_per_player=12):
-        """Deal cards to players."""
-        hands = {i: [] for i in range(num_players)}
-        for i in range(cards_per_player):
-            for player in range(num_players):
-                if self.cards:
-                    hands[player].append(self.cards.pop(0))
-        return hands
-
-    def reveal_trump(self):
-        """Reveal the last card as the trump suit."""
-        if self.cards:
-            trump_card = self.cards.pop(0)
-            return trump_card
-        return None
+import sys
+
+from engine import (CARDS_PER_PLAYER, NO_SUIT, NUM_DISCARDS, NUM_PLAYERS, SUITS, TRICK, RoundState, card_name,
+                    trick_winner)
+from records import RecordWriter, RoundRecord
 
 
 class Player:
@@ -53,14 +15,14 @@ class Player:
         self.round_score = 0  # Track score per round
 
     def receive_cards(self, cards):
-        """Assign dealt cards to the player."""
-        self.hand = cards
+        """Assign dealt card ids to the player."""
+        self.hand = list(cards)
 
     def display_hand(self):
         """Display player's hand in a structured format."""
         print(f"\n{self.name}'s Hand:")
         for i, card in enumerate(self.hand, 1):
-            print(f"{i}. {card}")
+            print(f"{i}. {card_name(card)}")
         print("=" * 25)
 
 
@@ -68,6 +30,10 @@ class Player:
 if __name__ == "__main__":
     print("Initializing CounterPoint Game...\n")
 
+    # "python main.py games.cpgr" appends every round played to a game-record file
+    recorder = RecordWriter(sys.argv[1]) if len(sys.argv) > 1 else None
+    record_game = recorder.new_game() if recorder else None
+
     # Display Legend
     print("**Card Point Values:**")
     print("Ace = 11 | Ten = 10 | King = 4 | Queen = 3 | Jack = 2 | Nine-Eight-Seven-Six = 0")
@@ -131,38 +97,33 @@ if __name__ == "__main__":
             
         print(f"\n=== Round {current_round} Begins! ===")
         
-        # Reset deck and hands for new round
-        deck = Deck()
-        deck.shuffle()
-        hands = deck.deal(num_players=len(players), cards_per_player=12)
-        for i, player in enumerate(players):
-            player.receive_cards(hands[i])
+        # Shuffle and deal a new round; players[seat] sits in each engine seat
+        state = RoundState()
+        for seat, player in enumerate(players):
+            player.receive_cards(state.deal[seat:NUM_PLAYERS * CARDS_PER_PLAYER:NUM_PLAYERS])
             player.display_hand()
         
         # Reveal new trump card
-        trump_card = deck.reveal_trump()
-        print(f"\nTrump Card: {trump_card if trump_card else 'No Trump (Joker or Nine)'}")
+        trump_text = card_name(state.trump_card) if state.trump_suit != NO_SUIT else 'No Trump (Joker or Nine)'
+        print(f"\nTrump Card: {trump_text}")
         print("\nSetup complete. Ready for bidding phase!")
 
         # Bidding Phase
         print("\nBidding Phase: Each player must discard 3 cards to set their bid.")
-        bids = {}
 
-        for player in players:
+        for seat, player in enumerate(players):
             print(f"\n{player.name}'s Turn to Bid:")
             player.display_hand()
 
             # Keep track of card positions with a dictionary mapping position to card
             card_positions = {i+1: card for i, card in enumerate(player.hand)}
             discarded_positions = []  # Track which positions have been discarded
-            discarded_cards = []
 
-            for i in range(3):
+            for i in range(NUM_DISCARDS):
                 while True:
                     try:
                         choice = int(input(f"Select a card to discard (1-12): "))
                         if choice in card_positions and choice not in discarded_positions:
-                            discarded_cards.append(card_positions[choice])
                             discarded_positions.append(choice)
                             break
                         elif choice in discarded_positions:
@@ -172,99 +133,72 @@ if __name__ == "__main__":
                     except ValueError:
                         print("Please enter a valid number.")
 
-            # Remove discarded cards from player's hand
-            player.hand = [card for position, card in card_positions.items() 
-                          if position not in discarded_positions]
-
-            # Calculate bid based on discarded cards' suits
-            bid_value = sum(10 if card.suit == "Spades" else 20 if card.suit == "Hearts"
-                            else 30 if card.suit == "Clubs" else 0 for card in discarded_cards)
-
-            bids[player.name] = bid_value
-            player.bid = bid_value
+            state.apply(tuple(card_positions[position] for position in discarded_positions))
+            player.hand = [card for card in player.hand if card in state.hands[seat]]
+            player.bid = state.bids[seat]
 
-            print(f"{player.name} bid {bid_value} points.")
+            print(f"{player.name} bid {player.bid} points.")
             print("=" * 25)
 
         # Trick-Taking Phase
         print("\nTrick-Taking Phase Begins!")
 
-        tricks_won = {player.name: 0 for player in players}
+        while state.phase == TRICK:
+            trick_number = state.trick_number
+            print(f"\n--- Trick {trick_number} ---")
 
-        for trick in range(9):  # 9 tricks per round
-            print(f"\n--- Trick {trick + 1} ---")
-            played_cards = []
-
-            # Each player plays a card
-            for i, player in enumerate(players):
+            # Each player plays a card, starting with the last trick's winner
+            while state.phase == TRICK and state.trick_number == trick_number:
+                player = players[state.current_player]
                 print(f"\n{player.name}'s Turn:")
                 player.display_hand()
-                
-                # Create a mapping of positions to cards for this trick
-                card_positions = {i+1: card for i, card in enumerate(player.hand)}
+                legal = state.legal_actions()
                 
                 while True:
                     try:
                         choice = int(input(f"Select a card to play (1-{len(player.hand)}): "))
-                        if 1 <= choice <= len(player.hand):
-                            played_card = card_positions[choice]
-                            player.hand.remove(played_card)  # Remove by card object, not by index
-                            played_cards.append((player, played_card))
-                            print(f"{player.name} played {played_card}")
-                            break
-                        else:
+                        if not 1 <= choice <= len(player.hand):
                             print(f"Invalid choice, select a valid card number (1-{len(player.hand)}).")
+                        elif player.hand[choice - 1] not in legal:
+                            print(f"You must follow suit ({SUITS[state.lead_suit]}).")
+                        else:
+                            break
                     except ValueError:
                         print("Please enter a valid number.")
+                played_card = player.hand.pop(choice - 1)
+                state.apply(played_card)
+                print(f"{player.name} played {card_name(played_card)}")
 
-            # Determine trick winner
-            lead_suit = played_cards[0][1].suit
-            highest_card = played_cards[0]
-            
-            for player, card in played_cards[1:]:
-                if card.suit == lead_suit and card.point_value > highest_card[1].point_value:
-                    highest_card = (player, card)
-                elif trump_card and card.suit == trump_card.suit and highest_card[1].suit != trump_card.suit:
-                    highest_card = (player, card)
-
-            winner = highest_card[0]
-            tricks_won[winner.name] += 1
-            print(f"\n{winner.name} wins Trick {trick + 1} with {highest_card[1]}!")
+            # The trick's winner leads the next one
+            trick = state.plays[-NUM_PLAYERS:]
+            winner = players[state.leader]
+            winning_card = trick[trick_winner(trick, state.trump_suit)]
+            print(f"\n{winner.name} wins Trick {trick_number} with {card_name(winning_card)}!")
 
         # Display results
         print("\n--- Trick-Taking Phase Complete! ---")
-        for player in players:
-            print(f"{player.name} won {tricks_won[player.name]} tricks.")
+        for seat, player in enumerate(players):
+            print(f"{player.name} won {state.tricks_won[seat]} tricks.")
 
         # Final Scoring Phase
         print("\n--- Final Scoring Phase ---")
-        differences = {}
-
-        # Calculate differences between bid and tricks won
-        for player in players:
-            bid = player.bid
-            tricks = tricks_won[player.name] * 10  # Each trick is worth 10 card-points
-            difference = abs(bid - tricks)
-            differences[player.name] = difference  # Store difference for scoring
-            print(f"{player.name} bid {bid}, won {tricks} card-points. Difference: {difference}")
+        differences = [difference for _, _, difference in state.results]
+        for seat, player in enumerate(players):
+            print(f"{player.name} bid {player.bid}, won {state.points_won[seat]} card-points. "
+                  f"Difference: {differences[seat]}")
 
         # Calculate final scores
-        for player in players:
+        for seat, (player, (base_score, bonus, difference)) in enumerate(zip(players, state.results)):
             print(f"\nCalculating score for {player.name}:")
-            opponent_diffs = [differences[opponent.name] for opponent in players if opponent != player]
-            base_score = sum(opponent_diffs)
+            opponent_diffs = [differences[other] for other in range(NUM_PLAYERS) if other != seat]
             print(f"Sum of opponents' differences: {' + '.join(map(str, opponent_diffs))} = {base_score}")
 
             # Apply bonuses
-            bonus = 0
-            if differences[player.name] == 0:
-                bonus = 30
+            if difference == 0:
                 print(f"Bonus: Exact bid made (+30)")
-            elif differences[player.name] <= 2:
-                bonus = 20
+            elif difference <= 2:
                 print(f"Bonus: Within 2 card-points (+20)")
-            elif differences[player.name] <= 5:
-                bonus = 10
+            elif difference <= 5:
                 print(f"Bonus: Within 5 card-points (+10)")
             
             round_score = base_score + bonus
@@ -272,6 +206,10 @@ if __name__ == "__main__":
             player.score += round_score
             print(f"Round score for {player.name}: {base_score} + {bonus} = {round_score}")
 
+        if recorder:
+            recorder.write(RoundRecord.from_state(state, record_game, current_round))
+            recorder.flush()
+
         # Round winner (based on round_score, not total score)
         round_winner = max(players, key=lambda p: p.round_score)
         print(f"\n🏆 Round winner: {round_winner.name} with {round_winner.round_score} points this round! 🏆")
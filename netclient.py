@@ -0,0 +1,276 @@
+import argparse
+import json
+import queue
+import socket
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+from cards import CARDS
+from engine import NUM_DISCARDS, NUM_PLAYERS, card_name
+from protocol import PORT
+
+POLL_MS = 50  # How often the Tk loop drains messages from the socket thread
+
+
+class OnlineTable:
+    """A Tk window playing one seat at a server.py table.
+
+    A background thread connects, then reads the server's JSON lines into a
+    queue that the Tk loop drains, so the window never blocks on the socket.
+    """
+    def __init__(self, root, host="127.0.0.1", port=PORT, name="Player", load_image=None, table=None):
+        self.root = root
+        self.load_image = load_image  # CounterPointGame.load_card_image, or None for text cards
+        self.images = {}  # Card id -> image, loaded once
+        self.messages = queue.Queue()
+        self.seat = None
+        self.names = [None] * NUM_PLAYERS
+        self.totals = [0] * NUM_PLAYERS
+        self.hand = []
+        self.legal = []
+        self.phase = None
+        self.selected = []
+        self.trick = []  # (seat, card id) played to the current trick
+        self.address = f"{host}:{port}"
+        self.sock = None  # Set by the socket thread once it has connected
+
+        self.window = tk.Toplevel(root, bg="#194c22")
+        self.window.title(f"CounterPoint - {host}:{port}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.status = tk.Label(self.window, text=f"Connecting to {self.address}...", font=("Arial", 16, "bold"),
+                               bg="#194c22", fg="white")
+        self.status.pack(pady=10)
+        self.scores = tk.Label(self.window, font=("Arial", 12), bg="#194c22", fg="white")
+        self.scores.pack()
+        self.trump = tk.Label(self.window, font=("Arial", 12), bg="#194c22", fg="white")
+        self.trump.pack(pady=5)
+        self.trick_frame = tk.Frame(self.window, bg="#2e6b3a", height=120)
+        self.trick_frame.pack(fill=tk.X, padx=20, pady=10)
+        self.hand_frame = tk.Frame(self.window, bg="#194c22")
+        self.hand_frame.pack(pady=10)
+        self.discard_button = tk.Button(self.window, text="Discard selected", font=("Arial", 12), bg="#f5e1bf",
+                                        state=tk.DISABLED, command=self.submit_discard)
+        self.discard_button.pack(pady=5)
+        self.log = tk.Listbox(self.window, width=80, height=8)
+        self.log.pack(padx=20, pady=10)
+
+        join = {"type": "join", "name": name}
+        if table:
+            join["table"] = table
+        threading.Thread(target=self._read, args=(host, port, join), daemon=True).start()
+        self.window.after(POLL_MS, self.poll)
+
+    def _read(self, host, port, join):
+        # Socket thread: connect and join, then hand every server message to the Tk loop
+        try:
+            sock = socket.create_connection((host, port), timeout=5)
+            sock.settimeout(None)
+        except OSError as error:
+            self.messages.put({"type": "unreachable", "message": str(error)})
+            return
+        self.sock = sock
+        try:
+            sock.sendall((json.dumps(join) + "\n").encode())
+            for line in sock.makefile("r", encoding="utf-8"):
+                self.messages.put(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        self.messages.put(None)
+
+    def send(self, message):
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendall((json.dumps(message) + "\n").encode())
+        except OSError:
+            self.note("Connection lost.")
+
+    def close(self):
+        self.send({"type": "leave"})
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.window.destroy()
+
+    def poll(self):
+        try:
+            while True:
+                message = self.messages.get_nowait()
+                if message is None:
+                    self.status.config(text="Disconnected from the server")
+                    return
+                handler = getattr(self, "on_" + message["type"], None)
+                if handler:
+                    handler(message)
+        except queue.Empty:
+            pass
+        self.window.after(POLL_MS, self.poll)
+
+    def name_of(self, seat):
+        if seat == self.seat:
+            return "You"
+        return self.names[seat] or f"Seat {seat + 1} (auto)"
+
+    def note(self, text):
+        self.log.insert(tk.END, text)
+        self.log.see(tk.END)
+
+    def on_unreachable(self, message):
+        self.status.config(text="Could not connect to the server")
+        self.note(f"Could not connect to {self.address}: {message['message']}")
+        messagebox.showerror("Join Online Table", f"Could not connect to {self.address}: {message['message']}",
+                             parent=self.window)
+
+    def on_joined(self, message):
+        self.seat = message["seat"]
+        self.names = message["names"]
+        self.status.config(text=f"Table {message['table']}: waiting for players")
+        self.note(f"Joined table {message['table']} in seat {self.seat + 1}.")
+
+    def on_seat(self, message):
+        self.names[message["seat"]] = message["name"]
+        self.note(f"{message['name']} sat in seat {message['seat'] + 1}." if message["name"]
+                  else f"Seat {message['seat'] + 1} is empty and now plays automatically.")
+        self.show_scores()
+
+    def on_round(self, message):
+        self.trick = []
+        self.trump.config(text=f"Round {message['round']} - trump card {card_name(message['trump'])}")
+        self.note(f"Round {message['round']} - first to bid: {self.name_of(message['dealer'])}")
+        self.show_trick()
+
+    def on_hand(self, message):
+        self.hand = message["cards"]
+        self.legal = []
+        self.show_hand()
+
+    def on_sync(self, message):
+        self.names = message["names"]
+        self.totals = message["totals"]
+        self.hand = message["hand"]
+        self.trick = [tuple(play) for play in message["trick"]]
+        self.trump.config(text=f"Round {message['round']} - trump card {card_name(message['trump'])}")
+        self.show_scores()
+        self.show_hand()
+        self.show_trick()
+
+    def on_turn(self, message):
+        self.phase = message["phase"]
+        self.legal = message.get("legal", [])
+        self.selected = []
+        if message["seat"] == self.seat:
+            action = "discard 3 cards" if self.phase == "bidding" else "play a card"
+            self.status.config(text=f"Your turn: {action} ({message['timeout']:.0f}s)")
+        else:
+            self.status.config(text=f"{self.name_of(message['seat'])} to {'bid' if self.phase == 'bidding' else 'play'}")
+        self.show_hand()
+
+    def on_bid(self, message):
+        auto = " (timed out)" if message.get("auto") else ""
+        self.note(f"{self.name_of(message['seat'])} bid {message['bid']}{auto}.")
+        if message["seat"] == self.seat and "cards" in message:
+            self.hand = [card for card in self.hand if card not in message["cards"]]
+        self.legal = []
+        self.show_hand()
+
+    def on_play(self, message):
+        self.trick.append((message["seat"], message["card"]))
+        if message["seat"] == self.seat:
+            self.hand.remove(message["card"])
+        self.legal = []
+        self.show_hand()
+        self.show_trick()
+
+    def on_trick(self, message):
+        self.note(f"{self.name_of(message['winner'])} won the trick ({message['points']} points).")
+        self.trick = []
+        self.window.after(1000, self.show_trick)
+
+    def on_scores(self, message):
+        self.totals = message["totals"]
+        for seat in range(NUM_PLAYERS):
+            self.note(f"{self.name_of(seat)}: bid {message['bids'][seat]}, won {message['points_won'][seat]}, "
+                      f"round score {message['round_scores'][seat]}")
+        self.show_scores()
+
+    def on_game_over(self, message):
+        self.totals = message["totals"]
+        self.show_scores()
+        winners = " and ".join(self.name_of(seat) for seat in message["winners"])
+        self.status.config(text=f"Game over: {winners} won")
+        messagebox.showinfo("Game Over", f"{winners} won with {max(message['totals'])} points.", parent=self.window)
+
+    def on_error(self, message):
+        self.note(f"Server: {message['message']}")
+
+    def show_scores(self):
+        self.scores.config(text="   ".join(f"{self.name_of(seat)}: {self.totals[seat]}" for seat in range(NUM_PLAYERS)))
+
+    def card_widget(self, parent, card, **options):
+        if self.load_image and card not in self.images:
+            self.images[card] = self.load_image(CARDS[card].rank, CARDS[card].suit if CARDS[card].suit != "Joker"
+                                                else None)
+        image = self.images.get(card)
+        if image:
+            return tk.Button(parent, image=image, **options)
+        return tk.Button(parent, text=card_name(card), width=10, height=5, wraplength=70, **options)
+
+    def show_hand(self):
+        for widget in self.hand_frame.winfo_children():
+            widget.destroy()
+        for card in sorted(self.hand):
+            playable = card in self.legal
+            button = self.card_widget(self.hand_frame, card, state=tk.NORMAL if playable else tk.DISABLED,
+                                      relief=tk.SUNKEN if card in self.selected else tk.RAISED,
+                                      command=lambda card=card: self.choose(card))
+            button.pack(side=tk.LEFT, padx=2)
+        bidding = self.phase == "bidding" and bool(self.legal)
+        self.discard_button.config(state=tk.NORMAL if bidding and len(self.selected) == NUM_DISCARDS else tk.DISABLED)
+
+    def show_trick(self):
+        for widget in self.trick_frame.winfo_children():
+            widget.destroy()
+        for seat, card in self.trick:
+            slot = tk.Frame(self.trick_frame, bg="#2e6b3a")
+            slot.pack(side=tk.LEFT, padx=10, pady=5)
+            tk.Label(slot, text=self.name_of(seat), bg="#2e6b3a", fg="white").pack()
+            self.card_widget(slot, card, state=tk.DISABLED).pack()
+
+    def choose(self, card):
+        if self.phase == "bidding":
+            if card in self.selected:
+                self.selected.remove(card)
+            elif len(self.selected) < NUM_DISCARDS:
+                self.selected.append(card)
+            self.show_hand()
+        else:
+            self.legal = []
+            self.send({"type": "play", "card": card})
+            self.show_hand()
+
+    def submit_discard(self):
+        self.send({"type": "bid", "cards": self.selected})
+        self.selected = []
+        self.legal = []
+        self.show_hand()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play one seat at a CounterPoint table server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--name", default="Player")
+    parser.add_argument("--table", default=None, help="table to join (default: the next open one)")
+    args = parser.parse_args(argv)
+    root = tk.Tk()
+    root.withdraw()
+    table = OnlineTable(root, args.host, args.port, args.name, table=args.table)
+    table.window.bind("<Destroy>", lambda event: root.destroy() if event.widget is table.window else None)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
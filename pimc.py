@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bots import GreedyBot
+from engine import NUM_PLAYERS, TRICK
+from information import InformationSet
+from solver import DoubleDummySolver, SearchTimeout
+from tablebase import open_tablebase
+
+
+def solve_sample(hands, leader, trick, trump_suit, deadline, tablebase=None, horizon=0):
+    """Worker entry point: move values for one sampled deal, or None if the time.monotonic() deadline passed."""
+    solver = DoubleDummySolver(trump_suit, deadline=deadline,
+                               tablebase=open_tablebase(tablebase) if tablebase else None, horizon=horizon)
+    try:
+        return solver.move_values(hands, leader, trick)
+    except SearchTimeout:
+        return None
+
+
+class PIMCBot:
+    """Perfect-information Monte Carlo player for the trick phase.
+
+    Each move samples deals consistent with what the seat can see, solves
+    every sample with the double-dummy solver and plays the card with the
+    highest average guaranteed points. Samples are solved in a process pool
+    when workers > 0. No move takes longer than time_budget seconds.
+
+    Exact solves of a whole hand take seconds, so the samples are solved
+    one trick deep, then two, and so on (solver horizons) until the hand is
+    searched to the end or the deadline passes; the deepest pass that solved
+    every sample decides. Only if not even the first pass finished a sample
+    does the bot fall back to GreedyBot's play. Bids are made by GreedyBot.
+    tablebase is the path of an endgame tablebase file for the solver to use.
+    """
+    def __init__(self, samples=20, time_budget=1.0, workers=0, tablebase=None):
+        self.samples = samples
+        self.time_budget = time_budget
+        self.workers = workers
+        self.tablebase = tablebase
+        self.fallback = GreedyBot()
+        self._executor = None
+        self.last_samples_solved = 0
+        self.last_depth = 0  # Tricks searched by the pass that decided the last move
+
+    def act(self, state, rng):
+        if state.phase != TRICK:
+            return self.fallback.act(state, rng)
+        legal = state.legal_actions()
+        if len(legal) == 1:
+            return legal[0]
+        deadline = time.monotonic() + self.time_budget
+        info = InformationSet(state, state.current_player)
+        deals = [info.sample(rng) for _ in range(self.samples)]
+        tricks_left = info.hand_sizes[state.current_player]  # The current trick included
+        results = []
+        self.last_depth = 0
+        for depth in range(1, tricks_left + 1):
+            horizon = NUM_PLAYERS * (tricks_left - depth)
+            if self.workers:
+                solved = self._solve_in_pool(deals, state, deadline, horizon)
+            else:
+                solved = self._solve_here(deals, state, deadline, horizon)
+            if len(solved) < len(deals) and results:
+                break  # A partial deeper pass would weigh some samples more deeply than others
+            results = solved
+            self.last_depth = depth
+            if len(solved) < len(deals):
+                break
+        self.last_samples_solved = len(results)
+        if not results:
+            return self.fallback.choose_play(state)
+        totals = dict.fromkeys(legal, 0)
+        for values in results:
+            for card, value in values.items():
+                totals[card] += value
+        return max(legal, key=lambda card: totals[card])
+
+    def _solve_here(self, deals, state, deadline, horizon):
+        results = []
+        for hands in deals:
+            if time.monotonic() >= deadline:
+                break
+            values = solve_sample(hands, state.leader, state.current_trick, state.trump_suit, deadline,
+                                  self.tablebase, horizon)
+            if values is not None:
+                results.append(values)
+        return results
+
+    def _solve_in_pool(self, deals, state, deadline, horizon):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        # Workers get the move's absolute deadline, so a sample that starts late still stops with the move
+        pending = {self._executor.submit(solve_sample, hands, state.leader, list(state.current_trick),
+                                         state.trump_suit, deadline, self.tablebase, horizon) for hands in deals}
+        results = []
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            results.extend(future.result() for future in done if future.result() is not None)
+        for future in pending:
+            future.cancel()  # Started samples raise SearchTimeout at the same deadline
+        return results
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,148 @@
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from batch import highest_play, random_play, simulate
+from engine import NUM_PLAYERS
+
+PLAY_POLICIES = {"random": random_play, "highest": highest_play}
+BLOCK_ROUNDS = 8  # Rounds simulated per game at a time until every target is reached
+SEAT_OF = np.array([[(player - rnd) % NUM_PLAYERS for player in range(NUM_PLAYERS)]
+                    for rnd in range(NUM_PLAYERS)])  # SEAT_OF[round % 3][player], with the dealer rotating
+
+
+class ConditionStats:
+    """Outcomes of every game played under one win condition, mergeable across workers."""
+    def __init__(self, label):
+        self.label = label
+        self.rounds = []  # Arrays of rounds played, margins and draw flags, one per chunk of games
+        self.margins = []
+        self.draws = []
+
+    def add(self, rounds, finals):
+        """Record games that ended after rounds with the (games, 3) final scores."""
+        ranked = np.sort(finals, axis=1)
+        self.rounds.append(np.asarray(rounds))
+        self.margins.append(ranked[:, -1] - ranked[:, -2])
+        self.draws.append(ranked[:, -1] == ranked[:, -2])
+
+    def merge(self, other):
+        self.rounds += other.rounds
+        self.margins += other.margins
+        self.draws += other.draws
+
+    def report(self):
+        rounds = np.concatenate(self.rounds)
+        margins = np.concatenate(self.margins)
+        draws = np.concatenate(self.draws)
+        low, median, high = np.percentile(rounds, [10, 50, 90])
+        lines = [f"{self.label}: {len(rounds)} games, {100 * draws.mean():.2f}% draws",
+                 f"    rounds   mean {rounds.mean():6.2f}  p10 {low:4.0f}  p50 {median:4.0f}  p90 {high:4.0f}  "
+                 f"max {rounds.max():4d}"]
+        low, median, high = np.percentile(margins, [10, 50, 90])
+        lines.append(f"    margin   mean {margins.mean():6.2f}  p10 {low:4.0f}  p50 {median:4.0f}  p90 {high:4.0f}  "
+                     f"max {margins.max():4d}")
+        if rounds.min() != rounds.max():
+            counts = np.bincount(rounds)
+            shares = [f"{count}: {100 * counts[count] / len(rounds):.1f}%" for count in np.flatnonzero(counts)
+                      if counts[count] / len(rounds) >= 0.005]
+            lines.append(f"    rounds played  {', '.join(shares)}")
+        return "\n".join(lines)
+
+
+def game_scores(games, targets, max_rounds, play_policy, rng):
+    """Return (games, rounds, 3) running player scores, long enough for every target and round count.
+
+    Rounds are dealt, bid and played in batches (see batch.simulate). Player
+    p sits in seat (p - round) % 3, as CounterPointGame rotates the dealer
+    after every round, and every game runs until each target is reached.
+    """
+    blocks = []
+    totals = np.zeros((games, NUM_PLAYERS), dtype=np.int32)
+    played = 0
+    while played < max_rounds or totals.max(axis=1).min() < max(targets, default=0):
+        seat_scores = simulate(games * BLOCK_ROUNDS, play_policy, seed=rng).round_scores
+        seat_scores = seat_scores.reshape(games, BLOCK_ROUNDS, NUM_PLAYERS)
+        seats = SEAT_OF[(played + np.arange(BLOCK_ROUNDS)) % NUM_PLAYERS]
+        scores = totals[:, None] + np.take_along_axis(seat_scores, seats[None], axis=2).cumsum(axis=1)
+        blocks.append(scores)
+        totals = scores[:, -1]
+        played += BLOCK_ROUNDS
+    return np.concatenate(blocks, axis=1)
+
+
+def play_chunk(job):
+    """Worker entry point: simulate one chunk of games and return (games, stats per win condition)."""
+    chunk, games, seed, targets, round_counts, policy = job
+    rng = np.random.default_rng([seed, chunk])
+    scores = game_scores(games, targets, max(round_counts, default=0), PLAY_POLICIES[policy], rng)
+    stats = {}
+    rows = np.arange(games)
+    for target in targets:
+        # check_game_over ends a target game after the first round anyone reaches the target
+        ended = (scores.max(axis=2) >= target).argmax(axis=1)
+        stats[target] = ConditionStats(f"Target score {target}")
+        stats[target].add(ended + 1, scores[rows, ended])
+    for count in round_counts:
+        stats[-count] = ConditionStats(f"{count} rounds")
+        stats[-count].add(np.full(games, count), scores[:, count - 1])
+    return games, stats
+
+
+def run_plan(games, targets=(), round_counts=(), workers=None, chunk_size=2000, seed=0, policy="random",
+             progress=sys.stderr):
+    """Simulate whole games once and measure them under every win condition; return ConditionStats by condition.
+
+    Keys are the target scores, and minus the round count for set-rounds games.
+    """
+    for count in round_counts:
+        if not (count == 1 or (count > 0 and count % NUM_PLAYERS == 0)):
+            raise ValueError("Number of rounds must be 1 or a positive number divisible by 3.")
+    if not targets and not round_counts:
+        raise ValueError("Give at least one target score or round count.")
+    jobs = [(chunk, min(chunk_size, games - start), seed, list(targets), list(round_counts), policy)
+            for chunk, start in enumerate(range(0, games, chunk_size))]
+    stats = {}
+    done = 0
+    start_time = time.perf_counter()
+    with Pool(workers or os.cpu_count() or 1) as pool:
+        for chunk_games, partial in pool.imap_unordered(play_chunk, jobs):
+            for key, condition in partial.items():
+                if key in stats:
+                    stats[key].merge(condition)
+                else:
+                    stats[key] = condition
+            done += chunk_games
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{done}/{games} games  {elapsed:.0f}s", end="", file=progress, flush=True)
+    if progress:
+        print(file=progress)
+    return {key: stats[key] for key in sorted(stats, key=lambda key: (key < 0, abs(key)))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate CounterPoint game lengths, margins and draw rates.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--targets", type=int, nargs="*", default=[250, 500, 750, 1000],
+                        help="target scores to measure")
+    parser.add_argument("--rounds", type=int, nargs="*", default=[1, 3, 6, 9, 12],
+                        help="set round counts to measure (1 or multiples of 3)")
+    parser.add_argument("--play", choices=sorted(PLAY_POLICIES), default="random", help="batched play policy")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="games per work unit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stats = run_plan(args.games, args.targets, args.rounds, workers=args.workers, chunk_size=args.chunk_size,
+                     seed=args.seed, policy=args.play)
+    for condition in stats.values():
+        print(condition.report())
+
+
+if __name__ == "__main__":
+    main()
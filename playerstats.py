@@ -0,0 +1,82 @@
+from collections import deque
+
+from scoring import BONUS_TIERS
+
+RECENT_ROUNDS = 12  # Rounds kept in detail for the score breakdown
+
+
+class RoundDetail:
+    """One player's result in one round."""
+    __slots__ = ("round", "bid", "points_won", "difference", "bonus", "round_score")
+
+    def __init__(self, round, bid, points_won, difference, bonus, round_score):
+        self.round = round
+        self.bid = bid
+        self.points_won = points_won
+        self.difference = difference
+        self.bonus = bonus
+        self.round_score = round_score
+
+
+class PlayerStats:
+    """A player's results over a session, updated in constant time and memory per round.
+
+    Totals, the mean and variance of the bid error (Welford's method), the
+    rounds per bonus tier, the best and worst rounds and bonus streaks are
+    kept as running values; only the last `recent` rounds are kept in detail.
+    """
+    def __init__(self, recent=RECENT_ROUNDS):
+        self.rounds = 0
+        self.total_tricks_won = 0
+        self.total_points_won = 0
+        self.total_cards_won = 0
+        self.total_bonus = 0
+        self.error_mean = 0.0  # Mean |bid - points won|
+        self._error_m2 = 0.0  # Sum of squared deviations from error_mean
+        self.bonus_tiers = [0] * (len(BONUS_TIERS) + 1)  # Rounds in each tier of BONUS_TIERS, then with no bonus
+        self.best_round = None  # RoundDetails with the highest and lowest round scores
+        self.worst_round = None
+        self.bonus_streak = 0  # Rounds in a row ending with this one that earned a bonus
+        self.longest_bonus_streak = 0
+        self.recent = deque(maxlen=recent)
+
+    def add_round(self, round, bid, points_won, difference, bonus, round_score, tricks_won=0, cards_won=0):
+        detail = RoundDetail(round, bid, points_won, difference, bonus, round_score)
+        self.rounds += 1
+        self.total_tricks_won += tricks_won
+        self.total_points_won += points_won
+        self.total_cards_won += cards_won
+        self.total_bonus += bonus
+        delta = difference - self.error_mean
+        self.error_mean += delta / self.rounds
+        self._error_m2 += delta * (difference - self.error_mean)
+        self.bonus_tiers[next((tier for tier, (limit, _) in enumerate(BONUS_TIERS) if difference <= limit),
+                              len(BONUS_TIERS))] += 1
+        if self.best_round is None or round_score > self.best_round.round_score:
+            self.best_round = detail
+        if self.worst_round is None or round_score < self.worst_round.round_score:
+            self.worst_round = detail
+        self.bonus_streak = self.bonus_streak + 1 if bonus else 0
+        self.longest_bonus_streak = max(self.longest_bonus_streak, self.bonus_streak)
+        self.recent.append(detail)
+
+    @property
+    def error_variance(self):
+        """Sample variance of the bid error, 0.0 before the second round."""
+        return self._error_m2 / (self.rounds - 1) if self.rounds > 1 else 0.0
+
+    @property
+    def error_std(self):
+        return self.error_variance ** 0.5
+
+    @property
+    def bonus_rate(self):
+        """Share of rounds that earned a bonus."""
+        return 1 - self.bonus_tiers[-1] / self.rounds if self.rounds else 0.0
+
+    def recent_summary(self, describe):
+        """Join describe(detail) over the recent rounds, marking rounds no longer kept."""
+        if not self.recent:
+            return "None"
+        summary = "; ".join(f"R{detail.round}: {describe(detail)}" for detail in self.recent)
+        return summary if self.rounds == len(self.recent) else "...; " + summary
@@ -0,0 +1,25 @@
+import json
+
+# Protocol: newline-delimited JSON objects over TCP, one message per line.
+#
+# Client to server:
+#   {"type": "join", "name": str, "table": str (optional, an open table's id), "seat": 0-2 (optional),
+#    "target": int or "rounds": int (optional, for a new table; default target 500)}
+#   {"type": "bid", "cards": [3 card ids]}
+#   {"type": "play", "card": card id}
+#   {"type": "leave"}
+#
+# Server to client (seat is always the player's chair at the table, 0-2; the
+# engine's seats rotate under the chairs as the dealer moves each round):
+#   joined    table, seat, names, target or rounds     seat   seat, name (None when it empties)
+#   round     round, trump, dealer                      hand   cards (to the seat only)
+#   turn      seat, phase, timeout, legal (to the seat to act only)
+#   bid       seat, bid, cards (to the bidder only)     play   seat, card, auto
+#   trick     winner, cards, points                     scores round, bids, points_won, round_scores, totals
+#   game_over totals, winners                           sync   the state of a table joined mid-game
+#   error     message
+PORT = 7337
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
@@ -0,0 +1,308 @@
+import argparse
+import lzma
+import math
+import os
+import random
+import struct
+import sys
+import zlib
+from itertools import combinations
+
+from engine import (CARDS_PER_PLAYER, DECK_SIZE, NUM_DISCARDS, NUM_PLAYERS, NUM_TRICKS, RoundState, card_name, cards_in,
+                    play_random_round)
+
+# A game-record file is a header followed by blocks of fixed-size round
+# records. Files are only ever appended to, a block at a time.
+#
+#   header  magic b"CPGR", version u16, record size u16
+#   block   compression u8, payload bytes u32, records u32, then the payload:
+#           the block's packed records, compressed as the block says
+#   record  game u32, round u16, rules u8,
+#           deal 18 bytes: rank of the 37-card dealing order among all orders,
+#           discards 3 bytes: per seat, the index of its 3 discards among the
+#               220 combinations of its 12 dealt cards in card-id order,
+#           plays 27 bytes: card ids in the order played,
+#           scores 3 x i16: each seat's round score as the front-end scored it
+#
+# Seat s holds deal[s:36:3] and the trump card is deal[36], as Deck.deal and
+# RoundState deal them. The front-ends rotate the dealer after every round,
+# so in round r seat s is the game's player (s + r - 1) % 3.
+MAGIC = b"CPGR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+BLOCK = struct.Struct("<BII")
+DEAL_BYTES = (math.factorial(DECK_SIZE).bit_length() + 7) // 8
+RECORD = struct.Struct(f"<IHB{DEAL_BYTES}s{NUM_PLAYERS}s{NUM_PLAYERS * NUM_TRICKS}s{NUM_PLAYERS}h")
+BLOCK_RECORDS = 4096  # Records buffered before a block is written
+
+NONE, ZLIB, LZMA = 0, 1, 2
+COMPRESSIONS = {"none": NONE, "zlib": ZLIB, "lzma": LZMA}
+_COMPRESS = {NONE: bytes, ZLIB: zlib.compress, LZMA: lzma.compress}
+_DECOMPRESS = {NONE: bytes, ZLIB: zlib.decompress, LZMA: lzma.decompress}
+
+# Rule sets a round was played and scored under
+RULES_TABLE = 0  # engine.RoundState, main.py and gui.py: follow suit, trick winner leads, trick_winner decides
+RULES_CONSOLE = 1  # Older main.py files: seats play in order every trick, highest point value of the lead suit wins
+RULES = {"table": RULES_TABLE, "console": RULES_CONSOLE}
+
+DISCARD_COMBINATIONS = list(combinations(range(CARDS_PER_PLAYER), NUM_DISCARDS))
+_DISCARD_INDEX = {positions: index for index, positions in enumerate(DISCARD_COMBINATIONS)}
+_DEALT = NUM_PLAYERS * CARDS_PER_PLAYER
+
+
+def pack_deal(deal):
+    """Return the DEAL_BYTES rank of a dealing order among all orderings of the deck."""
+    remaining = list(range(DECK_SIZE))
+    rank = 0
+    for card in deal:
+        index = remaining.index(card)
+        rank = rank * len(remaining) + index
+        del remaining[index]
+    return rank.to_bytes(DEAL_BYTES, "little")
+
+
+def unpack_deal(data):
+    """Return the dealing order packed by pack_deal."""
+    rank = int.from_bytes(data, "little")
+    indices = []
+    for radix in range(1, DECK_SIZE + 1):
+        rank, index = divmod(rank, radix)
+        indices.append(index)
+    remaining = list(range(DECK_SIZE))
+    return [remaining.pop(index) for index in reversed(indices)]
+
+
+class RoundRecord:
+    """One recorded round: the deal, each seat's discards, the plays in order and the stored scores.
+
+    discards holds a tuple of 3 card ids per seat and scores each seat's
+    round score, both in seat order; rules is RULES_TABLE or RULES_CONSOLE.
+    """
+    __slots__ = ("game", "round", "rules", "deal", "discards", "plays", "scores")
+
+    def __init__(self, game, round, rules, deal, discards, plays, scores):
+        self.game = game
+        self.round = round
+        self.rules = rules
+        self.deal = deal
+        self.discards = discards
+        self.plays = plays
+        self.scores = scores
+
+    @classmethod
+    def from_state(cls, state, game=0, round=1):
+        """Record a scored engine.RoundState."""
+        return cls(game, round, RULES_TABLE, list(state.deal), [tuple(cards_in(mask)) for mask in state.discards],
+                   list(state.plays), state.round_scores())
+
+    def hand(self, seat):
+        """Return the 12 card ids dealt to a seat, in card-id order."""
+        return sorted(self.deal[seat:_DEALT:NUM_PLAYERS])
+
+    @property
+    def trump_card(self):
+        return self.deal[_DEALT]
+
+    def to_state(self):
+        """Replay the round through engine.RoundState (table rules only) and return the final state."""
+        if self.rules != RULES_TABLE:
+            raise ValueError("Only rounds played under the table rules replay through RoundState.")
+        state = RoundState(deal=list(self.deal))
+        for discard in self.discards:
+            state.apply(discard)
+        for card in self.plays:
+            state.apply(card)
+        return state
+
+    def pack(self):
+        discards = bytes(_DISCARD_INDEX[tuple(sorted(self.hand(seat).index(card) for card in discard))]
+                         for seat, discard in enumerate(self.discards))
+        return RECORD.pack(self.game, self.round, self.rules, pack_deal(self.deal), discards, bytes(self.plays),
+                           *self.scores)
+
+    @classmethod
+    def unpack(cls, data, offset=0):
+        game, round, rules, deal, discards, plays, *scores = RECORD.unpack_from(data, offset)
+        deal = unpack_deal(deal)
+        hands = [sorted(deal[seat:_DEALT:NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+        discards = [tuple(hand[position] for position in DISCARD_COMBINATIONS[index])
+                    for hand, index in zip(hands, discards)]
+        return cls(game, round, rules, deal, discards, list(plays), scores)
+
+    def __eq__(self, other):
+        return isinstance(other, RoundRecord) and all(getattr(self, name) == getattr(other, name)
+                                                      for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"RoundRecord(game={self.game}, round={self.round}, rules={self.rules}, "
+                f"discards={self.discards}, scores={self.scores})")
+
+
+def _read_header(f, path):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a CounterPoint game-record file.")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} CounterPoint game-record file.")
+
+
+def read_blocks(path):
+    """Yield (records, payload) for each block of a file, decompressed, reading one block at a time."""
+    with open(path, "rb") as f:
+        _read_header(f, path)
+        while True:
+            header = f.read(BLOCK.size)
+            if not header:
+                return
+            if len(header) < BLOCK.size:
+                raise ValueError(f"{path} ends in a truncated block.")
+            compression, length, count = BLOCK.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                raise ValueError(f"{path} ends in a truncated block.")
+            payload = _DECOMPRESS[compression](payload)
+            if len(payload) != count * RECORD.size:
+                raise ValueError(f"{path} has a corrupt block.")
+            yield count, payload
+
+
+def read_records(path):
+    """Yield every RoundRecord in a file, in the order written, one block in memory at a time."""
+    for count, payload in read_blocks(path):
+        for offset in range(0, count * RECORD.size, RECORD.size):
+            yield RoundRecord.unpack(payload, offset)
+
+
+class RecordWriter:
+    """Streaming appender of RoundRecords to a game-record file.
+
+    Records are buffered and written a block of block_records at a time,
+    compressed with "none", "zlib" or "lzma"; flush() writes a partial
+    block at once. An existing file is appended to, and next_game carries
+    on after the last game number it holds.
+    """
+    def __init__(self, path, compression="zlib", block_records=BLOCK_RECORDS):
+        self.path = path
+        self.compression = COMPRESSIONS[compression]
+        self.block_records = block_records
+        self.written = 0
+        self._buffer = []
+        self.next_game = _last_game(path) + 1 if os.path.exists(path) and os.path.getsize(path) else 0
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def new_game(self):
+        """Return a game number not yet used in the file."""
+        game = self.next_game
+        self.next_game += 1
+        return game
+
+    def write(self, record):
+        self._buffer.append(record.pack())
+        self.next_game = max(self.next_game, record.game + 1)
+        if len(self._buffer) >= self.block_records:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records as one block."""
+        if self._buffer:
+            payload = _COMPRESS[self.compression](b"".join(self._buffer))
+            self._file.write(BLOCK.pack(self.compression, len(payload), len(self._buffer)))
+            self._file.write(payload)
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _last_game(path):
+    # Seek from block header to block header and unpack only the last block's last record
+    with open(path, "rb") as f:
+        _read_header(f, path)
+        last = None
+        while True:
+            header = f.read(BLOCK.size)
+            if not header:
+                break
+            if len(header) < BLOCK.size:
+                raise ValueError(f"{path} ends in a truncated block.")
+            compression, length, count = BLOCK.unpack(header)
+            last = (compression, f.tell(), length)
+            f.seek(length, os.SEEK_CUR)
+        if last is None:
+            return -1
+        compression, offset, length = last
+        f.seek(offset)
+        payload = _DECOMPRESS[compression](f.read(length))
+    return RECORD.unpack_from(payload, len(payload) - RECORD.size)[0]
+
+
+def record_simulated(path, rounds, rounds_per_game=NUM_PLAYERS, compression="zlib", seed=None, progress=sys.stderr):
+    """Append rounds of uniformly random play to a file, as games of rounds_per_game rounds."""
+    rng = random.Random(seed)
+    with RecordWriter(path, compression) as writer:
+        game = writer.new_game()
+        for number in range(rounds):
+            if number and number % rounds_per_game == 0:
+                game = writer.new_game()
+            state = play_random_round(rng)
+            writer.write(RoundRecord.from_state(state, game, number % rounds_per_game + 1))
+            if progress and (number + 1) % 10000 == 0:
+                print(f"\r{number + 1}/{rounds} rounds", end="", file=progress, flush=True)
+    if progress:
+        print(f"\r{rounds}/{rounds} rounds", file=progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write and inspect CounterPoint game-record files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    simulate = commands.add_parser("simulate", help="append randomly played rounds to a file")
+    simulate.add_argument("path")
+    simulate.add_argument("--rounds", type=int, default=10000)
+    simulate.add_argument("--rounds-per-game", type=int, default=NUM_PLAYERS)
+    simulate.add_argument("--compression", choices=sorted(COMPRESSIONS), default="zlib")
+    simulate.add_argument("--seed", type=int, default=None)
+    info = commands.add_parser("info", help="summarize a file")
+    info.add_argument("path")
+    show = commands.add_parser("show", help="print records")
+    show.add_argument("path")
+    show.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "simulate":
+        record_simulated(args.path, args.rounds, args.rounds_per_game, args.compression, args.seed)
+    elif args.command == "info":
+        blocks = records = 0
+        games = set()
+        for count, payload in read_blocks(args.path):
+            blocks += 1
+            records += count
+            games.update(RECORD.unpack_from(payload, offset)[0] for offset in range(0, len(payload), RECORD.size))
+        size = os.path.getsize(args.path)
+        print(f"{args.path}: {records} rounds in {len(games)} games, {blocks} blocks, {size} bytes "
+              f"({size / max(records, 1):.1f} bytes per round)")
+    else:
+        for number, record in enumerate(read_records(args.path)):
+            if number == args.limit:
+                break
+            print(f"game {record.game} round {record.round} ({'table' if record.rules == RULES_TABLE else 'console'}"
+                  f" rules), trump {card_name(record.trump_card)}, scores {record.scores}")
+            for seat, discard in enumerate(record.discards):
+                print(f"    seat {seat} discards {', '.join(card_name(card) for card in discard)}")
+            print(f"    plays {' '.join(card_name(card) for card in record.plays)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from engine import (CARD_BID, CARD_POINTS, CARD_SUIT, CARDS_PER_PLAYER, DECK_SIZE, NUM_PLAYERS, legal_mask,
+                    trick_winner, trump_suit_of)
+from records import RULES, RULES_TABLE, read_records
+from scoring import score_round
+
+# Replaying a record needs no turn order: the deal says who held each card,
+# so every trick's seats follow from its cards. That lets a round be
+# re-scored under trick rules other than the ones it was played under.
+# Checking a round also replays the turn order and hands of its own rules
+# and reports the first play they do not allow.
+SCORINGS = ("points", "tricks")  # Difference from the bid in card points won, or in tricks won x 10
+SAMPLES = 10  # Mismatching rounds kept per shard for the report
+_DEALT = NUM_PLAYERS * CARDS_PER_PLAYER
+
+
+def console_trick_winner(cards, trump_card):
+    """Return the index of the winning card under the trick rule older main.py versions played.
+
+    A later card takes the trick by beating the best card's point value in
+    the lead suit, or by being of the trump card's suit (Nines and the Joker
+    included) while the best card is not.
+    """
+    lead_suit = CARD_SUIT[cards[0]]
+    trump_suit = CARD_SUIT[trump_card]
+    best = 0
+    for i in range(1, len(cards)):
+        card = cards[i]
+        if CARD_SUIT[card] == lead_suit and CARD_POINTS[card] > CARD_POINTS[cards[best]]:
+            best = i
+        elif CARD_SUIT[card] == trump_suit and CARD_SUIT[cards[best]] != trump_suit:
+            best = i
+    return best
+
+
+def replay_round(record, rules=None, scoring="points", check=True):
+    """Re-run a recorded round and return (round scores in seat order, first rule broken or None).
+
+    Tricks are won under rules (default: the rules the round was played
+    under). check verifies that every play was the right seat's and allowed
+    by the rules the round was played under.
+    """
+    bids, tricks_won, points_won, error = replay_tricks(record, rules, check)
+    if bids is None:
+        return None, error
+    won = points_won if scoring == "points" else [10 * tricks for tricks in tricks_won]
+    return [base + bonus for base, bonus, _ in score_round(bids, won)], error
+
+
+def replay_tricks(record, rules=None, check=True):
+    """Re-run a recorded round's tricks; return (bids, tricks won, points won, first rule broken or None) per seat."""
+    rules = record.rules if rules is None else rules
+    deal = record.deal
+    trump_card = deal[_DEALT]
+    trump_suit = trump_suit_of(trump_card)
+    holder = [None] * DECK_SIZE  # Seat dealt each card; None for the trump card
+    hands = [0] * NUM_PLAYERS
+    for index, card in enumerate(deal[:_DEALT]):
+        holder[card] = index % NUM_PLAYERS
+        hands[index % NUM_PLAYERS] |= 1 << card
+    bids = []
+    for seat, discard in enumerate(record.discards):
+        bids.append(sum(CARD_BID[card] for card in discard))
+        for card in discard:
+            hands[seat] &= ~(1 << card)
+    plays = record.plays
+    tricks_won = [0] * NUM_PLAYERS
+    points_won = [0] * NUM_PLAYERS
+    error = None
+    leader = 0  # Under the rules the round was played under, which set the turn order
+    for start in range(0, len(plays), NUM_PLAYERS):
+        cards = plays[start:start + NUM_PLAYERS]
+        seats = [holder[card] for card in cards]
+        if None in seats:
+            return None, None, None, f"trick {start // NUM_PLAYERS + 1}: the trump card was played"
+        if rules == RULES_TABLE:
+            winner = seats[trick_winner(cards, trump_suit)]
+        else:
+            winner = seats[console_trick_winner(cards, trump_card)]
+        if check:
+            if error is None:
+                error = _check_trick(cards, seats, hands, leader, record.rules)
+                if error:
+                    error = f"trick {start // NUM_PLAYERS + 1}: {error}"
+            if record.rules == RULES_TABLE:
+                leader = winner if rules == RULES_TABLE else seats[trick_winner(cards, trump_suit)]
+        tricks_won[winner] += 1
+        points_won[winner] += CARD_POINTS[cards[0]] + CARD_POINTS[cards[1]] + CARD_POINTS[cards[2]]
+    return bids, tricks_won, points_won, error
+
+
+def _check_trick(cards, seats, hands, leader, rules):
+    lead_suit = CARD_SUIT[cards[0]]
+    for position, (card, seat) in enumerate(zip(cards, seats)):
+        expected = (leader + position) % NUM_PLAYERS
+        if seat != expected:
+            return f"seat {seat} played out of turn (seat {expected} was to play)"
+        bit = 1 << card
+        if not hands[seat] & bit:
+            return f"seat {seat} played a card it discarded or had already played"
+        if rules == RULES_TABLE and position and not bit & legal_mask(hands[seat], lead_suit):
+            return f"seat {seat} did not follow suit"
+        hands[seat] ^= bit
+    return None
+
+
+def replay(records, rules=None, scoring="points", check=True):
+    """Yield (record, replayed scores, error) for a stream of records, one at a time."""
+    for record in records:
+        scores, error = replay_round(record, rules, scoring, check)
+        yield record, scores, error
+
+
+def games(replays):
+    """Group consecutive replays of the same game; yield (game, [replays]) one game at a time."""
+    game = None
+    rounds = []
+    for item in replays:
+        if rounds and item[0].game != game:
+            yield game, rounds
+            rounds = []
+        game = item[0].game
+        rounds.append(item)
+    if rounds:
+        yield game, rounds
+
+
+def _winners(totals):
+    best = max(totals)
+    return {player for player, total in enumerate(totals) if total == best}
+
+
+class ReplaySummary:
+    """Counts of replayed rounds and games whose scores or winners differ from the stored ones, mergeable."""
+    def __init__(self):
+        self.rounds = 0
+        self.games = 0
+        self.broken = 0  # Rounds with a play their rules do not allow
+        self.changed = 0  # Rounds whose replayed scores differ from the stored ones
+        self.shift = 0  # Sum of |replayed - stored| over every seat's round score
+        self.winners_changed = 0
+        self.samples = []  # (game, round, stored scores, replayed scores, error)
+
+    def add_game(self, rounds):
+        self.games += 1
+        stored = [0] * NUM_PLAYERS
+        replayed = [0] * NUM_PLAYERS
+        for record, scores, error in rounds:
+            self.rounds += 1
+            differs = scores != record.scores
+            if error:
+                self.broken += 1
+            if differs:
+                self.changed += 1
+            if (error or differs) and len(self.samples) < SAMPLES:
+                self.samples.append((record.game, record.round, record.scores, scores, error))
+            if scores is None:
+                continue
+            for seat in range(NUM_PLAYERS):
+                player = (seat + record.round - 1) % NUM_PLAYERS
+                stored[player] += record.scores[seat]
+                replayed[player] += scores[seat]
+                self.shift += abs(scores[seat] - record.scores[seat])
+        if _winners(stored) != _winners(replayed):
+            self.winners_changed += 1
+
+    def merge(self, other):
+        for name in ("rounds", "games", "broken", "changed", "shift", "winners_changed"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.samples = (self.samples + other.samples)[:SAMPLES]
+
+    def report(self):
+        lines = [f"{self.rounds} rounds in {self.games} games",
+                 f"    rules broken    {self.broken}",
+                 f"    scores differ   {self.changed} rounds ({100 * self.changed / max(self.rounds, 1):.2f}%), "
+                 f"mean |change| {self.shift / max(self.rounds * NUM_PLAYERS, 1):.2f} per seat",
+                 f"    winner differs  {self.winners_changed} games"]
+        for game, number, stored, scores, error in self.samples:
+            lines.append(f"    game {game} round {number}: stored {stored}, replayed {scores}"
+                         + (f"; {error}" if error else ""))
+        return "\n".join(lines)
+
+
+def replay_shard(job):
+    """Worker entry point: replay one record file and return (path, ReplaySummary)."""
+    path, rules, scoring, check = job
+    summary = ReplaySummary()
+    for _, rounds in games(replay(read_records(path), rules, scoring, check)):
+        summary.add_game(rounds)
+    return path, summary
+
+
+def replay_files(paths, rules=None, scoring="points", check=True, workers=None, progress=sys.stderr):
+    """Replay record files in parallel, one file per work unit, and return the merged ReplaySummary."""
+    total = ReplaySummary()
+    start_time = time.perf_counter()
+    with Pool(min(workers or os.cpu_count() or 1, len(paths))) as pool:
+        for done, (path, summary) in enumerate(pool.imap_unordered(replay_shard, [(path, rules, scoring, check)
+                                                                                 for path in paths]), 1):
+            total.merge(summary)
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{done}/{len(paths)} files  {total.rounds} rounds  {elapsed:.0f}s", end="", file=progress,
+                      flush=True)
+    if progress:
+        print(file=progress)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded CounterPoint rounds to verify or re-score them.")
+    parser.add_argument("paths", nargs="+", metavar="file", help="game-record files (shards), replayed in parallel")
+    parser.add_argument("--rules", choices=sorted(RULES), default=None,
+                        help="trick rules to replay under (default: each round's own, which verifies it)")
+    parser.add_argument("--scoring", choices=SCORINGS, default="points",
+                        help="score the difference from the bid in card points or in tricks won x 10")
+    parser.add_argument("--no-check", action="store_true", help="skip checking turn order and legal plays")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    args = parser.parse_args(argv)
+
+    rules = None if args.rules is None else RULES[args.rules]
+    summary = replay_files(args.paths, rules, args.scoring, not args.no_check, args.workers)
+    print(summary.report())
+    verifying = rules is None and args.scoring == "points"
+    return 1 if summary.broken or (verifying and summary.changed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from engine import NUM_PLAYERS, SUITS, trump_suit_of
+from scoring import score_round
+
+# A round store keeps one row per seat per round, column by column. On disk
+# it is a directory holding one raw little-endian array file per column
+# (<column>.bin) and meta.json, which records the committed row count and
+# the player names that the player column indexes. Appends extend every
+# column file and then rewrite meta.json atomically, so rows past the
+# committed count (from an interrupted flush) are ignored and overwritten.
+COLUMNS = {
+    "game": "<u4",
+    "round": "<u2",
+    "seat": "u1",
+    "player": "<u2",  # Index into the store's player names
+    "trump_suit": "u1",  # engine suit index, NO_SUIT for no trump
+    "bid": "<i2",
+    "points_won": "<i2",
+    "tricks": "u1",
+    "difference": "<i2",
+    "bonus": "<i2",
+    "round_score": "<i2",
+}
+_TYPECODES = {"<u4": "I", "<u2": "H", "u1": "B", "<i2": "h"}  # array.array buffers for rows not yet flushed
+VERSION = 1
+CHUNK_ROWS = 1 << 22  # Rows grouped at a time, bounding the temporary arrays of a query
+TRUMP_NAMES = SUITS + ["No trump"]
+
+
+class RoundStore:
+    """Per-round player statistics with one typed array per column.
+
+    Rows are appended in memory and written to the store's directory by
+    flush(); a store opened on an existing directory memory-maps its
+    columns, so queries read only the pages they touch.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.players = []
+        self.rows = 0  # Committed rows, in the column files
+        self._index = {}
+        self._mapped = {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+        self._pending = {name: array(_TYPECODES[dtype]) for name, dtype in COLUMNS.items()}
+        if path is not None and os.path.exists(os.path.join(path, "meta.json")):
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("version") != VERSION or meta.get("columns") != COLUMNS:
+                raise ValueError(f"{path} is not a version {VERSION} CounterPoint round store.")
+            self.rows = meta["rows"]
+            self.players = meta["players"]
+            self._index = {name: i for i, name in enumerate(self.players)}
+            self._map()
+
+    def __len__(self):
+        return self.rows + len(self._pending["game"])
+
+    def player_id(self, name):
+        """Return the player column value for a player name, adding the name if it is new."""
+        index = self._index.get(name)
+        if index is None:
+            index = self._index[name] = len(self.players)
+            self.players.append(name)
+        return index
+
+    def append(self, game, round, seat, player, trump_suit, bid, points_won, tricks, difference, bonus, round_score):
+        """Append one seat's row for one round."""
+        pending = self._pending
+        pending["game"].append(game)
+        pending["round"].append(round)
+        pending["seat"].append(seat)
+        pending["player"].append(player)
+        pending["trump_suit"].append(trump_suit)
+        pending["bid"].append(bid)
+        pending["points_won"].append(points_won)
+        pending["tricks"].append(tricks)
+        pending["difference"].append(difference)
+        pending["bonus"].append(bonus)
+        pending["round_score"].append(round_score)
+
+    def extend(self, **columns):
+        """Append many rows at once from equal-length arrays, one keyword per column."""
+        if set(columns) != set(COLUMNS):
+            raise ValueError(f"extend needs every column: {', '.join(COLUMNS)}.")
+        for name, dtype in COLUMNS.items():
+            self._pending[name].frombytes(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+    def column(self, name):
+        """Return a column's values for every row, flushed or not."""
+        pending = self._pending[name]
+        if not pending:
+            return self._mapped[name]
+        return np.concatenate([self._mapped[name], np.frombuffer(pending, dtype=COLUMNS[name])])
+
+    def flush(self):
+        """Write the pending rows to the store's directory and map them in."""
+        if self.path is None:
+            raise ValueError("RoundStore.flush needs a store opened with a path.")
+        os.makedirs(self.path, exist_ok=True)
+        added = len(self._pending["game"])
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "r+b" if self.rows else "wb") as f:
+                f.seek(self.rows * np.dtype(dtype).itemsize)
+                f.truncate()
+                f.write(self._pending[name].tobytes())
+        meta = {"version": VERSION, "rows": self.rows + added, "columns": COLUMNS, "players": self.players}
+        temporary = os.path.join(self.path, "meta.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary, os.path.join(self.path, "meta.json"))
+        self.rows += added
+        self._pending = {name: array(_TYPECODES[dtype]) for name, dtype in COLUMNS.items()}
+        self._map()
+
+    def _map(self):
+        if self.rows:
+            self._mapped = {name: np.memmap(os.path.join(self.path, f"{name}.bin"), dtype, mode="r",
+                                            shape=(self.rows,))
+                            for name, dtype in COLUMNS.items()}
+
+    def group_by(self, by, values, where=None):
+        """Group rows by the columns named in by; return {key tuple: (rows, mean of values)}.
+
+        values is a column name or an array with one value per row; where is
+        an optional boolean array selecting the rows to include.
+        Keys are small non-negative integers, so groups are summed with
+        np.bincount a chunk of CHUNK_ROWS rows at a time.
+        """
+        keys = [self.column(name) for name in by]
+        values = self.column(values) if isinstance(values, str) else np.asarray(values)
+        sizes = [int(key.max()) + 1 if len(key) else 1 for key in keys]
+        groups = int(np.prod(sizes))
+        counts = np.zeros(groups, dtype=np.int64)
+        sums = np.zeros(groups)
+        for start in range(0, len(values), CHUNK_ROWS):
+            rows = slice(start, start + CHUNK_ROWS)
+            index = np.zeros(len(values[rows]), dtype=np.int64)
+            for key, size in zip(keys, sizes):
+                index = index * size + key[rows]
+            chunk = values[rows]
+            if where is not None:
+                index = index[where[rows]]
+                chunk = chunk[where[rows]]
+            counts += np.bincount(index, minlength=groups)
+            sums += np.bincount(index, weights=chunk, minlength=groups)
+        present = np.flatnonzero(counts)
+        key_values = np.unravel_index(present, sizes)
+        return {tuple(int(column[i]) for column in key_values): (int(counts[group]), sums[group] / counts[group])
+                for i, group in enumerate(present)}
+
+    def bid_error_by_trump(self):
+        """Return {trump suit name: (rows, mean |bid - points won|)}."""
+        return {TRUMP_NAMES[suit]: result for (suit,), result in sorted(self.group_by(["trump_suit"],
+                                                                                      "difference").items())}
+
+    def bonus_rate_by_player(self):
+        """Return {player name: (rounds, share of rounds with a bonus)}."""
+        results = self.group_by(["player"], self.column("bonus") > 0)
+        return {self.players[player] if player < len(self.players) else player: result
+                for (player,), result in sorted(results.items())}
+
+
+def ingest_records(store, paths, names=None, progress=sys.stderr):
+    """Append every round of game-record files, replayed under the rules each was played under.
+
+    Game numbers are offset per file so that games of different files stay
+    apart. Record files do not name their players, so each file's players
+    are stored as "<file name>: Player 1" to "Player 3" unless names gives
+    the three players of every file. Player p sits in seat
+    (p - round + 1) % 3, as the front-ends rotate the dealer.
+    """
+    from records import read_records  # Only ingestion from record files needs the replay machinery
+    from replay import replay_tricks
+    if names is not None and len(names) != NUM_PLAYERS:
+        raise ValueError(f"ingest_records needs {NUM_PLAYERS} player names, got {len(names)}.")
+    added = 0
+    next_game = int(store.column("game").max()) + 1 if len(store) else 0
+    for path in paths:
+        players = [store.player_id(names[player] if names is not None
+                                   else f"{os.path.basename(path)}: Player {player + 1}")
+                   for player in range(NUM_PLAYERS)]
+        first_game = next_game
+        for record in read_records(path):
+            bids, tricks_won, points_won, _ = replay_tricks(record, check=False)
+            if bids is None:
+                continue
+            trump_suit = trump_suit_of(record.trump_card)
+            results = score_round(bids, points_won)
+            game = first_game + record.game
+            next_game = max(next_game, game + 1)
+            for seat, (base, bonus, difference) in enumerate(results):
+                player = players[(seat + record.round - 1) % NUM_PLAYERS]
+                store.append(game, record.round, seat, player, trump_suit, bids[seat], points_won[seat],
+                             tricks_won[seat], difference, bonus, base + bonus)
+            added += 1
+            if progress and added % 10000 == 0:
+                print(f"\r{added} rounds", end="", file=progress, flush=True)
+    if progress:
+        print(f"\r{added} rounds", file=progress)
+    return added
+
+
+def ingest_simulated(store, rounds, chunk_rounds=100000, seed=None, progress=sys.stderr):
+    """Append batch-simulated rounds (batch.simulate), each its own one-round game with seats as players."""
+    from batch import simulate  # Only simulated ingestion plays rounds
+    rng = np.random.default_rng(seed)
+    players = [store.player_id(f"Seat {seat}") for seat in range(NUM_PLAYERS)]
+    first_game = int(store.column("game").max()) + 1 if len(store) else 0
+    for start in range(0, rounds, chunk_rounds):
+        result = simulate(min(chunk_rounds, rounds - start), seed=rng)
+        n = len(result)
+        differences = np.abs(result.bids - result.points_won)
+        store.extend(game=np.repeat(first_game + start + np.arange(n), NUM_PLAYERS),
+                     round=np.ones(n * NUM_PLAYERS), seat=np.tile(np.arange(NUM_PLAYERS), n),
+                     player=np.tile(players, n), trump_suit=np.repeat(result.trump_suit, NUM_PLAYERS),
+                     bid=result.bids.ravel(), points_won=result.points_won.ravel(),
+                     tricks=result.tricks_won.ravel(), difference=differences.ravel(), bonus=result.bonus.ravel(),
+                     round_score=result.round_scores.ravel())
+        if progress:
+            print(f"\r{start + n}/{rounds} rounds", end="", file=progress, flush=True)
+    if progress:
+        print(file=progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query a columnar store of per-round player statistics.")
+    parser.add_argument("store", help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="append the rounds of game-record files")
+    ingest.add_argument("paths", nargs="+", metavar="file")
+    ingest.add_argument("--players", help="comma-separated names of the three players of every file "
+                                          "(default: each file's own Player 1 to 3)")
+    simulate = commands.add_parser("simulate", help="append batch-simulated rounds")
+    simulate.add_argument("--rounds", type=int, default=1000000)
+    simulate.add_argument("--seed", type=int, default=None)
+    query = commands.add_parser("query", help="run a query")
+    query.add_argument("query", choices=["bid-error-by-trump", "bonus-rate-by-player", "group"])
+    query.add_argument("--by", default="seat", help="comma-separated columns to group by (for 'group')")
+    query.add_argument("--value", default="round_score", choices=sorted(COLUMNS), help="column to average")
+    args = parser.parse_args(argv)
+
+    store = RoundStore(args.store)
+    if args.command == "ingest":
+        ingest_records(store, args.paths, args.players.split(",") if args.players else None)
+        store.flush()
+    elif args.command == "simulate":
+        ingest_simulated(store, args.rounds, seed=args.seed)
+        store.flush()
+    else:
+        start = time.perf_counter()
+        if args.query == "bid-error-by-trump":
+            results, label = store.bid_error_by_trump(), "mean bid error"
+        elif args.query == "bonus-rate-by-player":
+            results, label = store.bonus_rate_by_player(), "bonus rate"
+        else:
+            by = args.by.split(",")
+            results, label = store.group_by(by, args.value), f"mean {args.value}"
+        elapsed = time.perf_counter() - start
+        print(f"{'group':<30} {'rows':>12} {label:>16}")
+        for key, (rows, mean) in results.items():
+            print(f"{str(key):<30} {rows:>12} {mean:>16.3f}")
+        print(f"{len(store)} rows queried in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# A seat's difference is |bid - points won|. Its base score is the sum of the
+# opponents' differences, plus the bonus of the first tier its own difference
+# is within.
+BONUS_TIERS = [(0, 30), (2, 20), (5, 10)]  # (largest difference, bonus)
+
+
+def bonus_for(difference):
+    """Return the bonus for a difference between bid and points won."""
+    for limit, bonus in BONUS_TIERS:
+        if difference <= limit:
+            return bonus
+    return 0
+
+
+def score_round(bids, points_won):
+    """Return (base_score, bonus, difference) per player for one round."""
+    differences = [abs(bid - points) for bid, points in zip(bids, points_won)]
+    total = sum(differences)
+    return [(total - difference, bonus_for(difference), difference) for difference in differences]
+
+
+def score_rounds(bids, points_won):
+    """Score N rounds at once; return (base, bonus, round_score) arrays shaped like bids.
+
+    bids and points_won are (N, players) arrays or nested lists, one row per
+    round, scored exactly like score_round.
+    """
+    import numpy as np  # Only the batched mode needs numpy, so the front-ends don't load it
+    differences = np.abs(np.subtract(bids, points_won, dtype=np.int16))  # Scores stay far below 2**15
+    base = differences.sum(axis=1, keepdims=True, dtype=np.int16) - differences
+    largest = BONUS_TIERS[-1][0] + 1
+    bonuses = np.array([bonus_for(difference) for difference in range(largest + 1)], dtype=np.int16)
+    bonus = bonuses[np.minimum(differences, largest)]
+    return base, bonus, base + bonus
@@ -0,0 +1,411 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import struct
+import sys
+
+from engine import (BIDDING, CARD_POINTS, NUM_DISCARDS, NUM_PLAYERS, SCORED, SET_ROUNDS, TARGET_SCORE, TRICK, RoundState,
+                    cards_in, game_winners, is_game_over)
+from protocol import PORT, encode
+from snapshot import EXTENSION, MAX_LIMIT, GameSnapshot, read_snapshot, remove_snapshot, write_snapshot
+
+# Clients speak the JSON-lines protocol described in protocol.py.
+#
+# A seat with no connection is played automatically with random legal
+# actions, as is a connected seat that lets its turn time out.
+#
+# With a snapshot directory, every table is saved there as <table id>.cpsn
+# (snapshot.py) after every move, and the snapshots found at startup are
+# restored. A restored table, which may have come from another server, waits
+# for three players to join it by its id and then resumes where it stopped.
+TURN_TIMEOUT = 30.0
+DEFAULT_TARGET = 500
+MAX_BUFFERED = 1 << 20  # Bytes queued for a client before it is dropped as too slow to read
+
+
+class Table:
+    """One game between three seats, driven by the server's events and timers."""
+    __slots__ = ("id", "win_condition", "target_score", "max_rounds", "names", "connections", "scores",
+                 "rounds", "state", "timer", "rng", "started", "_server")
+
+    def __init__(self, server, table_id, win_condition=TARGET_SCORE, target_score=DEFAULT_TARGET, max_rounds=None):
+        self._server = server
+        self.id = table_id
+        self.win_condition = win_condition
+        self.target_score = target_score
+        self.max_rounds = max_rounds
+        self.names = [None] * NUM_PLAYERS
+        self.connections = [None] * NUM_PLAYERS
+        self.scores = [0] * NUM_PLAYERS
+        self.rounds = 0  # Rounds finished; the engine's seat s is player (s + rounds) % 3
+        self.state = None
+        self.timer = None
+        self.rng = random.Random()
+        self.started = False
+
+    def options(self):
+        return {"target": self.target_score} if self.win_condition == TARGET_SCORE else {"rounds": self.max_rounds}
+
+    def player_of(self, seat):
+        return (seat + self.rounds) % NUM_PLAYERS
+
+    def seat_of(self, player):
+        return (player - self.rounds) % NUM_PLAYERS
+
+    def send(self, player, message):
+        connection = self.connections[player]
+        if connection:
+            connection.send(encode(message))
+
+    def broadcast(self, message):
+        data = encode(message)
+        for connection in self.connections:
+            if connection:
+                connection.send(data)
+
+    def is_empty(self):
+        return not any(self.connections)
+
+    def sit(self, player, connection, name):
+        self.connections[player] = connection
+        self.names[player] = name
+        self.broadcast({"type": "seat", "seat": player, "name": name})
+        if self.started:
+            self.send(player, self.sync(player))
+            if self.state.phase != SCORED and self.player_of(self.state.current_player) == player:
+                self.prompt()
+        elif all(self.connections):
+            self.started = True
+            if self.state is None:
+                self.start_round()
+            else:
+                self.resume()
+
+    def stand(self, player):
+        self.connections[player] = None
+        self.names[player] = None
+        self.broadcast({"type": "seat", "seat": player, "name": None})
+        if self.is_empty():
+            self.close()
+        elif self.started and self.state.phase != SCORED and self.player_of(self.state.current_player) == player:
+            self.prompt()  # Its turn is now played automatically
+
+    def sync(self, player):
+        state = self.state
+        seat = self.seat_of(player)
+        return {"type": "sync", "round": self.rounds + 1, "trump": state.trump_card, "hand": cards_in(state.hands[seat]),
+                "phase": state.phase, "bids": [state.bids[self.seat_of(p)] for p in range(NUM_PLAYERS)],
+                "trick": [[self.player_of((state.leader + i) % NUM_PLAYERS), card]
+                          for i, card in enumerate(state.current_trick)],
+                "turn": self.player_of(state.current_player), "totals": self.scores, "names": self.names}
+
+    def snapshot(self):
+        """Return the table as a snapshot.GameSnapshot, to restore it on this server or another."""
+        state = self.state
+        bidders = state.current_player if state.phase == BIDDING else NUM_PLAYERS
+        return GameSnapshot(state.phase, self.win_condition, self.target_score, self.max_rounds, self.rounds + 1,
+                            self.names, [False] * NUM_PLAYERS, self.scores, state.deal,
+                            [cards_in(state.discards[seat]) for seat in range(bidders)], state.plays)
+
+    @classmethod
+    def from_snapshot(cls, server, table_id, snapshot):
+        """Rebuild a table from a GameSnapshot; it resumes once all three seats are taken."""
+        table = cls(server, table_id, snapshot.win_condition, snapshot.target_score, snapshot.max_rounds)
+        table.rounds = snapshot.round - 1
+        table.scores = list(snapshot.scores)
+        table.state = snapshot.round_state()
+        return table
+
+    def start_round(self):
+        self.state = RoundState(rng=self.rng)
+        self.broadcast({"type": "round", "round": self.rounds + 1, "trump": self.state.trump_card,
+                        "dealer": self.player_of(0)})
+        for player in range(NUM_PLAYERS):
+            self.send(player, {"type": "hand", "cards": cards_in(self.state.hands[self.seat_of(player)])})
+        self._server.save(self)
+        self.prompt()
+
+    def resume(self):
+        for player in range(NUM_PLAYERS):
+            self.send(player, self.sync(player))
+        self.prompt()
+
+    def prompt(self):
+        """Ask the seat to act for its action, or play for it now if the seat is empty."""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        state = self.state
+        player = self.player_of(state.current_player)
+        loop = asyncio.get_running_loop()
+        if self.connections[player] is None:
+            self.timer = loop.call_soon(self.auto_act)
+            return
+        timeout = self._server.turn_timeout
+        message = {"type": "turn", "seat": player, "phase": state.phase, "timeout": timeout}
+        for other in range(NUM_PLAYERS):
+            if other != player:
+                self.send(other, message)
+        legal = cards_in(state.hands[state.current_player]) if state.phase == BIDDING else state.legal_actions()
+        self.send(player, dict(message, legal=legal))
+        self.timer = loop.call_later(timeout, self.auto_act)
+
+    def auto_act(self):
+        self.timer = None
+        state = self.state
+        if state.phase == BIDDING:
+            action = tuple(self.rng.sample(cards_in(state.hands[state.current_player]), NUM_DISCARDS))
+        else:
+            action = self.rng.choice(state.legal_actions())
+        self.act(self.player_of(state.current_player), state.phase, action, auto=True)
+
+    def act(self, player, phase, action, auto=False):
+        """Apply a seat's bid or play; return an error message, or None once it is applied."""
+        state = self.state
+        if not self.started or state.phase == SCORED or self.player_of(state.current_player) != player:
+            return "It is not your turn."
+        if phase != state.phase:
+            return f"The table is in the {state.phase} phase."
+        try:
+            state.apply(action)
+        except (ValueError, TypeError, IndexError) as error:
+            return str(error)
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if phase == BIDDING:
+            message = {"type": "bid", "seat": player, "bid": state.bids[self.seat_of(player)], "auto": auto}
+            for other in range(NUM_PLAYERS):
+                if other != player:
+                    self.send(other, message)
+            self.send(player, dict(message, cards=list(action)))
+        else:
+            self.broadcast({"type": "play", "seat": player, "card": action, "auto": auto})
+            if not state.current_trick:
+                trick = state.plays[-NUM_PLAYERS:]
+                self.broadcast({"type": "trick", "winner": self.player_of(state.leader), "cards": trick,
+                                "points": sum(CARD_POINTS[card] for card in trick)})
+        if state.phase == SCORED:
+            self.finish_round()
+        else:
+            self._server.save(self)
+            self.prompt()
+        return None
+
+    def finish_round(self):
+        state = self.state
+
+        def by_player(values):
+            return [values[self.seat_of(player)] for player in range(NUM_PLAYERS)]
+        # by_player follows this round's rotation, so everything is gathered before the round count moves on
+        message = {"type": "scores", "round": self.rounds + 1, "bids": by_player(state.bids),
+                   "points_won": by_player(state.points_won), "round_scores": by_player(state.round_scores())}
+        for player, score in enumerate(message["round_scores"]):
+            self.scores[player] += score
+        self.rounds += 1
+        self.broadcast(dict(message, totals=self.scores))
+        if is_game_over(self.scores, self.rounds, self.win_condition, self.target_score, self.max_rounds):
+            self.broadcast({"type": "game_over", "totals": self.scores, "winners": game_winners(self.scores)})
+            self._server.finished += 1
+            self.close()
+        else:
+            self.start_round()
+
+    def close(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        for player, connection in enumerate(self.connections):
+            if connection:
+                connection.table = None
+                self.connections[player] = None
+        self._server.remove(self)
+
+
+class Connection:
+    """One client socket and the seat it holds, if any."""
+    __slots__ = ("writer", "table", "seat", "name")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.table = None
+        self.seat = None
+        self.name = None
+
+    def send(self, data):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_BUFFERED:
+            transport.abort()  # The reader loop sees the connection drop and frees the seat
+            return
+        self.writer.write(data)
+
+
+class TableServer:
+    """Hosts any number of tables for clients speaking the JSON-lines protocol."""
+    def __init__(self, turn_timeout=TURN_TIMEOUT, snapshot_dir=None):
+        self.turn_timeout = turn_timeout
+        self.snapshot_dir = snapshot_dir  # Directory tables are saved to after every move, or None
+        self.tables = {}
+        self.waiting = {}  # Table options -> id of the open table new players are seated at
+        self.connections = 0
+        self.finished = 0  # Games played to the end
+        self.errors = 0  # Malformed or refused client messages
+        self._ids = itertools.count(1)
+        if snapshot_dir:
+            self.restore_tables()
+
+    async def handle(self, reader, writer):
+        connection = Connection(writer)
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    error = self.dispatch(connection, message)
+                except (ValueError, KeyError, TypeError, AttributeError) as exception:
+                    error = f"Malformed message: {exception}"
+                if error:
+                    self.errors += 1
+                    connection.send(encode({"type": "error", "message": error}))
+        except asyncio.CancelledError:
+            connection.table = None  # The server is stopping: keep the table and its snapshot to restore
+            raise
+        finally:
+            self.connections -= 1
+            if connection.table:
+                connection.table.stand(connection.seat)
+            writer.close()
+
+    def dispatch(self, connection, message):
+        kind = message["type"]
+        if kind == "join":
+            return self.join(connection, message)
+        table = connection.table
+        if kind == "leave":
+            if table:
+                connection.table = None
+                table.stand(connection.seat)
+            return None
+        if table is None:
+            return "Join a table first."
+        if kind == "bid":
+            return table.act(connection.seat, BIDDING, tuple(int(card) for card in message["cards"]))
+        if kind == "play":
+            return table.act(connection.seat, TRICK, int(message["card"]))
+        return f"Unknown message type {kind!r}."
+
+    def join(self, connection, message):
+        if connection.table:
+            return "You are already seated; leave first."
+        if "rounds" in message:
+            rounds = int(message["rounds"])
+            if not (rounds == 1 or (0 < rounds <= MAX_LIMIT and rounds % NUM_PLAYERS == 0)):
+                return f"Number of rounds must be 1 or a positive number divisible by 3, up to {MAX_LIMIT}."
+            options = (SET_ROUNDS, None, rounds)
+        else:
+            target = int(message.get("target", DEFAULT_TARGET))
+            if not 0 < target <= MAX_LIMIT:
+                return f"Target score must be a positive number up to {MAX_LIMIT}."
+            options = (TARGET_SCORE, target, None)
+        table_id = message.get("table")
+        if table_id is not None and table_id not in self.tables:
+            # Only tables this server opened or restored can be joined by id; a client's id never names a file
+            return f"There is no table {table_id!r}." if isinstance(table_id, str) else "Table ids are strings."
+        if table_id is None:
+            table_id = self.waiting.get(options)
+            if table_id is None:
+                table_id = f"t{next(self._ids)}"
+                while table_id in self.tables:  # Taken by a restored table
+                    table_id = f"t{next(self._ids)}"
+                self.waiting[options] = table_id
+        table = self.tables.get(table_id)
+        if table is None:
+            table = self.tables[table_id] = Table(self, table_id, *options)
+        free = [player for player in range(NUM_PLAYERS) if table.connections[player] is None]
+        seat = message.get("seat")
+        if seat is None and free:
+            seat = free[0]
+        if seat not in free:
+            return f"Seat {seat} at table {table_id} is taken." if free else f"Table {table_id} is full."
+        if len(free) == 1 and self.waiting.get(options) == table_id:
+            del self.waiting[options]
+        connection.table = table
+        connection.seat = seat
+        connection.name = str(message.get("name") or f"Player {seat + 1}")
+        connection.send(encode({"type": "joined", "table": table.id, "seat": seat, "names": table.names,
+                                **table.options()}))
+        table.sit(seat, connection, connection.name)
+        return None
+
+    def remove(self, table):
+        self.tables.pop(table.id, None)
+        for options, table_id in list(self.waiting.items()):
+            if table_id == table.id:
+                del self.waiting[options]
+        if self.snapshot_dir:
+            remove_snapshot(self.snapshot_path(table))
+
+    def snapshot_path(self, table):
+        return os.path.join(self.snapshot_dir, table.id + EXTENSION)
+
+    def save(self, table):
+        """Write a table's snapshot, if this server keeps them."""
+        if self.snapshot_dir:
+            try:
+                write_snapshot(self.snapshot_path(table), table.snapshot())
+            except (OSError, struct.error) as error:
+                print(f"Could not save table {table.id}: {error}", file=sys.stderr)
+
+    def restore_tables(self):
+        """Restore every table snapshot in the snapshot directory."""
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            if not name.endswith(EXTENSION):
+                continue
+            table_id = name[:-len(EXTENSION)]
+            try:
+                snapshot = read_snapshot(os.path.join(self.snapshot_dir, name))
+                self.tables[table_id] = Table.from_snapshot(self, table_id, snapshot)
+            except ValueError as error:
+                print(f"Could not restore table {table_id}: {error}", file=sys.stderr)
+
+    async def serve(self, host="127.0.0.1", port=PORT):
+        """Accept clients until cancelled."""
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 16)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host CounterPoint tables for JSON-lines clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--turn-timeout", type=float, default=TURN_TIMEOUT,
+                        help="seconds a seat has to act before a random legal action is played for it")
+    parser.add_argument("--snapshots", default=None, metavar="DIR",
+                        help="save every table to DIR after every move, and restore the tables saved there")
+    args = parser.parse_args(argv)
+    server = TableServer(args.turn_timeout, args.snapshots)
+    if server.tables:
+        print(f"Restored {len(server.tables)} tables: {', '.join(sorted(server.tables))}", file=sys.stderr)
+    print(f"Serving CounterPoint tables on {args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
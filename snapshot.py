@@ -0,0 +1,182 @@
+import os
+import struct
+
+from engine import DECK_SIZE, NUM_DISCARDS, NUM_PLAYERS, NUM_TRICKS, SET_ROUNDS, TARGET_SCORE, RoundState
+from playerstats import PlayerStats, RoundDetail
+from scoring import BONUS_TIERS
+
+# A snapshot is one game between turns, small enough to rewrite after every
+# move. The round in progress is stored as its deal and the actions taken so
+# far, so restoring replays them through RoundState rather than trusting
+# saved hands or trick piles.
+#
+#   header  magic b"CPSN", version u8
+#   game    phase u8 (index into PHASES), win_condition u8,
+#           target score or number of rounds u16, round u16 (1-based),
+#           computer players u8 (bit per player), scores 3 x i32,
+#           deal 37 card ids, bids made u8, discards 9 card ids (3 per
+#           seat in bidding order, unused ones 0), plays made u8,
+#           plays 27 card ids (unused ones 0)
+#   names   3 x (length u8, UTF-8 bytes)
+#   stats   players with stats u8 (0 or 3), then for each player:
+#           rounds u16, tricks/points/cards/bonus totals 4 x i32,
+#           bid error mean and sum of squared deviations 2 x f64,
+#           rounds per bonus tier u16 each, bonus streak u16, longest u16,
+#           recent rounds u8, then best, worst (if rounds) and the recent
+#           rounds as round u16, bid/points won/difference/bonus/score 5 x i16
+#
+# Per-player values are in the order of the game's players, not its seats:
+# in round r seat s is player (s + r - 1) % 3, as the front-ends rotate the
+# dealer after every round.
+MAGIC = b"CPSN"
+VERSION = 1
+EXTENSION = ".cpsn"
+HEADER = struct.Struct("<4sB")
+GAME = struct.Struct(f"<BBHHB{NUM_PLAYERS}i{DECK_SIZE}sB{NUM_PLAYERS * NUM_DISCARDS}sB{NUM_PLAYERS * NUM_TRICKS}s")
+STATS = struct.Struct(f"<H4i2d{len(BONUS_TIERS) + 1}HHHB")
+DETAIL = struct.Struct("<H5h")
+MAX_LIMIT = 0xFFFF  # Largest target score or number of rounds the u16 field holds
+PHASES = ("trump", "bidding", "bid_result_prompt", "trick", "next_player_prompt")  # Screens a game resumes at
+RESUME_PATH = os.path.join(os.path.expanduser("~"), ".counterpoint", "resume" + EXTENSION)  # gui.py's snapshot
+
+
+class GameSnapshot:
+    """A game between turns: settings, scores, the round's deal and actions so far, and optionally player stats."""
+    __slots__ = ("phase", "win_condition", "target_score", "max_rounds", "round", "names", "computers", "scores",
+                 "deal", "discards", "plays", "stats")
+
+    def __init__(self, phase, win_condition, target_score, max_rounds, round, names, computers, scores, deal,
+                 discards, plays, stats=None):
+        self.phase = phase
+        self.win_condition = win_condition
+        self.target_score = target_score
+        self.max_rounds = max_rounds
+        self.round = round
+        self.names = names
+        self.computers = computers
+        self.scores = scores
+        self.deal = deal  # 37 card ids; seat s holds deal[s:36:3], deal[36] is the trump card
+        self.discards = discards  # 3 card ids per seat that has bid, in bidding order
+        self.plays = plays  # Card ids played this round, in order
+        self.stats = stats  # PlayerStats per player, or None
+
+    def seat_player(self, seat):
+        """Return the player sitting in an engine seat this round."""
+        return (seat + self.round - 1) % NUM_PLAYERS
+
+    def round_state(self):
+        """Replay the round so far; return the RoundState. Raises ValueError if an action is not allowed."""
+        state = RoundState(deal=list(self.deal))
+        for discard in self.discards:
+            state.apply(tuple(discard))
+        for card in self.plays:
+            state.apply(card)
+        return state
+
+    def pack(self):
+        discards = bytes(card for discard in self.discards for card in discard)
+        limit = self.target_score if self.win_condition == TARGET_SCORE else self.max_rounds
+        parts = [HEADER.pack(MAGIC, VERSION),
+                 GAME.pack(PHASES.index(self.phase), self.win_condition, limit or 0, self.round,
+                           sum(1 << player for player, computer in enumerate(self.computers) if computer),
+                           *self.scores, bytes(self.deal), len(self.discards), discards, len(self.plays),
+                           bytes(self.plays))]
+        for name in self.names:
+            encoded = (name or "").encode()[:255]
+            parts.append(bytes((len(encoded),)) + encoded)
+        parts.append(bytes((len(self.stats) if self.stats else 0,)))
+        for stats in self.stats or ():
+            parts.append(_pack_stats(stats))
+        return b"".join(parts)
+
+    @classmethod
+    def unpack(cls, data):
+        """Return the snapshot packed in data. Raises ValueError if it is not a version 1 snapshot."""
+        try:
+            magic, version = HEADER.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError("This is not a CounterPoint snapshot.")
+            if version != VERSION:
+                raise ValueError(f"This is not a version {VERSION} CounterPoint snapshot.")
+            offset = HEADER.size
+            fields = GAME.unpack_from(data, offset)
+            offset += GAME.size
+            phase, win_condition, limit, round, computers = fields[:5]
+            scores = list(fields[5:5 + NUM_PLAYERS])
+            deal, bids, discards, played, plays = fields[5 + NUM_PLAYERS:]
+            names = []
+            for _ in range(NUM_PLAYERS):
+                length = data[offset]
+                names.append(data[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+            stats = None
+            if data[offset]:
+                offset += 1
+                stats = []
+                for _ in range(NUM_PLAYERS):
+                    player_stats, offset = _unpack_stats(data, offset)
+                    stats.append(player_stats)
+            return cls(PHASES[phase], win_condition, limit if win_condition == TARGET_SCORE else None,
+                       limit if win_condition == SET_ROUNDS else None, round, names,
+                       [bool(computers >> player & 1) for player in range(NUM_PLAYERS)], scores, list(deal),
+                       [tuple(discards[i:i + NUM_DISCARDS]) for i in range(0, bids * NUM_DISCARDS, NUM_DISCARDS)],
+                       list(plays[:played]), stats)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            raise ValueError("The CounterPoint snapshot is truncated or corrupt.") from None
+
+
+def _pack_stats(stats):
+    details = ([stats.best_round, stats.worst_round] if stats.rounds else []) + list(stats.recent)
+    return STATS.pack(stats.rounds, stats.total_tricks_won, stats.total_points_won, stats.total_cards_won,
+                      stats.total_bonus, stats.error_mean, stats._error_m2, *stats.bonus_tiers, stats.bonus_streak,
+                      stats.longest_bonus_streak, len(stats.recent)) + b"".join(
+        DETAIL.pack(detail.round, detail.bid, detail.points_won, detail.difference, detail.bonus, detail.round_score)
+        for detail in details)
+
+
+def _unpack_stats(data, offset):
+    fields = STATS.unpack_from(data, offset)
+    offset += STATS.size
+    stats = PlayerStats()
+    (stats.rounds, stats.total_tricks_won, stats.total_points_won, stats.total_cards_won, stats.total_bonus,
+     stats.error_mean, stats._error_m2) = fields[:7]
+    stats.bonus_tiers = list(fields[7:-3])
+    stats.bonus_streak, stats.longest_bonus_streak, recent = fields[-3:]
+    details = []
+    for _ in range((2 if stats.rounds else 0) + recent):
+        details.append(RoundDetail(*DETAIL.unpack_from(data, offset)))
+        offset += DETAIL.size
+    if stats.rounds:
+        stats.best_round, stats.worst_round = details[:2]
+        del details[:2]
+    stats.recent.extend(details)
+    return stats, offset
+
+
+def write_snapshot(path, snapshot):
+    """Write a snapshot atomically: readers see the previous snapshot or this one, never a partial file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(snapshot.pack())
+    os.replace(temporary, path)
+
+
+def read_snapshot(path):
+    """Return the GameSnapshot in a file. Raises ValueError if it is not a valid snapshot."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return GameSnapshot.unpack(data)
+    except ValueError as error:
+        raise ValueError(f"{path}: {error}") from None
+
+
+def remove_snapshot(path):
+    """Delete a snapshot once its game is over; a missing file is not an error."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
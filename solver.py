@@ -0,0 +1,264 @@
+import time
+
+from engine import (CARD_POINTS, CARD_RANK_INDEX, CARD_SUIT, DECK_SIZE, JOKER, NO_SUIT, NUM_PLAYERS, POINT_MASKS,
+                    RANKS, SUIT_MASKS, TRICK_STRENGTH, cards_in, legal_mask, points_in, trick_winner)
+
+ZERO_POINT_MASK = ((1 << DECK_SIZE) - 1) & ~sum(cards for _, cards in POINT_MASKS)
+# RANK_BANDS[low][high]: the cards of every suit with a rank index from low to high
+RANK_BANDS = [[sum(1 << c for c in range(JOKER) if low <= CARD_RANK_INDEX[c] <= high) for high in range(len(RANKS))]
+              for low in range(len(RANKS))]
+
+class SearchTimeout(Exception):
+    """Raised when a solve runs past its deadline."""
+
+
+class DoubleDummySolver:
+    """Exact solver for the trick phase once all three hands are known.
+
+    The value for a seat is the number of card points it can guarantee from
+    the remaining tricks when the other two seats play together against it
+    (a paranoid search). Positions are searched with alpha-beta over the
+    follow-suit legal moves, with a transposition table keyed on the cards
+    left in each hand and the seat to lead, and bounded at each trick start
+    by the highest trumps left. With a tablebase.Tablebase, the last tricks
+    it covers are looked up instead of searched.
+
+    With a horizon, trick starts with that many cards or fewer left in the
+    hands are not searched but estimated from the strength of each hand, so
+    values are no longer exact.
+    """
+    def __init__(self, trump_suit, deadline=None, tablebase=None, horizon=0):
+        self.trump_suit = trump_suit
+        self.deadline = deadline  # time.monotonic() value after which searches raise SearchTimeout
+        self.tablebase = tablebase
+        self.horizon = horizon
+        self._endgame_cards = NUM_PLAYERS * tablebase.tricks if tablebase is not None else -1
+        self.nodes = 0
+        self._tables = [{} for _ in range(NUM_PLAYERS)]
+        self._trump_mask = SUIT_MASKS[trump_suit] if trump_suit != NO_SUIT else 0
+        self._strength = TRICK_STRENGTH[NO_SUIT][trump_suit]  # Trumps above every plain card, then by rank
+
+    def solve(self, hands, leader, trick=()):
+        """Return the points each seat can guarantee from the position onwards.
+
+        hands are card bitboards indexed by seat; trick lists the cards
+        already played to the current trick, starting with the leader's.
+        """
+        return [self.value(hands, leader, trick, seat) for seat in range(NUM_PLAYERS)]
+
+    def value(self, hands, leader, trick, seat):
+        """Return the points seat can guarantee from the position onwards."""
+        self._me = seat
+        self._tt = self._tables[seat]
+        total = points_in(hands[0] | hands[1] | hands[2]) + sum(CARD_POINTS[c] for c in trick)
+        return self._mtdf(list(hands), leader, list(trick), total)
+
+    def _mtdf(self, hands, leader, trick, total):
+        # Null-window searches bisecting the range the value can lie in
+        lower, upper = 0, total
+        while lower < upper:
+            beta = (lower + upper + 1) // 2
+            value = self._search(hands, leader, trick, beta - 1, beta)
+            if value < beta:
+                upper = value
+            else:
+                lower = value
+        return lower
+
+    def move_values(self, hands, leader, trick=()):
+        """Return {card: guaranteed points} for every legal move of the seat to play."""
+        seat = (leader + len(trick)) % NUM_PLAYERS
+        self._me = seat
+        self._tt = self._tables[seat]
+        hands = list(hands)
+        trick = list(trick)
+        values = {}
+        for card in cards_in(legal_mask(hands[seat], CARD_SUIT[trick[0]] if trick else NO_SUIT)):
+            hands[seat] ^= 1 << card
+            trick.append(card)
+            if len(trick) == NUM_PLAYERS:
+                winner = (leader + trick_winner(trick, self.trump_suit)) % NUM_PLAYERS
+                gain = sum(CARD_POINTS[c] for c in trick) if winner == seat else 0
+                remaining = points_in(hands[0] | hands[1] | hands[2])
+                values[card] = gain + self._mtdf(hands, winner, [], remaining)
+            else:
+                remaining = points_in(hands[0] | hands[1] | hands[2]) + sum(CARD_POINTS[c] for c in trick)
+                values[card] = self._mtdf(hands, leader, trick, remaining)
+            trick.pop()
+            hands[seat] ^= 1 << card
+        return values
+
+    def best_move(self, hands, leader, trick=()):
+        """Return (card, value) for the best move of the seat to play."""
+        values = self.move_values(hands, leader, trick)
+        card = max(values, key=values.get)
+        return card, values[card]
+
+    def _ordered_moves(self, hands, leader, trick, seat, first):
+        lead_suit = CARD_SUIT[trick[0]] if trick else NO_SUIT
+        moves = legal_mask(hands[seat], lead_suit)
+        # Among touching zero-point cards of one suit in one hand, only one needs searching.
+        # While another seat can still lead the Joker, plain cards of every suit compete on
+        # rank, so touching then also means no such card ranks between them or ties with one.
+        zero = moves & ZERO_POINT_MASK
+        if zero.bit_count() > 1:
+            others = (hands[0] | hands[1] | hands[2]) & ~hands[seat]
+            for c in trick:
+                others |= 1 << c
+            plain_others = others & ~SUIT_MASKS[self.trump_suit] if others >> JOKER & 1 else 0
+            cards = []
+            previous = -1
+            for card in cards_in(moves):
+                if (zero >> card & 1 and previous >= 0 and zero >> previous & 1
+                        and CARD_SUIT[card] == CARD_SUIT[previous]
+                        and not others & SUIT_MASKS[CARD_SUIT[card]] & ((1 << card) - (1 << previous))
+                        and not plain_others & RANK_BANDS[CARD_RANK_INDEX[card]][CARD_RANK_INDEX[previous]]):
+                    continue  # Card ids within a suit run from high to low rank, so nothing sits between
+                cards.append(card)
+                previous = card
+        else:
+            cards = cards_in(moves)
+        if len(cards) == 1:
+            return cards
+        row = TRICK_STRENGTH[lead_suit][self.trump_suit]
+        if not trick:
+            cards.sort(key=lambda c: -row[c] - 20 * (c == first))
+            return cards
+        top_position = 1 if len(trick) == 2 and row[trick[1]] > row[trick[0]] else 0
+        top = row[trick[top_position]]
+        maximizing = seat == self._me
+        me_winning = (leader + top_position) % NUM_PLAYERS == self._me
+        winners = [c for c in cards if row[c] > top]
+        losers = [c for c in cards if row[c] <= top]
+        last = len(trick) == NUM_PLAYERS - 1
+        # Cheapest winner first when the trick ends with this card, strongest otherwise
+        winners.sort(key=lambda c: row[c] if last else -row[c])
+        if maximizing or not me_winning:
+            losers.sort(key=lambda c: CARD_POINTS[c])  # Give away as little as possible
+        else:
+            losers.sort(key=lambda c: -CARD_POINTS[c])  # A partner wins: smear points onto the trick
+        if maximizing or me_winning:
+            return winners + losers
+        return losers + winners
+
+    def _search(self, hands, leader, trick, alpha, beta):
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        n = len(trick)
+        first = -1
+        if n == 0:
+            remaining = hands[0] | hands[1] | hands[2]
+            if remaining.bit_count() <= self.horizon:
+                return self._estimate(hands, remaining)
+            if remaining.bit_count() <= NUM_PLAYERS:
+                return self._last_trick(hands, leader) if remaining else 0
+            key = (hands[0] | hands[1] << DECK_SIZE | hands[2] << (2 * DECK_SIZE)) << 2 | leader
+            entry = self._tt.get(key)
+            if entry is not None:
+                lower, upper, first = entry
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha = max(alpha, lower)
+                beta = min(beta, upper)
+            else:
+                # One lookup answers every seat, so it goes into all three tables
+                values = (self.tablebase.lookup(hands, leader, self.trump_suit)
+                          if remaining.bit_count() == self._endgame_cards else None)
+                if values is not None:
+                    for table, value in zip(self._tables, values):
+                        table[key] = (value, value, -1)
+                    return values[self._me]
+                lower, upper = self._bounds(hands, remaining)
+                if upper <= alpha:
+                    return upper
+                if lower >= beta:
+                    return lower
+            window_alpha, window_beta = alpha, beta
+        seat = (leader + n) % NUM_PLAYERS
+        me = self._me
+        maximizing = seat == me
+        best = -1 if maximizing else 1 << 30
+        best_card = -1
+        completes = n == NUM_PLAYERS - 1
+        if completes:
+            row = TRICK_STRENGTH[CARD_SUIT[trick[0]]][self.trump_suit]
+            s0, s1 = row[trick[0]], row[trick[1]]
+            top, top_position = (s1, 1) if s1 > s0 else (s0, 0)
+            trick_points = CARD_POINTS[trick[0]] + CARD_POINTS[trick[1]]
+        hand = hands[seat]
+        for card in self._ordered_moves(hands, leader, trick, seat, first):
+            hands[seat] = hand ^ 1 << card
+            if completes:
+                winner = (leader + (2 if row[card] > top else top_position)) % NUM_PLAYERS
+                if winner == me:
+                    gain = trick_points + CARD_POINTS[card]
+                    value = gain + self._search(hands, winner, [], alpha - gain, beta - gain)
+                else:
+                    value = self._search(hands, winner, [], alpha, beta)
+            else:
+                trick.append(card)
+                value = self._search(hands, leader, trick, alpha, beta)
+                trick.pop()
+            if maximizing:
+                if value > best:
+                    best, best_card = value, card
+                    if best > alpha:
+                        alpha = best
+            elif value < best:
+                best, best_card = value, card
+                if best < beta:
+                    beta = best
+            if alpha >= beta:
+                break
+        hands[seat] = hand
+        if n == 0:
+            if best <= window_alpha:
+                upper = best
+            elif best >= window_beta:
+                lower = best
+            else:
+                lower = upper = best
+            self._tt[key] = (lower, upper, best_card)
+        return best
+
+    def _bounds(self, hands, remaining):
+        # The highest trumps left win whenever they are played. When they are all in one side's
+        # hands, that side is sure of their points, which bounds the value from that side.
+        total = points_in(remaining)
+        trumps = remaining & self._trump_mask
+        if not trumps:
+            return 0, total
+        mine = hands[self._me]
+        side = mine & trumps & -trumps  # Whether the highest trump left is the seat's own
+        sure = 0
+        while trumps:
+            card = trumps & -trumps
+            if (mine & card) != (side and card):
+                break
+            sure += CARD_POINTS[card.bit_length() - 1]
+            trumps ^= card
+        return (sure, total) if side else (0, total - sure)
+
+    def _estimate(self, hands, remaining):
+        # The seat's share of the points left, as its share of the card strength in play, within the bounds
+        lower, upper = self._bounds(hands, remaining)
+        strength = self._strength
+        held = [sum(strength[c] for c in cards_in(hand)) for hand in hands]
+        estimate = points_in(remaining) * held[self._me] // (sum(held) or 1)
+        return min(max(estimate, lower), upper)
+
+    def _last_trick(self, hands, leader):
+        # Every card is forced: play the trick out directly
+        cards = [hands[(leader + position) % NUM_PLAYERS].bit_length() - 1 for position in range(NUM_PLAYERS)]
+        if (leader + trick_winner(cards, self.trump_suit)) % NUM_PLAYERS != self._me:
+            return 0
+        return CARD_POINTS[cards[0]] + CARD_POINTS[cards[1]] + CARD_POINTS[cards[2]]
+
+
+def solve_state(state, deadline=None, tablebase=None):
+    """Return the points each seat can still guarantee in a trick-phase RoundState."""
+    solver = DoubleDummySolver(state.trump_suit, deadline, tablebase)
+    return solver.solve(state.hands, state.leader, state.current_trick)
@@ -0,0 +1,547 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from functools import lru_cache
+from itertools import combinations_with_replacement, product
+from math import comb
+from multiprocessing import Pool
+
+from engine import DECK_SIZE, JOKER, NO_SUIT, NUM_PLAYERS, NUM_TRICKS, POINT_VALUES, RANKS, SUITS, cards_in
+from solver import DoubleDummySolver
+
+# Tablebase file layout, all integers little-endian:
+#
+#   header      HEADER: magic b"CPTB", format version, tricks k, positions n,
+#               partitions p
+#   partitions  PARTITION[p]: file offset of the partition's block, its
+#               buckets b and its slots s
+#   blocks      per partition, uint32[b]: displacement of every hash bucket,
+#               then SLOT[s]: a 16-bit fingerprint of the key, and the
+#               points the leader, the seat after the leader and the seat
+#               before the leader can guarantee from the position
+#               (DoubleDummySolver.value); UNUSED in slots that hold no
+#               position
+#
+# A position is the start of a trick with k cards in every hand. Positions
+# that play identically share one entry through a canonical form:
+#   - seats are rotated so the leader is seat 0;
+#   - the trump suit becomes suit 0 and the other suits are sorted by their
+#     signature into suits 1-3 (with no trump, all four suits are sorted);
+#     a suit's signature lists the holder of each point card, then the
+#     holders of its zero-point cards from the highest down (skipping cards
+#     nobody holds when zero-point cards are moved up, see below);
+#   - unless the Joker is in play, zero-point cards are moved up to the top
+#     zero-point ranks in order, since no card in play can rank between two
+#     of them after that; a Joker lead makes cards of different suits
+#     compete on rank, so with the Joker in play every card keeps its rank.
+# The canonical hands give the key: the colexicographic rank of the 3k cards
+# in play among all C(37, 3k) sets, then the rank of hand 0 among those
+# cards, then of hand 1 among the rest, times two plus a no-trump flag. Keys
+# fit in 64 bits up to MAX_TRICKS tricks.
+#
+# The index is a partitioned CHD-style perfect hash over the n keys. With
+# h = mix(key, 0), a key belongs to partition h % p and to that partition's
+# bucket h // p % b; its slot is mix(key, d) % s, where d is the bucket's
+# displacement, chosen at build time so that no two keys of the partition
+# share a slot. Partitions hold about PARTITION_KEYS keys, so the build
+# never indexes more than that at once, and s is about their count / LOAD.
+# A lookup is three hashes and three reads; a slot whose fingerprint is not
+# mix(key, FINGERPRINT_SEED) >> 48 does not hold the position.
+#
+# Table sizes (count_positions; bytes at LOAD):
+#   k=1  5,472 positions                36 KB
+#   k=2  11,326,506 positions           74 MB
+#   k=3  11,810,605,824 positions       77 GB
+# Positions with the Joker in play keep every rank and make up 10.7e9 of
+# the k=3 positions. The builder accepts k=3, but solving 11.8e9 positions
+# takes weeks even on many cores, so the default table covers two tricks
+# and the solver searches the third.
+
+MAGIC = b"CPTB"
+VERSION = 2
+HEADER = struct.Struct("<4sHHQQ")
+PARTITION = struct.Struct("<QII")
+SLOT = struct.Struct("<H3B")
+UNUSED = 255
+LOAD = 0.9  # Lower loads build faster; 0.9 costs 6.7 bytes per position
+BUCKET_SIZE = 4
+PARTITION_KEYS = 1 << 20  # Keys indexed at once while building
+SPILL_KEYS = 1 << 24  # Keys held in memory while building before they are appended to the partition files
+FINGERPRINT_SEED = 0xFFFFFFFF  # Above any displacement, so fingerprints do not repeat a slot hash
+MASK64 = (1 << 64) - 1
+
+POINT_RANKS = sum(1 for rank in RANKS if POINT_VALUES[rank])  # RANKS lists every point card before the zeros
+SUIT_SIZE = len(RANKS)
+SUIT_BITS = (1 << SUIT_SIZE) - 1
+COMB = [[comb(n, k) for k in range(DECK_SIZE + 1)] for n in range(DECK_SIZE + 1)]
+# The most tricks whose keys, below 2 * C(37, 3k) * C(3k, k) * C(2k, k), all fit in 64 bits
+MAX_TRICKS = next((tricks - 1 for tricks in range(1, NUM_TRICKS + 1)
+                   if 2 * comb(DECK_SIZE, 3 * tricks) * comb(3 * tricks, tricks) * comb(2 * tricks, tricks) > 1 << 64),
+                  NUM_TRICKS)
+
+
+def mix(key, seed):
+    """64-bit hash of a key for one seed (the splitmix64 finalizer)."""
+    z = (key + seed * 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def _colex_unrank(rank, size, limit):
+    positions = []
+    for i in range(size, 0, -1):
+        position = limit - 1
+        while comb(position, i) > rank:
+            position -= 1
+        positions.append(position)
+        rank -= comb(position, i)
+        limit = position
+    return positions[::-1]
+
+
+def position_key(hands, no_trump):
+    """Return the key of canonical hands (see the layout notes above)."""
+    first_hand, second_hand = hands[0], hands[1]
+    tricks = first_hand.bit_count()
+    cards = first = second = 0
+    taken = held = 0
+    # Colex ranks add up C(position, i) over the i-th member of each set
+    for index, card in enumerate(cards_in(first_hand | second_hand | hands[2])):
+        cards += COMB[card][index + 1]
+        if first_hand >> card & 1:
+            taken += 1
+            first += COMB[index][taken]
+        elif second_hand >> card & 1:
+            held += 1
+            second += COMB[index - taken][held]
+    key = cards * COMB[3 * tricks][tricks] + first
+    return ((key * COMB[2 * tricks][tricks] + second) << 1) | no_trump
+
+
+def position_from_key(key, tricks):
+    """Return the canonical (hands, trump_suit) a key was made from."""
+    no_trump = key & 1
+    key >>= 1
+    key, second = divmod(key, comb(2 * tricks, tricks))
+    key, first = divmod(key, comb(3 * tricks, tricks))
+    cards = _colex_unrank(key, 3 * tricks, DECK_SIZE)
+    first = set(_colex_unrank(first, tricks, 3 * tricks))
+    rest = [card for i, card in enumerate(cards) if i not in first]
+    second = set(_colex_unrank(second, tricks, 2 * tricks))
+    hands = [sum(1 << cards[i] for i in first),
+             sum(1 << card for i, card in enumerate(rest) if i in second),
+             sum(1 << card for i, card in enumerate(rest) if i not in second)]
+    return hands, NO_SUIT if no_trump else 0
+
+
+def suit_signature(hands, suit, compress=True):
+    """Holder (1-3, or 0 for nobody) of each card of a suit, leaving out zero-point cards nobody holds if compress."""
+    signature = []
+    base = suit * SUIT_SIZE
+    for offset in range(SUIT_SIZE):
+        bit = 1 << (base + offset)
+        holder = 1 if hands[0] & bit else 2 if hands[1] & bit else 3 if hands[2] & bit else 0
+        if offset < POINT_RANKS or holder or not compress:
+            signature.append(holder)
+    return tuple(signature)
+
+
+def _encode(signatures, joker_holder):
+    hands = [0] * NUM_PLAYERS
+    for suit, signature in enumerate(signatures):
+        base = suit * SUIT_SIZE
+        for offset, holder in enumerate(signature):
+            if holder:
+                hands[holder - 1] |= 1 << (base + offset)
+    if joker_holder:
+        hands[joker_holder - 1] |= 1 << JOKER
+    return hands
+
+
+def _suit_form(masks, compress):
+    # (signature, canonical card mask of every seat) of one suit, from every seat's mask of it
+    form = _suit_forms.get((masks, compress))
+    if form is None:
+        signature = suit_signature(masks, 0, compress)
+        held = [0] * NUM_PLAYERS
+        for offset, holder in enumerate(signature):
+            if holder:
+                held[holder - 1] |= 1 << offset
+        form = _suit_forms[masks, compress] = (signature, held)
+    return form
+
+
+_suit_forms = {}
+
+
+def canonical_hands(hands, leader, trump_suit):
+    """Return the canonical hands of a trick-start position and whether it has no trump."""
+    first, second, third = (hands[(leader + i) % NUM_PLAYERS] for i in range(NUM_PLAYERS))
+    joker_holder = 1 if first >> JOKER & 1 else 2 if second >> JOKER & 1 else 3 if third >> JOKER & 1 else 0
+    forms = [_suit_form((first >> base & SUIT_BITS, second >> base & SUIT_BITS, third >> base & SUIT_BITS),
+                        not joker_holder) for base in range(0, JOKER, SUIT_SIZE)]
+    if trump_suit != NO_SUIT:
+        forms = [forms.pop(trump_suit)] + sorted(forms)
+    else:
+        forms.sort()
+    canonical = [0] * NUM_PLAYERS
+    for base, (_, held) in zip(range(0, JOKER, SUIT_SIZE), forms):
+        for seat in range(NUM_PLAYERS):
+            canonical[seat] |= held[seat] << base
+    if joker_holder:
+        canonical[joker_holder - 1] |= 1 << JOKER
+    return canonical, trump_suit == NO_SUIT
+
+
+def canonical_positions(tricks):
+    """Yield the key of every canonical position with the given number of tricks left."""
+    for shard in position_shards(tricks):
+        yield from shard_positions(tricks, shard)
+
+
+def position_shards(tricks):
+    """Return the shards that split the canonical positions, each small enough to build in one worker.
+
+    A shard is (joker holder, no-trump flag, class, signature index): with a
+    trump suit, the positions whose trump suit has that signature; with no
+    trump, those whose lowest suit in sorted order has it.
+    """
+    shards = []
+    for joker_holder in range(NUM_PLAYERS + 1):
+        classes = _signature_classes(tricks, compress=not joker_holder)
+        need = _need(tricks, joker_holder)
+        for vector, signatures in classes.items():
+            if min(n - v for n, v in zip(need, vector)) >= 0:
+                for no_trump in (False, True):
+                    shards.extend((joker_holder, no_trump, vector, index) for index in range(len(signatures)))
+    return shards
+
+
+def shard_positions(tricks, shard):
+    """Yield the key of every canonical position in one shard."""
+    joker_holder, no_trump, vector, index = shard
+    classes = _signature_classes(tricks, compress=not joker_holder)
+    first = classes[vector][index]
+    left = tuple(n - v for n, v in zip(_need(tricks, joker_holder), vector))
+    if no_trump:
+        # The rest come at or after the first suit in class order, so every multiset of suits is made once
+        for others in _multisets(classes, len(SUITS) - 1, left, list(classes).index(vector), index):
+            yield position_key(_encode(sorted([first] + others), joker_holder), True)
+    else:
+        for others in _multisets(classes, len(SUITS) - 1, left):
+            yield position_key(_encode([first] + sorted(others), joker_holder), False)
+
+
+def count_positions(tricks):
+    """Return the number of canonical positions with the given number of tricks left, without listing them."""
+    total = 0
+    for joker_holder in range(NUM_PLAYERS + 1):
+        compress = not joker_holder
+        classes = _signature_classes(tricks, compress)
+        need = _need(tricks, joker_holder)
+        for vector, signatures in classes.items():
+            left = tuple(n - v for n, v in zip(need, vector))
+            if min(left) >= 0:
+                total += len(signatures) * _count_multisets(tricks, compress, len(SUITS) - 1, left)
+        total += _count_multisets(tricks, compress, len(SUITS), need)
+    return total
+
+
+def _need(tricks, joker_holder):
+    # Cards each seat holds outside the Joker
+    return tuple(tricks - (joker_holder == seat) for seat in range(1, NUM_PLAYERS + 1))
+
+
+@lru_cache(maxsize=None)
+def _signature_classes(tricks, compress):
+    # Every suit signature holding at most tricks cards per seat, grouped by its card counts per seat
+    classes = {}
+    for points in product(range(NUM_PLAYERS + 1), repeat=POINT_RANKS):
+        if compress:
+            zeros = [held for count in range(SUIT_SIZE - POINT_RANKS + 1)
+                     for held in product(range(1, NUM_PLAYERS + 1), repeat=count)]
+        else:
+            zeros = product(range(NUM_PLAYERS + 1), repeat=SUIT_SIZE - POINT_RANKS)
+        for held in zeros:
+            signature = points + held
+            counts = tuple(signature.count(seat) for seat in range(1, NUM_PLAYERS + 1))
+            if max(counts) <= tricks:
+                classes.setdefault(counts, []).append(signature)
+    return dict(sorted(classes.items()))
+
+
+def _multisets(classes, size, need, start=0, first=0):
+    # Multisets of size signatures whose card counts add up to need, taking classes in order from the
+    # start class's signature number first
+    if size == 0:
+        if not any(need):
+            yield []
+        return
+    vectors = list(classes)
+    for index in range(start, len(vectors)):
+        vector = vectors[index]
+        signatures = classes[vector][first:] if index == start else classes[vector]
+        for copies in range(1, size + 1):
+            left = tuple(n - copies * v for n, v in zip(need, vector))
+            if min(left) < 0:
+                break
+            for tail in _multisets(classes, size - copies, left, index + 1):
+                for chosen in combinations_with_replacement(signatures, copies):
+                    yield list(chosen) + tail
+
+
+@lru_cache(maxsize=None)
+def _count_multisets(tricks, compress, size, need, start=0):
+    # How many multisets _multisets yields
+    if size == 0:
+        return 0 if any(need) else 1
+    classes = _signature_classes(tricks, compress)
+    vectors = list(classes)
+    total = 0
+    for index in range(start, len(vectors)):
+        vector = vectors[index]
+        for copies in range(1, size + 1):
+            left = tuple(n - copies * v for n, v in zip(need, vector))
+            if min(left) < 0:
+                break
+            total += (comb(len(classes[vector]) + copies - 1, copies)
+                      * _count_multisets(tricks, compress, size - copies, left, index + 1))
+    return total
+
+
+def build_index(keys, partitions=1, load=LOAD, bucket_size=BUCKET_SIZE):
+    """Return (slots, displacements) of a perfect hash over the distinct keys of one partition."""
+    slots = int(len(keys) / load) + 1
+    members = [[] for _ in range(max(1, len(keys) // bucket_size))]
+    for key in keys:
+        members[mix(key, 0) // partitions % len(members)].append(key)
+    displacements = array("I", bytes(4 * len(members)))
+    taken = bytearray(slots)
+    for bucket in sorted(range(len(members)), key=lambda b: -len(members[b])):
+        bucket_keys = members[bucket]
+        if not bucket_keys:
+            break
+        if len(set(bucket_keys)) != len(bucket_keys):
+            raise ValueError("Perfect hash keys must be distinct.")
+        displacement = 1
+        while True:
+            chosen = {mix(key, displacement) % slots for key in bucket_keys}
+            if len(chosen) == len(bucket_keys) and not any(taken[slot] for slot in chosen):
+                break
+            displacement += 1
+        for slot in chosen:
+            taken[slot] = 1
+        displacements[bucket] = displacement
+    return slots, displacements
+
+
+def fingerprint(key):
+    """The 16 bits of a key stored with its slot."""
+    return mix(key, FINGERPRINT_SEED) >> 48
+
+
+def shard_keys(job):
+    """Worker entry point: the keys of one shard, split by partition as {partition: array of keys}."""
+    tricks, partitions, shard = job
+    split = {}
+    for key in shard_positions(tricks, shard):
+        partition = mix(key, 0) % partitions
+        if partition not in split:
+            split[partition] = array("Q")
+        split[partition].append(key)
+    return split
+
+
+def solve_keys(job):
+    """Worker entry point: solved values for a chunk of keys, 3 bytes per key."""
+    tricks, keys = job
+    values = bytearray()
+    for key in keys:
+        hands, trump_suit = position_from_key(key, tricks)
+        values.extend(DoubleDummySolver(trump_suit).solve(hands, 0))
+    return values
+
+
+def build(path, tricks, workers=None, chunk_size=4096, progress=sys.stderr):
+    """Solve every position with tricks left in every hand and write a tablebase file.
+
+    Workers list the keys shard by shard into one spill file per partition
+    next to path; partitions are then indexed and solved one at a time, so
+    memory stays bounded by PARTITION_KEYS and SPILL_KEYS, not the table.
+    """
+    if not 1 <= tricks <= MAX_TRICKS:
+        raise ValueError(f"A tablebase covers 1 to {MAX_TRICKS} tricks.")
+    start_time = time.perf_counter()
+    positions = count_positions(tricks)
+    partitions = max(1, -(-positions // PARTITION_KEYS))
+    if progress:
+        print(f"{positions:,} canonical positions in {partitions:,} partitions", file=progress)
+    spill = f"{path}.keys"
+    os.makedirs(spill, exist_ok=True)
+    spill_paths = [os.path.join(spill, f"{partition}.keys") for partition in range(partitions)]
+    for spill_path in spill_paths:
+        open(spill_path, "wb").close()
+    with Pool(workers or os.cpu_count() or 1) as pool:
+        buffers = {}
+        buffered = listed = 0
+        jobs = ((tricks, partitions, shard) for shard in position_shards(tricks))
+        for count, split in enumerate(pool.imap_unordered(shard_keys, jobs, chunksize=64), 1):
+            for partition, keys in split.items():
+                buffers.setdefault(partition, array("Q")).extend(keys)
+                buffered += len(keys)
+                listed += len(keys)
+            if buffered >= SPILL_KEYS:
+                _spill(buffers, spill_paths)
+                buffered = 0
+            if progress and not count % 1024:
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{listed:,}/{positions:,} positions listed  {elapsed:.0f}s", end="", file=progress,
+                      flush=True)
+        _spill(buffers, spill_paths)
+        if progress:
+            print(f"\r{listed:,}/{positions:,} positions listed", file=progress)
+        if listed != positions:
+            raise RuntimeError(f"Listed {listed:,} positions but counted {positions:,}.")
+
+        temporary = f"{path}.tmp"
+        table = []
+        done = 0
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, tricks, positions, partitions))
+            f.write(bytes(PARTITION.size * partitions))
+            for partition, spill_path in enumerate(spill_paths):
+                keys = array("Q")
+                with open(spill_path, "rb") as keys_file:
+                    keys.frombytes(keys_file.read())
+                if sys.byteorder != "little":
+                    keys.byteswap()
+                slots, displacements = build_index(keys, partitions)
+                records = bytearray(SLOT.pack(0, UNUSED, UNUSED, UNUSED)) * slots
+                jobs = [(tricks, keys[start:start + chunk_size]) for start in range(0, len(keys), chunk_size)]
+                for job, solved in zip(jobs, pool.imap(solve_keys, jobs)):
+                    for i, key in enumerate(job[1]):
+                        slot = mix(key, displacements[mix(key, 0) // partitions % len(displacements)]) % slots
+                        SLOT.pack_into(records, SLOT.size * slot, fingerprint(key), *solved[3 * i:3 * i + 3])
+                    done += len(job[1])
+                    if progress:
+                        elapsed = time.perf_counter() - start_time
+                        print(f"\r{done:,}/{positions:,} positions solved  {elapsed:.0f}s", end="", file=progress,
+                              flush=True)
+                table.append((f.tell(), len(displacements), slots))
+                f.write(displacements.tobytes() if sys.byteorder == "little" else _swapped(displacements))
+                f.write(records)
+                os.remove(spill_path)
+            f.seek(HEADER.size)
+            f.write(b"".join(PARTITION.pack(*entry) for entry in table))
+    if progress:
+        print(file=progress)
+    os.rmdir(spill)
+    os.replace(temporary, path)
+
+
+def _spill(buffers, spill_paths):
+    # Append the buffered keys to their partitions' spill files and empty the buffers
+    for partition, keys in buffers.items():
+        if sys.byteorder != "little":
+            keys.byteswap()
+        with open(spill_paths[partition], "ab") as f:
+            keys.tofile(f)
+    buffers.clear()
+
+
+def _swapped(displacements):
+    swapped = array("I", displacements)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+class Tablebase:
+    """A memory-mapped tablebase file, answering endgames with one lookup."""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.tricks, self.positions, self.partitions = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} CounterPoint tablebase.")
+        self._table = [PARTITION.unpack_from(self._map, HEADER.size + PARTITION.size * partition)
+                       for partition in range(self.partitions)]
+        self.slots = sum(slots for _, _, slots in self._table)
+
+    def covers(self, hands):
+        """Whether a trick-start position with these hands is in the table."""
+        return hands[0].bit_count() == hands[1].bit_count() == hands[2].bit_count() == self.tricks
+
+    def lookup(self, hands, leader, trump_suit):
+        """Return the points every seat can guarantee from a covered trick-start position.
+
+        Returns None if the position's slot holds another key's fingerprint,
+        which only happens for positions the table was not built with.
+        """
+        offset = self._offset(hands, leader, trump_suit)
+        if offset is None:
+            return None
+        values = self._map[offset:offset + 3]
+        return [values[(seat - leader) % NUM_PLAYERS] for seat in range(NUM_PLAYERS)]
+
+    def value(self, hands, leader, trump_suit, seat):
+        """Return the points one seat can guarantee from a covered trick-start position, or None (see lookup)."""
+        offset = self._offset(hands, leader, trump_suit)
+        return None if offset is None else self._map[offset + (seat - leader) % NUM_PLAYERS]
+
+    def _offset(self, hands, leader, trump_suit):
+        # Offset of the position's values, or None if its slot's fingerprint belongs to another key
+        key = position_key(*canonical_hands(hands, leader, trump_suit))
+        hashed = mix(key, 0)
+        start, buckets, slots = self._table[hashed % self.partitions]
+        displacement, = struct.unpack_from("<I", self._map, start + 4 * (hashed // self.partitions % buckets))
+        offset = start + 4 * buckets + SLOT.size * (mix(key, displacement) % slots)
+        stored, = struct.unpack_from("<H", self._map, offset)
+        return offset + 2 if stored == fingerprint(key) else None
+
+    def close(self):
+        self._map.close()
+
+
+_open_tables = {}
+
+
+def open_tablebase(path):
+    """Return a shared Tablebase for a path, mapping the file on first use in this process."""
+    if path not in _open_tables:
+        _open_tables[path] = Tablebase(path)
+    return _open_tables[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect CounterPoint endgame tablebases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="solve every endgame position on every core")
+    build_parser.add_argument("--tricks", type=int, default=2,
+                              help=f"tricks left in the covered positions, 1 to {MAX_TRICKS} (default: 2)")
+    count_parser = commands.add_parser("count", help="count the positions of a table without building it")
+    count_parser.add_argument("tricks", type=int)
+    build_parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    build_parser.add_argument("--output", default=None, help="file to write (default: endgame<tricks>.cptb)")
+    info_parser = commands.add_parser("info", help="describe a tablebase file")
+    info_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.output or f"endgame{args.tricks}.cptb", args.tricks, workers=args.workers)
+    elif args.command == "count":
+        positions = count_positions(args.tricks)
+        size = positions * (SLOT.size / LOAD + 4 / BUCKET_SIZE)
+        print(f"{positions:,} canonical positions with {args.tricks} tricks left, about {size:,.0f} bytes")
+    else:
+        table = Tablebase(args.path)
+        print(f"{args.path}: {table.positions:,} positions with {table.tricks} tricks left "
+              f"in {table.slots:,} slots and {table.partitions:,} partitions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from batch import highest_play, random_play, simulate
+from engine import NUM_PLAYERS, SCORED, RoundState
+
+
+@pytest.mark.parametrize("play_policy", [random_play, highest_play])
+def test_batch_rounds_replay_through_the_engine(play_policy):
+    result = simulate(200, play_policy=play_policy, seed=1)
+    assert len(result) == 200
+    for i in range(len(result)):
+        state = RoundState(deal=[int(card) for card in result.deals[i]])
+        for seat in range(NUM_PLAYERS):
+            state.apply(tuple(int(card) for card in result.discards[i][seat]))
+        for card in result.plays[i]:
+            assert int(card) in state.legal_actions()
+            state.apply(int(card))
+        assert state.phase == SCORED
+        assert state.bids == result.bids[i].tolist()
+        assert state.points_won == result.points_won[i].tolist()
+        assert state.tricks_won == result.tricks_won[i].tolist()
+        assert state.round_scores() == result.round_scores[i].tolist()
+
+
+def test_batch_is_reproducible_from_its_seed():
+    first, second = simulate(50, seed=7), simulate(50, seed=7)
+    assert np.array_equal(first.plays, second.plays) and np.array_equal(first.round_scores, second.round_scores)
@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+
+from bidding import canonical_kept, evaluate_discards, play_groups
+from engine import CARD_BID, NUM_DISCARDS, mask_of
+
+
+def deal_hand(seed):
+    deck = list(range(37))
+    random.Random(seed).shuffle(deck)
+    return mask_of(deck[0:36:3]), deck[36]
+
+
+def test_every_discard_is_scored_best_first():
+    hand, trump_card = deal_hand(1)
+    options = evaluate_discards(hand, trump_card, samples=32, seed=3)
+    assert len(options) == 220
+    assert len({option.discard for option in options}) == 220
+    scores = [option.expected_score for option in options]
+    assert scores == sorted(scores, reverse=True)
+    for option in options:
+        assert len(option.discard) == NUM_DISCARDS and all(hand >> card & 1 for card in option.discard)
+        assert option.bid == sum(CARD_BID[card] for card in option.discard)
+
+
+def test_interchangeable_discards_share_results():
+    for seed in range(20):
+        hand, trump_card = deal_hand(seed)
+        groups = play_groups(hand, trump_card)
+        options = evaluate_discards(hand, trump_card, samples=16, seed=seed)
+        by_kept = {}
+        for option in options:
+            kept = canonical_kept(hand, option.discard, groups)
+            other = by_kept.setdefault(kept, option)
+            assert option.bid == other.bid
+            assert np.array_equal(option.round_scores, other.round_scores)
+
+
+def test_evaluation_is_reproducible_from_its_seed():
+    hand, trump_card = deal_hand(5)
+    first = evaluate_discards(hand, trump_card, samples=16, seed=9)
+    second = evaluate_discards(hand, trump_card, samples=16, seed=9)
+    assert [option.discard for option in first] == [option.discard for option in second]
+    assert [option.expected_score for option in first] == [option.expected_score for option in second]
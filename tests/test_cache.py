@@ -0,0 +1,44 @@
+import random
+
+from bidding import best_discard
+from cache import HandCache
+from engine import mask_of
+
+
+def deal_hand(seed):
+    deck = list(range(37))
+    random.Random(seed).shuffle(deck)
+    return mask_of(deck[0:36:3]), deck[36]
+
+
+def test_seeded_discards_are_cached():
+    cache = HandCache()
+    hand, trump_card = deal_hand(2)
+    first = best_discard(hand, trump_card, samples=16, seed=4, cache=cache)
+    assert best_discard(hand, trump_card, samples=16, seed=4, cache=cache) == first
+    assert best_discard(hand, trump_card, samples=16, seed=4) == first
+    assert cache.stats()["hits"] == 1 and len(cache) == 1
+    best_discard(hand, trump_card, samples=16, seed=5, cache=cache)
+    assert len(cache) == 2
+
+
+def test_unseeded_discards_are_not_cached():
+    cache = HandCache()
+    hand, trump_card = deal_hand(3)
+    best_discard(hand, trump_card, samples=16, cache=cache)
+    best_discard(hand, trump_card, samples=16, cache=cache)
+    assert len(cache) == 0 and cache.stats()["hits"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_and_saved(tmp_path):
+    path = str(tmp_path / "hands.cache")
+    cache = HandCache(max_bytes=3 * 200, path=path)
+    for key in range(4):
+        cache.put(key, (key, key + 1, key + 2))
+    assert 0 not in cache and 3 in cache and cache.evictions == 1
+    cache.get(1)
+    cache.put(4, (4, 5, 6))
+    assert 1 in cache and 2 not in cache
+    cache.save()
+    loaded = HandCache(path=path)
+    assert [key for key in (1, 3, 4) if key in loaded] == [1, 3, 4] and loaded.get(1) == (1, 2, 3)
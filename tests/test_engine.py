@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from cards import CARDS
+from engine import (BIDDING, DECK_SIZE, JOKER, NO_SUIT, NUM_PLAYERS, SCORED, SUITS, TRICK, CardSet, RoundState,
+                    card_id, cards_in, legal_plays, trick_winner, trump_suit_of)
+
+# The rules as the original gui.py applied them to Card objects, kept here as the reference
+RANK_ORDER = ["Six", "Seven", "Eight", "Nine", "Jack", "Queen", "King", "Ten", "Ace"]
+
+
+def gui_lead_suit(trick):
+    return trick[0].suit if trick and trick[0].suit != "Joker" else None
+
+
+def gui_trump_suit(trump_card):
+    return trump_card.suit if trump_card.rank not in ("Nine", "Joker") else None
+
+
+def gui_legal(hand, trick):
+    lead_suit = gui_lead_suit(trick)
+    if lead_suit and any(card.suit == lead_suit for card in hand):
+        return [card for card in hand if card.suit == lead_suit]
+    return list(hand)
+
+
+def gui_winner(trick, trump_card):
+    lead_suit, trump_suit = gui_lead_suit(trick), gui_trump_suit(trump_card)
+
+    def strength(card):
+        priority = 2 if trump_suit and card.suit == trump_suit else 1 if card.suit == lead_suit else 0
+        return priority, RANK_ORDER.index(card.rank) if card.rank in RANK_ORDER else -1
+
+    return max(range(len(trick)), key=lambda position: strength(trick[position]))
+
+
+def test_trump_suit_matches_gui():
+    for trump_card in range(DECK_SIZE):
+        expected = gui_trump_suit(CARDS[trump_card])
+        suit = trump_suit_of(trump_card)
+        assert (None if suit == NO_SUIT else CARDS[trump_card].suit) == expected
+
+
+def test_trick_winner_matches_gui():
+    rng = random.Random(1)
+    for _ in range(20000):
+        trick = rng.sample(range(DECK_SIZE), NUM_PLAYERS)
+        trump_card = rng.choice([card for card in range(DECK_SIZE) if card not in trick])
+        assert trick_winner(trick, trump_suit_of(trump_card)) == gui_winner([CARDS[c] for c in trick],
+                                                                          CARDS[trump_card])
+
+
+def test_joker_lead_is_won_on_rank_by_the_earliest_card():
+    # With no trump, a Joker lead leaves every card to compete on rank
+    aces = [card for card in range(JOKER) if CARDS[card].rank == "Ace"]
+    assert trick_winner([JOKER, aces[1], aces[2]], NO_SUIT) == 1
+
+
+def test_legal_plays_match_gui():
+    rng = random.Random(2)
+    for _ in range(5000):
+        cards = rng.sample(range(DECK_SIZE), 10)
+        hand, trick = cards[:7], cards[7:7 + rng.randrange(NUM_PLAYERS)]
+        lead_suit = CARDS[trick[0]].suit if trick else None
+        suit = SUITS.index(lead_suit) if lead_suit in SUITS else NO_SUIT
+        expected = sorted(card.id for card in gui_legal([CARDS[c] for c in hand], [CARDS[c] for c in trick]))
+        assert legal_plays(sum(1 << c for c in hand), suit) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_follows_gui_rules(seed):
+    rng = random.Random(seed)
+    state = RoundState(rng=rng)
+    assert state.phase == BIDDING
+    while state.phase == BIDDING:
+        state.apply(tuple(rng.sample(cards_in(state.hands[state.current_player]), 3)))
+    trump_card = CARDS[state.trump_card]
+    leader = state.leader
+    points = [0] * NUM_PLAYERS
+    while state.phase == TRICK:
+        trick = [CARDS[card] for card in state.current_trick]
+        hand = [CARDS[card] for card in cards_in(state.hands[state.current_player])]
+        assert sorted(state.legal_actions()) == sorted(card.id for card in gui_legal(hand, trick))
+        state.apply(rng.choice(state.legal_actions()))
+        trick.append(CARDS[state.plays[-1]])
+        if len(trick) == NUM_PLAYERS:
+            leader = (leader + gui_winner(trick, trump_card)) % NUM_PLAYERS
+            points[leader] += sum(card.point_value for card in trick)
+            assert state.leader == leader
+    assert state.phase == SCORED
+    assert state.points_won == points
+
+
+def test_card_sets_read_as_sets_of_card_ids():
+    cards = [card_id("Hearts", "Ace"), card_id("Hearts", "Six"), card_id("Spades", "Ten"), JOKER]
+    hand = CardSet.of(cards)
+    assert hand == CardSet.from_cards(CARDS[card] for card in cards)
+    assert list(hand) == sorted(cards) and len(hand) == 4 and JOKER in hand and 1 not in hand
+    assert hand.suit_counts() == [2, 0, 0, 1, 1] and hand.points() == 21
+    assert list(hand.legal_plays(0)) == cards[:2] and hand.legal_plays(1) == hand
+    assert hand.remove(JOKER).add(JOKER) == hand and isinstance(hand.suit(3), CardSet)
+    state = RoundState(rng=random.Random(2))
+    assert all(isinstance(hand, CardSet) and len(hand) == 12 for hand in state.hands)
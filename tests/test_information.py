@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from engine import BIDDING, NUM_PLAYERS, TRICK, RoundState, bid_value_of_mask, cards_in
+from information import InformationSet
+
+
+def random_position(seed):
+    rng = random.Random(seed)
+    state = RoundState(rng=rng)
+    while state.phase == BIDDING:
+        state.apply(tuple(rng.sample(cards_in(state.hands[state.current_player]), 3)))
+    for _ in range(rng.randrange(27)):
+        state.apply(rng.choice(state.legal_actions()))
+    return state, rng
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_sampled_deals_are_consistent_with_what_the_seat_sees(seed):
+    state, rng = random_position(seed)
+    seat = state.current_player if state.phase == TRICK else rng.randrange(NUM_PLAYERS)
+    info = InformationSet(state, seat)
+    for _ in range(20):
+        hands, discards = info.sample_deal(rng)
+        assert hands[seat] == state.hands[seat]
+        assert [hand.bit_count() for hand in hands] == [hand.bit_count() for hand in state.hands]
+        assert [bid_value_of_mask(discard) for discard in discards] == state.bids
+        assert not any(hands[other] & info.voids[other] for other in range(NUM_PLAYERS))
+        assert sum(hands) + sum(discards) == state.hands[0] | state.hands[1] | state.hands[2] | sum(state.discards)
@@ -0,0 +1,65 @@
+import json
+import types
+
+from instrumentation import Instruments
+
+
+class Table:
+    current_phase = None
+
+    def deal(self, n):
+        return n * 2
+
+
+def test_calls_are_wrapped_only_while_enabled():
+    instruments = Instruments()
+    module = types.SimpleNamespace(step=lambda: "done")
+    original = module.step
+    instruments.time_calls(module, ["step"], prefix="game.")
+    instruments.time_calls(Table, ["deal"])
+    assert module.step is original and "deal" in vars(Table)
+    deal = vars(Table)["deal"]
+
+    instruments.enable()
+    assert module.step() == "done" and module.step() == "done"
+    assert Table().deal(3) == 6
+    assert instruments.timers["game.step"][0] == 2 and instruments.timers["deal"][0] == 1
+
+    instruments.disable()
+    assert module.step is original and vars(Table)["deal"] is deal
+    module.step()
+    assert instruments.timers["game.step"][0] == 2
+
+
+def test_phase_changes_are_counted_and_timed():
+    instruments = Instruments()
+    instruments.watch_phase(Table)
+    instruments.enable()
+    table = Table()
+    table.current_phase = "bidding"
+    table.current_phase = "bidding"
+    table.current_phase = "tricks"
+    assert table.current_phase == "tricks"
+    assert instruments.counters == {"phase.enter.bidding": 1, "phase.enter.tricks": 1}
+    assert instruments.timers["phase.bidding"][0] == 1
+    instruments.disable()
+    assert "current_phase" in vars(Table) and vars(Table)["current_phase"] is None
+
+
+def test_report_and_dump(tmp_path):
+    instruments = Instruments()
+    instruments.count("cards")
+    instruments.count("cards", 2)
+    instruments.record("redraw", 0.002)
+    instruments.record("redraw", 0.004)
+    report = instruments.report()
+    assert report["counters"] == {"cards": 3}
+    redraw = report["timers"]["redraw"]
+    assert redraw["calls"] == 2 and abs(redraw["total_ms"] - 6) < 1e-9 and abs(redraw["max_ms"] - 4) < 1e-9
+    assert "redraw" in instruments.format_report()
+
+    path = tmp_path / "profile.json"
+    instruments.dump(str(path))
+    assert json.loads(path.read_text()) == report
+    instruments.reset()
+    assert instruments.report()["counters"] == {} and instruments.report()["timers"] == {}
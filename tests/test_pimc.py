@@ -0,0 +1,34 @@
+import random
+
+from bots import GreedyBot
+from engine import BIDDING, SCORED, RoundState
+from pimc import PIMCBot
+
+
+def test_every_decision_uses_all_samples():
+    bot = PIMCBot(samples=4, time_budget=0.2)
+    rng = random.Random(1)
+    state = RoundState(rng=random.Random(5))
+    while state.phase == BIDDING:
+        state.apply(GreedyBot().act(state, rng))
+    while state.phase != SCORED:
+        legal = state.legal_actions()
+        action = bot.act(state, rng) if state.current_player == 0 else GreedyBot().act(state, rng)
+        assert action in legal
+        if state.current_player == 0 and len(legal) > 1:
+            assert bot.last_samples_solved == 4 and bot.last_depth >= 1
+        state.apply(action)
+
+
+def test_solving_in_a_pool_matches_solving_here():
+    state = RoundState(rng=random.Random(8))
+    while state.phase == BIDDING:
+        state.apply(GreedyBot().act(state, None))
+    for _ in range(19):
+        state.apply(state.legal_actions()[0])
+    here, pooled = PIMCBot(samples=3, time_budget=5.0), PIMCBot(samples=3, time_budget=5.0, workers=1)
+    try:
+        assert here.act(state, random.Random(2)) == pooled.act(state, random.Random(2))
+        assert here.last_depth == pooled.last_depth == 3
+    finally:
+        pooled.close()
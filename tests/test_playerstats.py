@@ -0,0 +1,48 @@
+import random
+import statistics
+
+from playerstats import PlayerStats
+from scoring import bonus_for
+
+
+def test_running_values_match_a_recomputation():
+    rng = random.Random(4)
+    stats = PlayerStats(recent=5)
+    rounds = []
+    for number in range(1, 41):
+        bid, points_won = rng.randint(0, 40), rng.randint(0, 60)
+        difference = abs(bid - points_won)
+        bonus = bonus_for(difference)
+        round_score = points_won - difference + bonus
+        rounds.append((number, difference, bonus, round_score, points_won))
+        stats.add_round(number, bid, points_won, difference, bonus, round_score, tricks_won=1, cards_won=3)
+
+    differences = [r[1] for r in rounds]
+    assert stats.rounds == 40 and stats.total_tricks_won == 40 and stats.total_cards_won == 120
+    assert stats.total_points_won == sum(r[4] for r in rounds)
+    assert stats.total_bonus == sum(r[2] for r in rounds)
+    assert abs(stats.error_mean - statistics.mean(differences)) < 1e-9
+    assert abs(stats.error_variance - statistics.variance(differences)) < 1e-9
+    assert abs(stats.bonus_rate - sum(1 for r in rounds if r[2]) / 40) < 1e-9
+    assert sum(stats.bonus_tiers) == 40
+    assert stats.best_round.round_score == max(r[3] for r in rounds)
+    assert stats.worst_round.round_score == min(r[3] for r in rounds)
+
+    longest = streak = 0
+    for r in rounds:
+        streak = streak + 1 if r[2] else 0
+        longest = max(longest, streak)
+    assert stats.bonus_streak == streak and stats.longest_bonus_streak == longest
+    assert [detail.round for detail in stats.recent] == [36, 37, 38, 39, 40]
+
+
+def test_recent_summary_marks_dropped_rounds():
+    stats = PlayerStats(recent=2)
+    assert stats.recent_summary(str) == "None"
+    assert stats.error_variance == 0.0 and stats.bonus_rate == 0.0
+    for number in range(1, 3):
+        stats.add_round(number, 10, 10, 0, 30, 40)
+    assert stats.recent_summary(lambda detail: detail.round_score) == "R1: 40; R2: 40"
+    stats.add_round(3, 10, 0, 10, 0, -10)
+    assert stats.recent_summary(lambda detail: detail.round_score) == "...; R2: 40; R3: -10"
+    assert stats.bonus_streak == 0 and stats.longest_bonus_streak == 2
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from bots import GreedyBot, RandomBot
+from engine import SCORED, RoundState
+from records import COMPRESSIONS, RecordWriter, RoundRecord, read_records
+
+
+def play_round(seed):
+    rng = random.Random(seed)
+    bots = [GreedyBot(), RandomBot(), GreedyBot()]
+    state = RoundState(rng=rng)
+    while state.phase != SCORED:
+        state.apply(bots[state.current_player].act(state, rng))
+    return state
+
+
+def test_record_packs_and_unpacks():
+    for seed in range(20):
+        record = RoundRecord.from_state(play_round(seed), game=seed, round=seed % 3 + 1)
+        assert RoundRecord.unpack(record.pack()) == record
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSIONS))
+def test_record_file_round_trip(tmp_path, compression):
+    path = str(tmp_path / "games.cpgr")
+    records = [RoundRecord.from_state(play_round(seed), game=seed // 3, round=seed % 3 + 1) for seed in range(10)]
+    with RecordWriter(path, compression, block_records=4) as writer:
+        for record in records[:6]:
+            writer.write(record)
+    with RecordWriter(path, compression, block_records=4) as writer:
+        assert writer.next_game == 2
+        for record in records[6:]:
+            writer.write(record)
+    assert list(read_records(path)) == records
+
@@ -0,0 +1,47 @@
+import random
+
+from bots import GreedyBot, RandomBot
+from engine import SCORED, RoundState
+from records import RULES_CONSOLE, RecordWriter, RoundRecord
+from replay import replay_files, replay_round, replay_tricks
+
+
+def play_round(seed):
+    rng = random.Random(seed)
+    bots = [GreedyBot(), RandomBot(), GreedyBot()]
+    state = RoundState(rng=rng)
+    while state.phase != SCORED:
+        state.apply(bots[state.current_player].act(state, rng))
+    return state
+
+
+def test_replay_matches_the_recorded_round():
+    for seed in range(10):
+        state = play_round(seed)
+        record = RoundRecord.from_state(state)
+        assert record.to_state().points_won == state.points_won
+        assert replay_tricks(record) == (state.bids, state.tricks_won, state.points_won, None)
+        assert replay_round(record) == (state.round_scores(), None)
+
+
+def test_tampered_plays_are_reported():
+    record = RoundRecord.from_state(play_round(3))
+    record.plays[0], record.plays[1] = record.plays[1], record.plays[0]
+    assert replay_round(record)[1] is not None
+
+
+def test_replay_files_counts_changed_scores(tmp_path):
+    paths = []
+    for shard in range(2):
+        path = str(tmp_path / f"games{shard}.cpgr")
+        with RecordWriter(path) as writer:
+            for seed in range(6):
+                record = RoundRecord.from_state(play_round(10 * shard + seed), game=seed // 3, round=seed % 3 + 1)
+                if shard and seed == 4:
+                    record.scores = [score + 1 for score in record.scores]
+                writer.write(record)
+        paths.append(path)
+    summary = replay_files(paths, workers=1, progress=None)
+    assert (summary.rounds, summary.games, summary.broken, summary.changed) == (12, 4, 0, 1)
+    assert summary.shift == 3
+    assert replay_files(paths, rules=RULES_CONSOLE, check=False, workers=1, progress=None).rounds == 12
@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from bots import GreedyBot, RandomBot
+from engine import SCORED, RoundState
+from records import RecordWriter, RoundRecord
+from roundstore import RoundStore, ingest_records, ingest_simulated
+
+
+def write_games(path, seed, games=2):
+    rng = random.Random(seed)
+    bots = [GreedyBot(), RandomBot(), GreedyBot()]
+    with RecordWriter(path) as writer:
+        for game in range(games):
+            for round in range(1, 4):
+                state = RoundState(rng=rng)
+                while state.phase != SCORED:
+                    state.apply(bots[state.current_player].act(state, rng))
+                writer.write(RoundRecord.from_state(state, game=game, round=round))
+
+
+def test_flushed_rows_survive_reopening(tmp_path):
+    path = str(tmp_path / "store")
+    store = RoundStore(path)
+    ingest_simulated(store, 50, chunk_rounds=20, seed=1, progress=None)
+    store.append(99, 1, 0, store.player_id("Alice"), 0, 20, 25, 3, 5, 10, 35)
+    expected = {name: store.column(name).copy() for name in ("game", "bid", "round_score")}
+    store.flush()
+    reopened = RoundStore(path)
+    assert len(reopened) == 151 and reopened.players == ["Seat 0", "Seat 1", "Seat 2", "Alice"]
+    for name, values in expected.items():
+        assert np.array_equal(reopened.column(name), values)
+
+
+def test_group_by_matches_a_plain_mean():
+    store = RoundStore()
+    ingest_simulated(store, 200, seed=2, progress=None)
+    scores, seats = store.column("round_score"), store.column("seat")
+    for (seat,), (rows, mean) in store.group_by(["seat"], "round_score").items():
+        assert rows == 200 and abs(mean - scores[seats == seat].mean()) < 1e-9
+    for name, (rows, rate) in store.bonus_rate_by_player().items():
+        assert rows == 200 and abs(rate - (store.column("bonus")[seats == int(name[-1])] > 0).mean()) < 1e-9
+
+
+def test_each_record_file_has_its_own_players(tmp_path):
+    paths = [str(tmp_path / f"games{i}.cpgr") for i in range(2)]
+    for i, path in enumerate(paths):
+        write_games(path, i)
+    store = RoundStore()
+    assert ingest_records(store, paths, progress=None) == 12
+    assert store.players == [f"games{i}.cpgr: Player {p}" for i in range(2) for p in range(1, 4)]
+    assert sorted(set(store.column("game").tolist())) == [0, 1, 2, 3]
+    players, games = store.column("player"), store.column("game")
+    assert set(players[games < 2].tolist()) == {0, 1, 2} and set(players[games >= 2].tolist()) == {3, 4, 5}
+    for name, (rounds, _) in store.bonus_rate_by_player().items():
+        assert rounds == 6
+
+    named = RoundStore()
+    ingest_records(named, paths, names=["Ann", "Bob", "Cy"], progress=None)
+    assert named.players == ["Ann", "Bob", "Cy"]
+    assert all(rounds == 12 for rounds, _ in named.bonus_rate_by_player().values())
+    with pytest.raises(ValueError):
+        ingest_records(named, paths, names=["Ann"], progress=None)
@@ -0,0 +1,84 @@
+import random
+import struct
+
+import pytest
+
+from bots import GreedyBot
+from engine import NUM_PLAYERS, SET_ROUNDS, TARGET_SCORE, RoundState, cards_in
+from playerstats import PlayerStats
+from scoring import score_round
+from snapshot import MAX_LIMIT, GameSnapshot, read_snapshot, write_snapshot
+
+
+def stats_of(rng, rounds):
+    stats = PlayerStats()
+    for round in range(1, rounds + 1):
+        bid, points = rng.randrange(0, 100, 10), rng.randrange(100)
+        base, bonus, difference = score_round([bid], [points])[0]
+        stats.add_round(round, bid, points, difference, bonus, base + bonus, rng.randrange(10), rng.randrange(28))
+    return stats
+
+
+def stats_fields(stats):
+    details = [stats.best_round, stats.worst_round] + list(stats.recent)
+    return ({name: value for name, value in vars(stats).items() if name not in ("best_round", "worst_round",
+                                                                                  "recent")},
+            [None if detail is None else [getattr(detail, name) for name in detail.__slots__] for detail in details])
+
+
+def snapshot_of(seed, actions):
+    """A snapshot of a round stopped after some actions, with a mix of settings."""
+    rng = random.Random(seed)
+    bot = GreedyBot()
+    state = RoundState(rng=rng)
+    for _ in range(actions):
+        state.apply(bot.act(state, rng))
+    discards = [tuple(cards_in(mask)) for mask in state.discards if mask]
+    win_condition = TARGET_SCORE if seed % 2 else SET_ROUNDS
+    return GameSnapshot("trick" if len(discards) == NUM_PLAYERS else "bidding", win_condition,
+                        rng.randrange(1, MAX_LIMIT + 1) if win_condition == TARGET_SCORE else None,
+                        3 * rng.randrange(1, 100) if win_condition == SET_ROUNDS else None, rng.randrange(1, 50),
+                        ["Ann", "Björn", ""], [bool(seed & 1), False, bool(seed & 2)],
+                        [rng.randrange(-500, 5000) for _ in range(NUM_PLAYERS)], list(state.deal), discards,
+                        list(state.plays), [stats_of(rng, rng.randrange(30)) for _ in range(NUM_PLAYERS)]
+                        if seed % 3 else None), state
+
+
+@pytest.mark.parametrize("actions", [0, 2, 3, 10, 29])
+def test_snapshot_round_trip(actions):
+    for seed in range(8):
+        snapshot, state = snapshot_of(seed, actions)
+        restored = GameSnapshot.unpack(snapshot.pack())
+        for name in GameSnapshot.__slots__:
+            if name != "stats":
+                assert getattr(restored, name) == getattr(snapshot, name), name
+        if snapshot.stats is None:
+            assert restored.stats is None
+        else:
+            assert [stats_fields(stats) for stats in restored.stats] == [stats_fields(stats)
+                                                                         for stats in snapshot.stats]
+        replayed = restored.round_state()
+        assert (replayed.hands, replayed.bids, replayed.plays, replayed.current_player, replayed.points_won) == \
+            (state.hands, state.bids, state.plays, state.current_player, state.points_won)
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    snapshot, _ = snapshot_of(1, 12)
+    path = str(tmp_path / "nested" / "game.cpsn")
+    write_snapshot(path, snapshot)
+    assert read_snapshot(path).pack() == snapshot.pack()
+
+
+def test_corrupt_snapshots_are_rejected(tmp_path):
+    data = snapshot_of(2, 5)[0].pack()
+    for bad in (b"", data[:20], b"XXXX" + data[4:], data[:4] + b"\x09" + data[5:]):
+        with pytest.raises(ValueError):
+            GameSnapshot.unpack(bad)
+
+
+def test_limits_beyond_the_field_do_not_pack():
+    snapshot, _ = snapshot_of(1, 0)
+    snapshot.target_score = MAX_LIMIT + 1
+    with pytest.raises(struct.error):
+        snapshot.pack()
+
@@ -0,0 +1,70 @@
+import random
+import time
+
+import pytest
+
+from engine import CARD_POINTS, CARD_SUIT, DECK_SIZE, NO_SUIT, NUM_PLAYERS, cards_in, legal_mask, trick_winner
+from solver import DoubleDummySolver, SearchTimeout
+
+
+def minimax(hands, leader, trick, trump_suit, seat):
+    """Points seat can guarantee when the other two seats play against it, by full search."""
+    if not trick and not any(hands):
+        return 0
+    player = (leader + len(trick)) % NUM_PLAYERS
+    values = []
+    for card in cards_in(legal_mask(hands[player], CARD_SUIT[trick[0]] if trick else NO_SUIT)):
+        hands[player] ^= 1 << card
+        played = trick + [card]
+        if len(played) == NUM_PLAYERS:
+            winner = (leader + trick_winner(played, trump_suit)) % NUM_PLAYERS
+            won = sum(CARD_POINTS[c] for c in played) if winner == seat else 0
+            values.append(won + minimax(hands, winner, [], trump_suit, seat))
+        else:
+            values.append(minimax(hands, leader, played, trump_suit, seat))
+        hands[player] ^= 1 << card
+    return max(values) if player == seat else min(values)
+
+
+def random_position(rng, tricks, played):
+    cards = rng.sample(range(DECK_SIZE), NUM_PLAYERS * tricks)
+    hands = [sum(1 << card for card in cards[seat::NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+    leader = rng.randrange(NUM_PLAYERS)
+    trick = []
+    for position in range(played):
+        player = (leader + position) % NUM_PLAYERS
+        card = rng.choice(cards_in(legal_mask(hands[player], CARD_SUIT[trick[0]] if trick else NO_SUIT)))
+        hands[player] ^= 1 << card
+        trick.append(card)
+    return hands, leader, trick
+
+
+@pytest.mark.parametrize("tricks", [1, 2, 3, 4])
+def test_solver_matches_minimax(tricks):
+    rng = random.Random(tricks)
+    for _ in range(40 if tricks < 3 else 15):
+        hands, leader, trick = random_position(rng, tricks, rng.randrange(NUM_PLAYERS))
+        trump_suit = rng.choice(range(NO_SUIT + 1))
+        expected = [minimax(list(hands), leader, list(trick), trump_suit, seat) for seat in range(NUM_PLAYERS)]
+        assert DoubleDummySolver(trump_suit).solve(hands, leader, trick) == expected
+
+
+def test_move_values_match_minimax():
+    rng = random.Random(7)
+    for _ in range(10):
+        hands, leader, trick = random_position(rng, 2, 0)
+        trump_suit = rng.choice(range(NO_SUIT + 1))
+        values = DoubleDummySolver(trump_suit).move_values(hands, leader, trick)
+        for card, value in values.items():
+            rest = list(hands)
+            rest[leader] ^= 1 << card
+            assert value == minimax(rest, leader, [card], trump_suit, leader)
+
+
+def test_deadline_stops_a_full_solve():
+    rng = random.Random(11)
+    hands, leader, trick = random_position(rng, 9, 1)
+    solver = DoubleDummySolver(rng.randrange(NO_SUIT), deadline=time.monotonic())
+    with pytest.raises(SearchTimeout):
+        solver.solve(hands, leader, trick)
+    assert solver.nodes <= 1024
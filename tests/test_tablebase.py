@@ -0,0 +1,73 @@
+import random
+import struct
+
+import pytest
+
+import tablebase
+from engine import DECK_SIZE, NO_SUIT, NUM_PLAYERS
+from solver import DoubleDummySolver
+
+
+@pytest.fixture(scope="module")
+def one_trick_table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tablebase") / "endgame1.cptb")
+    partition_keys = tablebase.PARTITION_KEYS
+    tablebase.PARTITION_KEYS = 1000  # Several partitions even for the smallest table
+    try:
+        tablebase.build(path, 1, workers=1, progress=None)
+    finally:
+        tablebase.PARTITION_KEYS = partition_keys
+    table = tablebase.Tablebase(path)
+    yield path, table
+    table.close()
+
+
+def test_count_matches_listing():
+    assert tablebase.count_positions(1) == len(set(tablebase.canonical_positions(1))) == 5472
+    assert tablebase.count_positions(2) == 11326506
+    assert tablebase.count_positions(3) == 11810605824
+
+
+def test_keys_round_trip():
+    rng = random.Random(4)
+    for tricks in (1, 2, 3):
+        for _ in range(200):
+            cards = rng.sample(range(DECK_SIZE), NUM_PLAYERS * tricks)
+            hands = [sum(1 << card for card in cards[seat::NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+            canonical, no_trump = tablebase.canonical_hands(hands, 0, NO_SUIT if rng.random() < 0.2 else 0)
+            key = tablebase.position_key(canonical, no_trump)
+            assert tablebase.position_from_key(key, tricks) == (canonical, NO_SUIT if no_trump else 0)
+
+
+def test_lookups_match_the_solver(one_trick_table):
+    _, table = one_trick_table
+    assert table.partitions > 1
+    rng = random.Random(5)
+    for _ in range(2000):
+        hands = [1 << card for card in rng.sample(range(DECK_SIZE), NUM_PLAYERS)]
+        leader, trump_suit = rng.randrange(NUM_PLAYERS), rng.randrange(NO_SUIT + 1)
+        assert table.lookup(hands, leader, trump_suit) == DoubleDummySolver(trump_suit).solve(hands, leader)
+
+
+def test_wrong_fingerprints_fall_back_to_search(one_trick_table, tmp_path):
+    path, table = one_trick_table
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    for start, buckets, slots in table._table:
+        for slot in range(slots):
+            offset = start + 4 * buckets + tablebase.SLOT.size * slot
+            struct.pack_into("<H", data, offset, struct.unpack_from("<H", data, offset)[0] ^ 1)
+    broken_path = tmp_path / "broken.cptb"
+    broken_path.write_bytes(bytes(data))
+    broken = tablebase.Tablebase(str(broken_path))
+    rng = random.Random(6)
+    for _ in range(200):
+        hands = [1 << card for card in rng.sample(range(DECK_SIZE), NUM_PLAYERS)]
+        assert broken.lookup(hands, 0, 1) is None
+        assert DoubleDummySolver(1, tablebase=broken).solve(hands, 0) == DoubleDummySolver(1).solve(hands, 0)
+    broken.close()
+
+
+def test_tricks_beyond_64_bit_keys_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        tablebase.build(str(tmp_path / "endgame.cptb"), tablebase.MAX_TRICKS + 1, progress=None)
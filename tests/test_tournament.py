@@ -0,0 +1,32 @@
+import pytest
+
+from engine import TARGET_SCORE
+from tournament import TournamentStats, play_chunk, run_tournament
+
+
+def summary(stats):
+    return stats.games, stats.rounds, stats.draws, stats.wins, stats.shared_wins, stats.total_scores
+
+
+def test_results_do_not_depend_on_the_number_of_workers():
+    names = ["random", "greedy", "random"]
+    single = run_tournament(names, 30, workers=1, chunk_size=7, seed=3, target_score=100, progress=None)
+    pooled = run_tournament(names, 30, workers=2, chunk_size=7, seed=3, target_score=100, progress=None)
+    assert summary(single) == summary(pooled)
+    assert single.games == 30
+    assert sum(single.wins) + single.draws == 30
+
+
+def test_chunks_merge_to_the_whole_tournament():
+    names = ["random", "greedy", "random"]
+    settings = {"win_condition": TARGET_SCORE, "target_score": 100, "max_rounds": None}
+    whole = run_tournament(names, 12, workers=1, chunk_size=6, seed=1, target_score=100, progress=None)
+    merged = TournamentStats(names)
+    for chunk in range(2):
+        merged.merge(play_chunk((names, chunk, chunk * 6, 6, 1, settings)))
+    assert summary(merged) == summary(whole)
+
+
+def test_three_entrants_are_required():
+    with pytest.raises(ValueError):
+        run_tournament(["random", "greedy"], 1, progress=None)
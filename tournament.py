@@ -0,0 +1,130 @@
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import permutations
+from multiprocessing import Pool
+
+from bots import BOTS, make_bot
+from engine import SET_ROUNDS, TARGET_SCORE, play_game
+
+SEATINGS = list(permutations(range(3)))  # Games cycle through every seating to cancel seat bias
+CHUNK_SIZE = 60  # Games per work unit; fixed so that results never depend on the number of workers
+
+
+class TournamentStats:
+    """Aggregated results for the three entrants, mergeable across workers."""
+    def __init__(self, names):
+        self.names = list(names)
+        self.games = 0
+        self.rounds = 0
+        self.draws = 0
+        self.wins = [0] * len(names)  # Outright wins only; shared first places count as draws
+        self.shared_wins = [0] * len(names)
+        self.total_scores = [0] * len(names)
+
+    def add(self, result, seating):
+        """Record a GameResult whose player i was entrant seating[i]."""
+        self.games += 1
+        self.rounds += result.rounds
+        for player, entrant in enumerate(seating):
+            self.total_scores[entrant] += result.scores[player]
+        if result.is_draw:
+            self.draws += 1
+            for player in result.winners:
+                self.shared_wins[seating[player]] += 1
+        else:
+            self.wins[seating[result.winners[0]]] += 1
+
+    def merge(self, other):
+        self.games += other.games
+        self.rounds += other.rounds
+        self.draws += other.draws
+        for i in range(len(self.names)):
+            self.wins[i] += other.wins[i]
+            self.shared_wins[i] += other.shared_wins[i]
+            self.total_scores[i] += other.total_scores[i]
+
+    def report(self):
+        lines = [f"{self.games} games, {self.rounds} rounds, {self.draws} draws"]
+        for i, name in enumerate(self.names):
+            games = max(self.games, 1)
+            lines.append(f"  {i + 1}. {name:<10} wins {self.wins[i]:>7} ({100 * self.wins[i] / games:5.1f}%)  "
+                         f"shared {self.shared_wins[i]:>6}  avg score {self.total_scores[i] / games:7.1f}")
+        return "\n".join(lines)
+
+
+def chunk_rng(seed, chunk):
+    """Independent, reproducible random stream for one chunk of games."""
+    return random.Random(f"counterpoint:{seed}:{chunk}")
+
+
+def play_chunk(job):
+    """Worker entry point: play one chunk of games and return its merged stats."""
+    names, chunk, first_game, games, seed, settings = job
+    bots = [make_bot(name) for name in names]
+    rng = chunk_rng(seed, chunk)
+    stats = TournamentStats(names)
+    for game in range(first_game, first_game + games):
+        seating = SEATINGS[game % len(SEATINGS)]
+        result = play_game([bots[entrant] for entrant in seating], rng=rng, **settings)
+        stats.add(result, seating)
+    return stats
+
+
+def run_tournament(names, games, workers=None, chunk_size=CHUNK_SIZE, seed=0, win_condition=TARGET_SCORE,
+                   target_score=500, max_rounds=None, progress=sys.stderr):
+    """Play games between three named bots across a process pool and return TournamentStats.
+
+    Games are split into chunks of chunk_size, each played with an RNG stream
+    drawn from the seed and the chunk's index, so results depend only on the
+    seed and chunk size, not on the number of workers.
+    """
+    if len(names) != 3:
+        raise ValueError("A CounterPoint tournament needs exactly three bots.")
+    workers = workers or os.cpu_count() or 1
+    settings = {"win_condition": win_condition, "target_score": target_score, "max_rounds": max_rounds}
+    jobs = [(names, chunk, start, min(chunk_size, games - start), seed, settings)
+            for chunk, start in enumerate(range(0, games, chunk_size))]
+
+    stats = TournamentStats(names)
+    start_time = time.perf_counter()
+    with Pool(workers) as pool:
+        for partial in pool.imap_unordered(play_chunk, jobs):
+            stats.merge(partial)
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                rate = stats.games / elapsed if elapsed else 0.0
+                remaining = (games - stats.games) / rate if rate else 0.0
+                print(f"\r{stats.games}/{games} games  {rate:,.0f} games/s  "
+                      f"{stats.rounds / elapsed if elapsed else 0:,.0f} rounds/s  ETA {remaining:.0f}s",
+                      end="", file=progress, flush=True)
+    if progress:
+        print(file=progress)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play CounterPoint bot tournaments on every core.")
+    parser.add_argument("bots", nargs=3, choices=sorted(BOTS), help="the three entrants")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"games per work unit (default: {CHUNK_SIZE}); results depend on it")
+    parser.add_argument("--seed", type=int, default=0)
+    condition = parser.add_mutually_exclusive_group()
+    condition.add_argument("--target", type=int, default=500, help="play to a target score (default)")
+    condition.add_argument("--rounds", type=int, help="play a set number of rounds (1 or a multiple of 3)")
+    args = parser.parse_args(argv)
+
+    settings = {"target_score": args.target}
+    if args.rounds is not None:
+        settings = {"win_condition": SET_ROUNDS, "max_rounds": args.rounds}
+    stats = run_tournament(args.bots, args.games, workers=args.workers, chunk_size=args.chunk_size,
+                           seed=args.seed, **settings)
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()